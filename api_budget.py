@@ -0,0 +1,145 @@
+import math
+import re
+import threading
+from typing import Dict, Any, Optional
+
+# Reddit's published price for the paid API tier
+DEFAULT_COST_PER_1000_CALLS = 0.24
+
+# Reddit returns at most this many items per listing page
+LISTING_PAGE_SIZE = 100
+
+# Comment tree of a submission, optionally under its subreddit: [r/<sub>/]comments/<id>
+COMMENT_TREE_RE = re.compile(r"^(r/[^/]+/)?comments/[a-z0-9]+")
+
+
+class BudgetExceeded(Exception):
+    """Raised before a request that would go over the API budget"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.partial_results = []  # Results gathered by the interrupted request, if any
+
+
+def classify_endpoint(path: str) -> str:
+    """
+    Map a Reddit API path to the endpoint name used for accounting
+
+    Args:
+        path: Request path, e.g. "r/Fishing/search" or "comments/abc123"
+
+    Returns:
+        One of "search", "morechildren", "comments", "listing" or "other"
+    """
+    path = path.lower().strip("/")
+    if "morechildren" in path:
+        return "morechildren"
+    if path.endswith("search"):
+        return "search"
+    # A comment tree is comments/<id>; r/<sub>/comments is the subreddit's comment stream
+    if COMMENT_TREE_RE.match(path):
+        return "comments"
+    if path.endswith(("/new", "/comments", "/hot", "/top")):
+        return "listing"
+    return "other"
+
+
+class ApiBudget:
+    """
+    Counts Reddit API calls by endpoint and enforces a hard budget
+
+    A budget instance is shared by every RedditService taking part in a run
+    (see RedditService.clone), so the limit applies to the run as a whole.
+    """
+
+    def __init__(self, max_cost: Optional[float] = None,
+                 cost_per_1000_calls: float = DEFAULT_COST_PER_1000_CALLS):
+        """
+        Initialize the meter
+
+        Args:
+            max_cost: Budget in dollars; None only counts calls
+            cost_per_1000_calls: Price of 1,000 API calls in dollars
+        """
+        self.cost_per_1000_calls = cost_per_1000_calls
+        self.max_calls = None
+        if max_cost is not None:
+            self.max_calls = int(max_cost / cost_per_1000_calls * 1000) if cost_per_1000_calls > 0 else None
+        self.calls_by_endpoint: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total_calls(self) -> int:
+        """Number of calls made so far"""
+        return sum(self.calls_by_endpoint.values())
+
+    @property
+    def cost(self) -> float:
+        """Dollars spent so far"""
+        return self.total_calls * self.cost_per_1000_calls / 1000
+
+    def charge(self, path: str) -> None:
+        """
+        Account for a request about to be made
+
+        Args:
+            path: Request path
+
+        Raises:
+            BudgetExceeded: If the budget has no calls left
+        """
+        endpoint = classify_endpoint(path)
+        with self._lock:
+            if self.max_calls is not None and self.total_calls >= self.max_calls:
+                raise BudgetExceeded(f"API budget of {self.max_calls} calls "
+                                     f"(${self.max_calls * self.cost_per_1000_calls / 1000:.2f}) exhausted")
+            self.calls_by_endpoint[endpoint] = self.calls_by_endpoint.get(endpoint, 0) + 1
+
+    def summary(self) -> str:
+        """Human readable call counts for the search log"""
+        breakdown = ", ".join(f"{endpoint}: {count}" for endpoint, count in sorted(self.calls_by_endpoint.items()))
+        limit = f" of {self.max_calls} allowed" if self.max_calls is not None else ""
+        return f"API usage: {self.total_calls} calls{limit} (${self.cost:.2f}) - {breakdown or 'no calls'}"
+
+
+def estimate_run_cost(planned_calls: int, limit: int, include_comments: bool,
+                      naive_calls: Optional[int] = None,
+                      cost_per_1000_calls: float = DEFAULT_COST_PER_1000_CALLS,
+                      search_limits: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+    """
+    Estimate the API calls and cost of a proposed search run
+
+    Each search call pages through up to `limit` results at 100 per page, and
+    every returned submission costs one more call for its comment tree. This
+    is an upper bound: searches often return fewer results than `limit`, and
+    the comment cache avoids refetching submissions returned more than once.
+
+    Args:
+        planned_calls: Search calls in the plan (QueryPlan.planned_calls)
+        limit: Maximum posts fetched per search call
+        include_comments: Whether comment trees are fetched
+        naive_calls: Search calls of the one-keyword-per-call plan, for comparison
+        cost_per_1000_calls: Price of 1,000 API calls in dollars
+        search_limits: Search calls per scaled limit (QueryPlan.search_limits), when
+            compiled queries and multireddits fetch more than `limit` posts per call
+
+    Returns:
+        Dictionary with search page calls, comment calls, total calls and cost
+        (plus the same for the naive plan when naive_calls is given)
+    """
+    def estimate(limits: Dict[int, int]) -> Dict[str, Any]:
+        pages = sum(calls * max(1, math.ceil(call_limit / LISTING_PAGE_SIZE))
+                    for call_limit, calls in limits.items())
+        comment_calls = sum(calls * call_limit for call_limit, calls in limits.items()) if include_comments else 0
+        total = pages + comment_calls
+        return {
+            'search_calls': pages,
+            'comment_calls': comment_calls,
+            'total_calls': total,
+            'cost': total * cost_per_1000_calls / 1000
+        }
+
+    result = estimate(search_limits if search_limits is not None else {limit: planned_calls})
+    if naive_calls is not None:
+        result['naive'] = estimate({limit: naive_calls})
+    return result
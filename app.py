@@ -7,7 +7,15 @@ import time
 from data_processor import DataProcessor
 from reddit_service import RedditService
 from utils import get_timestamp, display_progress, save_to_csv
-from web_scraper import get_website_text_content
+from web_scraper import permalink_url, ContentEnricher
+from thread_context import ThreadContextFetcher
+from page_cache import PageCache
+from mention_store import MentionStore, KeywordStatsStore, MENTION_COLUMNS, MERGED_COLUMNS
+from query_planner import QueryPlanner, keyword_yield, REDDIT_MAX_SEARCH_RESULTS
+from geo_router import GeoRouter
+from api_budget import estimate_run_cost, DEFAULT_COST_PER_1000_CALLS
+from job_runner import (JobStore, ensure_worker_running, is_resumable, remaining_budget, credentials_fingerprint,
+                        FINISHED_STATES, COMPLETED, FAILED, INTERRUPTED, STREAM)
 
 # Load environment variables
 # try:
@@ -17,6 +25,18 @@ from web_scraper import get_website_text_content
 
 # Initialize services
 data_processor = DataProcessor()
+mention_store = MentionStore()
+keyword_stats_store = KeywordStatsStore(mention_store.db_path)
+geo_router = GeoRouter()
+page_cache = PageCache()
+job_store = JobStore()
+
+# Seconds between polls of the job store while a search job is shown
+JOB_POLL_SECONDS = 2
+JOB_LOG_LINES = 20
+
+# Mentions shown per page in the Results tab
+RESULTS_PAGE_SIZE = 50
 
 # Page configuration
 st.set_page_config(
@@ -30,24 +50,10 @@ if 'plants_data' not in st.session_state:
     st.session_state.plants_data = None
 if 'vessels_data' not in st.session_state:
     st.session_state.vessels_data = None
-if 'plants_results' not in st.session_state:
-    st.session_state.plants_results = []
-if 'vessels_results' not in st.session_state:
-    st.session_state.vessels_results = []
-if 'search_in_progress' not in st.session_state:
-    st.session_state.search_in_progress = False
-if 'progress' not in st.session_state:
-    st.session_state.progress = 0
-if 'current_task' not in st.session_state:
-    st.session_state.current_task = ""
-if 'start_time' not in st.session_state:
-    st.session_state.start_time = None
-if 'total_steps' not in st.session_state:
-    st.session_state.total_steps = 0
-if 'completed_steps' not in st.session_state:
-    st.session_state.completed_steps = 0
-if 'search_log' not in st.session_state:
-    st.session_state.search_log = []
+if 'active_job_id' not in st.session_state:
+    st.session_state.active_job_id = None
+if 'mention_texts' not in st.session_state:
+    st.session_state.mention_texts = {}
 if 'reddit_client_id' not in st.session_state:
     st.session_state.reddit_client_id = st.secrets.get("REDDIT_CLIENT_ID") or os.getenv('REDDIT_CLIENT_ID', '')
 if 'reddit_client_secret' not in st.session_state:
@@ -94,6 +100,320 @@ This application monitors Reddit for mentions of fishing industry entities:
 4. Generate reports with the details of mentions
 """)
 
+def entity_index(entity_type: str):
+    """EntityIndex over the loaded CSV of an entity type, or None if no CSV is loaded"""
+    df = st.session_state.get(f"{entity_type}s_data")
+    name_col = st.session_state.get(f"{entity_type}s_name_col_value")
+    if df is None or name_col is None:
+        return None
+    return data_processor.build_entity_index(
+        df,
+        name_col=name_col,
+        owner_col=st.session_state.get(f"{entity_type}s_owner_col_value", name_col)
+    )
+
+def session_credentials():
+    """Reddit credentials entered in this session, for the job worker"""
+    return {'client_id': st.session_state.reddit_client_id,
+            'client_secret': st.session_state.reddit_client_secret}
+
+def entity_ref_sets(keyword_sets):
+    """Encoded entity refs for each searched keyword, keyed like keyword_sets"""
+    ref_sets = {}
+    for entity_type, keywords in keyword_sets.items():
+        index = entity_index(entity_type)
+        if index is not None:
+            ref_sets[entity_type] = index.ref_map(keywords)
+    return ref_sets
+
+def render_mentions(entity_type: str, plural: str):
+    """Render the stored mentions of one entity type with subreddit, keyword and date filters"""
+    total = mention_store.count_mentions(entity_type)
+    if not total:
+        st.info(f"No {plural} mentions found in the search results.")
+        return
+    
+    # Filters are answered by indexed queries on the mention store
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        subreddit = st.selectbox(
+            "Subreddit", options=[""] + mention_store.distinct_values(entity_type, 'subreddit'),
+            format_func=lambda s: s or "All subreddits", key=f"{plural}_subreddit_filter"
+        )
+    with col2:
+        keyword = st.selectbox(
+            "Keyword", options=[""] + mention_store.distinct_values(entity_type, 'keyword'),
+            format_func=lambda k: k or "All keywords", key=f"{plural}_keyword_filter"
+        )
+    with col3:
+        since_date = st.date_input("Since", value=None, key=f"{plural}_since_filter")
+    since = since_date.isoformat() if since_date else None
+    merged = st.checkbox("One row per post/comment (merge keyword hits)", value=True, key=f"{plural}_merged",
+                         help="A post matched by a name and its individual words is listed once with all of them")
+    
+    # Only the current page is loaded from the store
+    matching = mention_store.count_mentions(entity_type, subreddit=subreddit, keyword=keyword, since=since,
+                                            merged=merged)
+    if merged:
+        total = mention_store.count_mentions(entity_type, merged=True)
+    st.subheader(f"Found {matching} of {total} mentions of {plural}")
+    if not matching:
+        return
+    
+    page_count = (matching + RESULTS_PAGE_SIZE - 1) // RESULTS_PAGE_SIZE
+    filters = (subreddit, keyword, since, merged)
+    if st.session_state.get(f"{plural}_filters") != filters:
+        # Start from the first page whenever the filters change
+        st.session_state[f"{plural}_filters"] = filters
+        st.session_state[f"{plural}_page"] = 1
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key=f"{plural}_page")
+    
+    mentions = mention_store.query_mentions(entity_type, subreddit=subreddit, keyword=keyword, since=since,
+                                            limit=RESULTS_PAGE_SIZE, offset=(page - 1) * RESULTS_PAGE_SIZE,
+                                            merged=merged)
+    st.dataframe(pd.DataFrame(mentions).drop(columns=['entity_refs']), hide_index=True)
+    
+    # Report grouped by the CSV rows the matched keywords came from
+    index = entity_index(entity_type)
+    if index is not None and st.checkbox(f"Group mentions by {entity_type}", key=f"{plural}_group_by_entity"):
+        by_entity = index.group_mentions(
+            mention_store.mention_entity_refs(entity_type, subreddit=subreddit, keyword=keyword, since=since)
+        )
+        st.caption(f"{len(by_entity)} {plural} mentioned")
+        st.dataframe(by_entity, hide_index=True)
+    
+    # Download button; the CSV is rebuilt only when the stored mentions change
+    csv_filename = f"{plural}_reddit_mentions_{get_timestamp()}.csv"
+    csv_data = mentions_csv(entity_type, subreddit, keyword, since, merged, mention_store.result_version(entity_type))
+    
+    if st.download_button(
+        label=f"Download {plural.capitalize()} Results as CSV",
+        data=csv_data,
+        file_name=csv_filename,
+        mime="text/csv"
+    ):
+        st.success(f"Downloaded {csv_filename}")
+    
+    # Fetch the context of every mention on this page at once
+    if st.button(f"Get additional content for this page ({len(mentions)} mentions)", key=f"enrich_{plural}_{page}"):
+        progress_bar = st.progress(0.0)
+        st.session_state.mention_texts.update(fetch_mention_context(
+            mentions, progress_callback=lambda value, text: progress_bar.progress(min(1.0, value), text=text)
+        ))
+    
+    # Detailed view of the selected mention only
+    st.subheader("Detailed View")
+    
+    selected = st.selectbox(
+        "Mention", options=range(len(mentions)),
+        format_func=lambda i: f"{mentions[i]['keyword']} - {mentions[i]['title']}",
+        key=f"{plural}_detail_{page}"
+    )
+    mention = mentions[selected]
+    st.markdown(f"**Keyword:** {mention['keyword']}")
+    if merged:
+        st.markdown(f"**All matched keywords:** {mention['keywords']}")
+    st.markdown(f"**Post/Comment ID:** {mention['id']}")
+    st.markdown(f"**Title/Context:** {mention['title']}")
+    st.markdown(f"**Author:** {mention['author']}")
+    st.markdown(f"**Date/Time:** {mention['datetime']}")
+    st.markdown(f"**Subreddit:** r/{mention['subreddit']}")
+    
+    # Create a permalink with full URL
+    full_url = permalink_url(mention['permalink'])
+    st.markdown(f"**Permalink:** [Link to post]({full_url})")
+    
+    st.markdown("**Snippet:**")
+    st.markdown(f"> {mention['snippet']}")
+    
+    # Source label (post or comment)
+    st.markdown(f"**Source:** {mention['source']}")
+    
+    # Content already fetched for this mention
+    mention_text = st.session_state.mention_texts.get(mention['id'])
+    if mention_text:
+        st.text_area("Full Text Content", mention_text, height=300, key=f"mention_text_{entity_type}_{mention['id']}")
+    
+    # Add a button to fetch additional content
+    elif st.button(f"Get additional content for {mention['keyword']}",
+                 key=f"scrape_{entity_type}_{mention['id']}_{mention['keyword']}"):
+        try:
+            with st.spinner("Fetching additional content..."):
+                scraped_content = fetch_mention_context([mention]).get(mention['id'])
+                if scraped_content:
+                    st.session_state.mention_texts[mention['id']] = scraped_content
+                    st.subheader("Additional Content")
+                    st.text_area("Full Text Content", scraped_content, height=300)
+                    st.success("Successfully retrieved additional content")
+                else:
+                    st.warning("No additional content could be retrieved")
+        except Exception as e:
+            st.error(f"Error retrieving additional content: {str(e)}")
+
+def fetch_mention_context(mentions, progress_callback=None):
+    """
+    Extra context for mentions, keyed by mention id
+
+    With Reddit API credentials the post body and the comments around each
+    matched comment come from the thread's JSON (off-site links of link posts
+    are scraped); without them the permalink pages are scraped instead.
+    """
+    with ContentEnricher(cache=page_cache) as enricher:
+        if st.session_state.reddit_client_id and st.session_state.reddit_client_secret:
+            reddit_service = RedditService(
+                client_id=st.session_state.reddit_client_id,
+                client_secret=st.session_state.reddit_client_secret,
+                user_agent=st.session_state.reddit_user_agent,
+                comment_cache_dir="cache/comments"
+            )
+            fetcher = ThreadContextFetcher(reddit_service, fallback=enricher)
+            texts = fetcher.fetch(mentions, progress_callback=progress_callback)
+            st.caption(fetcher.summary())
+        else:
+            pages = enricher.enrich([permalink_url(m['permalink']) for m in mentions],
+                                    progress_callback=progress_callback)
+            texts = {m['id']: pages.get(permalink_url(m['permalink'])) for m in mentions}
+            st.caption(enricher.summary())
+    return texts
+
+@st.cache_data(max_entries=8, show_spinner="Preparing CSV...")
+def mentions_csv(entity_type: str, subreddit: str, keyword: str, since, merged: bool, version: str) -> str:
+    """
+    CSV export of the mentions matching the filters
+
+    `version` (MentionStore.result_version) is only part of the cache key, so
+    the CSV is regenerated when the stored mentions change.
+    """
+    mentions = mention_store.query_buffer(entity_type, subreddit=subreddit, keyword=keyword, since=since,
+                                          merged=merged)
+    return mentions.to_dataframe(MERGED_COLUMNS if merged else MENTION_COLUMNS).to_csv(index=False)
+
+def active_job():
+    """The search job this session queued, while it is still queued or running"""
+    job_id = st.session_state.active_job_id
+    job = job_store.get_job(job_id) if job_id is not None else None
+    return job if job and job['status'] not in FINISHED_STATES else None
+
+def render_job_progress(job):
+    """Progress bar, current task and timing of a running job"""
+    progress = job['completed_steps'] / job['total_steps'] if job['total_steps'] else 0.0
+    st.progress(min(1.0, progress))
+    st.markdown(f"**Current task:** {job['current_task'] or 'Waiting for the worker...'}")
+    
+    if job['started_at']:
+        started = datetime.datetime.strptime(job['started_at'], "%Y-%m-%d %H:%M:%S")
+        elapsed_time = (datetime.datetime.now() - started).total_seconds()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**Elapsed time:** {time.strftime('%H:%M:%S', time.gmtime(elapsed_time))}")
+        with col2:
+            if progress > 0:
+                # Estimate remaining time based on progress so far
+                remaining_time = elapsed_time / progress - elapsed_time
+                if remaining_time > 0:
+                    st.markdown(f"**Estimated time left:** {time.strftime('%H:%M:%S', time.gmtime(remaining_time))}")
+    
+    if job['total_steps'] > 0:
+        st.markdown(f"**Progress:** {job['completed_steps']} of {job['total_steps']} steps completed")
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_jobs():
+    """Show this session's search job and the shared job queue, polling the job store"""
+    st.subheader("Search Jobs")
+    
+    fingerprint = credentials_fingerprint(session_credentials())
+    if job_store.queued_count(fingerprint) and not job_store.worker_alive(fingerprint):
+        st.warning("Jobs are queued but no worker is running for your Reddit credentials.")
+        if st.button("Start worker", disabled=not st.session_state.reddit_client_secret):
+            ensure_worker_running(job_store, mention_store.db_path, session_credentials())
+    
+    jobs = job_store.list_jobs()
+    if jobs and st.session_state.active_job_id is None:
+        # E.g. after a browser reload: pick up the most recent job
+        st.session_state.active_job_id = jobs[0]['id']
+    job_ids = [recent['id'] for recent in jobs]
+    if st.session_state.active_job_id in job_ids:
+        st.session_state.active_job_id = st.selectbox(
+            "Show job", options=job_ids, index=job_ids.index(st.session_state.active_job_id),
+            format_func=lambda shown_id: f"#{shown_id}"
+        )
+    
+    job_id = st.session_state.active_job_id
+    job = job_store.get_job(job_id) if job_id is not None else None
+    if job:
+        st.markdown(f"**Job #{job['id']}:** {job['status']}")
+        if job['status'] not in FINISHED_STATES:
+            render_job_progress(job)
+            if st.button("Stop search", disabled=job['cancel_requested']):
+                job_store.request_cancel(job['id'])
+        elif job['status'] == COMPLETED and job['params'].get('kind') == STREAM:
+            found = job['summary']['mentions_found']
+            st.success(f"Stream finished: scanned {job['summary']['items_scanned']} items and stored "
+                       f"{sum(found.values())} mentions (API cost ${job['summary']['api_cost']:.2f}). "
+                       "See the Results tab.")
+        elif job['status'] == COMPLETED:
+            found = job['summary']['mentions_found']
+            st.success(f"Search completed! {found.get('plant', 0)} plant mentions and "
+                       f"{found.get('vessel', 0)} vessel mentions found. See the Results tab.")
+            if job['summary'].get('failed_searches'):
+                st.warning(f"{job['summary']['failed_searches']} searches failed (see the search log). "
+                           "Resuming the run retries them.")
+        elif job['status'] == FAILED:
+            st.error(f"Error during Reddit search: {job['error']}")
+        elif job['status'] == INTERRUPTED:
+            st.error(job['error'])
+        
+        if job['summary'] and job['summary'].get('budget_exhausted'):
+            st.warning("The API budget was used up before the run finished. "
+                       "Results found up to that point have been saved.")
+        
+        if is_resumable(job):
+            st.info("This run stopped early. Resuming continues from its last checkpoint "
+                    "without repeating searches that are already done.")
+            new_budget = None
+            remaining = remaining_budget(job)
+            if remaining is not None and remaining <= 0:
+                # Resuming with the budget used up would stop before the first call
+                spent = job['summary']['api_cost']
+                new_budget = st.number_input(
+                    f"New budget for this run (USD, ${spent:.2f} already spent)", min_value=0.0,
+                    value=round(spent + job['params']['budget_usd'], 2), step=10.0,
+                    key=f"resume_budget_{job['id']}"
+                )
+            if st.button("Resume run", disabled=not st.session_state.reddit_client_secret):
+                if job_store.resume(job['id'], session_credentials(), budget_usd=new_budget):
+                    ensure_worker_running(job_store, mention_store.db_path, session_credentials())
+                else:
+                    st.error("Raise the budget above what the run has already spent to resume it.")
+        
+        with st.expander("Search log"):
+            st.text("\n".join(job_store.get_log(job['id'], last=JOB_LOG_LINES)))
+        st.download_button(
+            label="Download Search Log",
+            data="\n".join(job_store.get_log(job['id'])),
+            file_name=f"reddit_search_log_{job['id']}_{get_timestamp()}.txt",
+            mime="text/plain"
+        )
+    
+    if jobs:
+        st.dataframe(pd.DataFrame([{
+            'Job': recent['id'],
+            'Status': recent['status'],
+            'Progress': f"{recent['completed_steps']} / {recent['total_steps']}",
+            'Queued by': recent['submitted_by'],
+            'Queued at': recent['created_at'],
+            'Finished at': recent['finished_at']
+        } for recent in jobs]), hide_index=True)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_active_job_status():
+    """Compact progress of this session's running job for the Results tab"""
+    job = active_job()
+    if job:
+        st.subheader("Search in Progress")
+        render_job_progress(job)
+
 # Main sections
 tab1, tab2, tab3 = st.tabs(["Data Upload", "Reddit Search", "Results"])
 
@@ -312,7 +632,11 @@ with tab2:
     col1, col2 = st.columns(2)
     
     with col1:
-        search_limit = st.number_input("Maximum posts to search per subreddit", min_value=10, max_value=1000, value=100)
+        search_limit = st.number_input(
+            "Maximum posts to search per keyword and subreddit", min_value=10, max_value=1000, value=100,
+            help=f"Keywords searched together and combined subreddits share one search, which Reddit caps at "
+                 f"{REDDIT_MAX_SEARCH_RESULTS:,} posts. The estimate below shows the cap each keyword actually gets."
+        )
         time_filter = st.selectbox(
             "Time filter", 
             options=["all", "day", "week", "month", "year"],
@@ -322,47 +646,153 @@ with tab2:
     with col2:
         include_comments = st.checkbox("Include comment search", value=True)
         comments_limit = st.number_input("Maximum comments to search per post", min_value=10, max_value=500, value=100, disabled=not include_comments)
+        more_comments_limit = st.number_input(
+            "\"Load more comments\" links to expand per post",
+            min_value=0, max_value=20, value=0, disabled=not include_comments,
+            help="Each expansion is one extra API call. Expansion stops at the comment limit above or "
+                 "after 10 seconds per post."
+        )
+        combine_subreddits = st.checkbox(
+            "Combine subreddits into multireddit queries",
+            value=True,
+            help="Search subreddits together as r/sub1+sub2+... instead of one call per subreddit"
+        )
+        geo_routing = st.checkbox(
+            "Route plant keywords to local subreddits",
+            value=False,
+            help="Also search each plant's keywords in the city, region and country subreddits near it "
+                 "(data/local_subreddits.csv). Listed subreddits that are local to a plant are then only "
+                 "searched for the keywords of plants in that area."
+        )
+        incremental = st.checkbox(
+            "Only fetch posts newer than the last run",
+            value=False,
+            help="Stops paginating at the newest post seen by the previous run for each subreddit and query"
+        )
+        full_rescan = st.checkbox(
+            "Full rescan (ignore last-run watermarks)",
+            value=False,
+            disabled=not incremental
+        )
+        max_workers = st.number_input(
+            "Concurrent searches",
+            min_value=1, max_value=16, value=4,
+            help="Number of searches run at the same time. All of them share one API rate limit."
+        )
+        cache_comments_on_disk = st.checkbox(
+            "Cache comment trees on disk",
+            value=False,
+            disabled=not include_comments,
+            help="Keep downloaded comment trees in cache/comments so later runs don't download them again"
+        )
     
-    # Search button
-    search_button = st.button("Start Reddit Search", disabled=st.session_state.search_in_progress)
+    # API budget and pre-run cost estimate
+    st.subheader("API Budget")
     
-    # Progress indicators
-    if st.session_state.search_in_progress:
-        st.subheader("Search Progress")
-        
-        # Create a progress bar that updates with the progress value
-        progress_bar = st.progress(st.session_state.progress)
-        
-        # Create a container for status updates
-        status_container = st.container()
-        
-        with status_container:
-            # Show the current task description
-            st.markdown(f"**Current task:** {st.session_state.current_task}")
-            
-            # Calculate and display time metrics
-            if st.session_state.start_time is not None:
-                elapsed_time = time.time() - st.session_state.start_time
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown(f"**Elapsed time:** {time.strftime('%H:%M:%S', time.gmtime(elapsed_time))}")
-                
-                with col2:
-                    if st.session_state.progress > 0:
-                        # Estimate remaining time based on progress so far
-                        total_time_estimate = elapsed_time / st.session_state.progress
-                        remaining_time = total_time_estimate - elapsed_time
-                        if remaining_time > 0:
-                            st.markdown(f"**Estimated time left:** {time.strftime('%H:%M:%S', time.gmtime(remaining_time))}")
-            
-            # Show step counting progress if available
-            if st.session_state.completed_steps > 0 and st.session_state.total_steps > 0:
-                st.markdown(f"**Progress:** {st.session_state.completed_steps} of {st.session_state.total_steps} steps completed")
+    col1, col2 = st.columns(2)
+    with col1:
+        budget_usd = st.number_input("Hard budget for this run (USD)", min_value=0.0, value=200.0, step=10.0,
+                                     help="The run stops cleanly, keeping results found so far, once this is spent")
+    with col2:
+        cost_per_1000_calls = st.number_input("Cost per 1,000 API calls (USD)", min_value=0.0,
+                                              value=DEFAULT_COST_PER_1000_CALLS, step=0.01)
+    
+    # Keyword pruning based on the yield recorded by earlier runs
+    min_yield_per_100 = st.number_input(
+        "Skip keywords yielding fewer mentions than this per 100 API calls (0 = never skip)",
+        min_value=0.0, value=0.0, step=0.5,
+        help="Keywords such as common first names return many posts but few real mentions. "
+             "Only keywords with enough history from earlier runs are skipped."
+    )
+    keyword_stats = keyword_stats_store.get()
+    
+    search_keywords = {}
+    if st.session_state.plants_data is not None:
+        search_keywords['plant'] = selected_plant_keywords if test_mode else data_processor.extract_keywords(
+            st.session_state.plants_data,
+            name_col=st.session_state.plants_name_col_value,
+            owner_col=st.session_state.plants_owner_col_value
+        )
+    if st.session_state.vessels_data is not None:
+        search_keywords['vessel'] = selected_vessel_keywords if test_mode else data_processor.extract_keywords(
+            st.session_state.vessels_data,
+            name_col=st.session_state.vessels_name_col_value,
+            owner_col=st.session_state.vessels_owner_col_value
+        )
+    # Plant keywords routed to the local subreddits of the plants they came from
+    local_routes = {}
+    if geo_routing and 'plant' in search_keywords:
+        local_routes['plant'] = geo_router.route_keywords(
+            st.session_state.plants_data, entity_index('plant'), search_keywords['plant']
+        )
     
-    # Setup for searching
-    if 'do_search' not in st.session_state:
-        st.session_state.do_search = False
+    planner = QueryPlanner()
+    estimate_plans = {}
+    for entity_type, keywords in search_keywords.items():
+        if local_routes.get(entity_type):
+            estimate_plans[entity_type] = planner.plan_routed(
+                keywords, subreddits, local_routes[entity_type], combine_subreddits=combine_subreddits,
+                keyword_stats=keyword_stats, min_yield=min_yield_per_100 / 100,
+                limit=search_limit
+            )
+        else:
+            estimate_plans[entity_type] = planner.plan(
+                keywords, subreddits, combine_subreddits=combine_subreddits,
+                keyword_stats=keyword_stats, min_yield=min_yield_per_100 / 100,
+                limit=search_limit
+            )
+    search_limits = {}
+    for plan in estimate_plans.values():
+        for call_limit, calls in plan.search_limits(search_limit).items():
+            search_limits[call_limit] = search_limits.get(call_limit, 0) + calls
+    run_estimate = estimate_run_cost(
+        planned_calls=sum(plan.planned_calls for plan in estimate_plans.values()),
+        naive_calls=sum(plan.naive_calls for plan in estimate_plans.values()),
+        limit=search_limit,
+        include_comments=include_comments,
+        cost_per_1000_calls=cost_per_1000_calls,
+        search_limits=search_limits
+    )
+    per_keyword_limit = min((plan.per_keyword_limit(search_limit) for plan in estimate_plans.values()),
+                            default=search_limit)
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Estimated API calls (max)", f"{run_estimate['total_calls']:,}")
+    col2.metric("Estimated cost (max)", f"${run_estimate['cost']:,.2f}")
+    col3.metric("One-keyword-per-call cost", f"${run_estimate['naive']['cost']:,.2f}")
+    st.caption(f"{run_estimate['search_calls']:,} search page calls + {run_estimate['comment_calls']:,} comment "
+               f"tree fetches. Upper bound: searches often return fewer posts than their limit, and "
+               f"cached comment trees are not fetched again.")
+    if per_keyword_limit < search_limit:
+        st.caption(f"Reddit returns at most {REDDIT_MAX_SEARCH_RESULTS:,} posts per search, so keywords searched "
+                   f"together{' in combined subreddits' if combine_subreddits else ''} may only get "
+                   f"{per_keyword_limit} posts per subreddit instead of {search_limit}.")
+    else:
+        st.caption(f"Every keyword gets up to {search_limit} posts per subreddit.")
+    for entity_type, plan in estimate_plans.items():
+        if entity_type in local_routes:
+            st.caption(f"{entity_type.title()}s: {plan.summary()}")
+        if plan.pruned:
+            st.caption(f"{entity_type.title()}s: {plan.pruning_summary(cost_per_1000_calls)}")
+    if run_estimate['cost'] > budget_usd:
+        st.warning("The estimate exceeds the budget; the run will stop once the budget is spent.")
+    
+    if keyword_stats:
+        with st.expander(f"Keyword yield from earlier runs ({len(keyword_stats)} keywords)"):
+            pruned = {keyword for plan in estimate_plans.values() for keyword in plan.pruned}
+            yield_report = pd.DataFrame([
+                {'keyword': keyword, 'searches': stats['searches'], 'api_calls': round(stats['calls'], 1),
+                 'raw_hits': round(stats['raw_hits'], 1), 'retained_hits': stats['retained_hits'],
+                 'mentions_per_100_calls': (None if keyword_yield(stats) is None
+                                            else round(keyword_yield(stats) * 100, 2)),
+                 'skipped': keyword in pruned}
+                for keyword, stats in keyword_stats.items()
+            ]).sort_values(['mentions_per_100_calls', 'api_calls'], ascending=[True, False], na_position='last')
+            st.caption("Lowest yield first. Keywords charged for fewer than 5 API calls have no yield yet.")
+            st.dataframe(yield_report, hide_index=True)
+    
+    # Search button
+    search_button = st.button("Queue Reddit Search")
     
     # Handle search button click
     if search_button:
@@ -381,205 +811,102 @@ with tab2:
             st.session_state.subreddits = subreddits
             st.session_state.search_limit = search_limit
             st.session_state.time_filter = time_filter
-            st.session_state.include_comments = include_comments
-            st.session_state.comments_limit = comments_limit
             st.session_state.test_mode = test_mode
             
-            # Set search flag and trigger rerun
-            st.session_state.do_search = True
-            st.session_state.search_in_progress = True  # Set search in progress flag
-            st.rerun()
-    
-    # Execute search if flag is set
-    if st.session_state.do_search and st.session_state.search_in_progress:
-        st.session_state.do_search = False  # Reset flag
-        
-        with st.spinner("Processing data and searching Reddit..."):
-            # Initialize services
-            data_processor = DataProcessor()
-            
-            # Initialize Reddit service with stored credentials
-            try:
-                reddit_service = RedditService(
-                    client_id=st.session_state.reddit_client_id,
-                    client_secret=st.session_state.reddit_client_secret,
-                    user_agent=st.session_state.reddit_user_agent
-                )
-            except Exception as e:
-                st.error(f"Error connecting to Reddit API: {str(e)}")
-                # Reset search state
-                st.session_state.search_in_progress = False
-                st.rerun()  # Rerun to update UI
-            
-            # Process keywords
-            plants_keywords = []
-            vessels_keywords = []
+            # Keywords left after pruning; fixed here so a resumed job plans the same searches
+            keyword_sets = {entity_type: plan.keywords for entity_type, plan in estimate_plans.items()}
             
+            # The search itself runs in the background worker process
+            job_id = job_store.submit({
+                'credentials_fingerprint': credentials_fingerprint(session_credentials()),
+                'user_agent': reddit_user_agent,
+                'keywords': keyword_sets,
+                'entity_refs': entity_ref_sets(keyword_sets),
+                'local_subreddits': {entity_type: {keyword: routes[keyword]
+                                                   for keyword in keyword_sets[entity_type] if keyword in routes}
+                                     for entity_type, routes in local_routes.items()},
+                'pruning': {entity_type: plan.pruning_summary(cost_per_1000_calls)
+                            for entity_type, plan in estimate_plans.items() if plan.pruned},
+                'subreddits': subreddits,
+                'limit': search_limit,
+                'time_filter': time_filter,
+                'include_comments': include_comments,
+                'comments_limit': comments_limit,
+                'more_comments_limit': more_comments_limit,
+                'combine_subreddits': combine_subreddits,
+                'cache_comments_on_disk': cache_comments_on_disk,
+                'incremental': incremental,
+                'full_rescan': full_rescan,
+                'max_workers': max_workers,
+                'budget_usd': budget_usd,
+                'cost_per_1000_calls': cost_per_1000_calls
+            }, submitted_by=reddit_user_agent)
+            st.session_state.active_job_id = job_id
+            ensure_worker_running(job_store, mention_store.db_path, session_credentials())
+            st.success(f"Search job #{job_id} queued. You can close this tab; the search keeps running.")
+    
+    render_jobs()
+
+    # Live streaming mode
+    st.subheader("Live Stream Mode")
+    st.info("Instead of searching, tail new posts and comments in the subreddits above and match "
+            "them locally. This uses a constant number of streams regardless of keyword count and "
+            "also finds mentions in comments. The stream stops when the API budget above is spent.")
+    stream_minutes = st.number_input("Stream for (minutes)", min_value=1, max_value=240, value=10)
+    stream_button = st.button("Start Live Stream", disabled=active_job() is not None)
+    
+    if stream_button:
+        if not reddit_client_id or not reddit_client_secret:
+            st.error("Reddit API credentials are required")
+        elif not subreddits:
+            st.error("At least one subreddit must be specified")
+        else:
+            # The worker is started with this session's credentials
+            st.session_state.reddit_client_id = reddit_client_id
+            st.session_state.reddit_client_secret = reddit_client_secret
+            keyword_sets = {}
             if st.session_state.plants_data is not None:
-                if test_mode:
-                    plants_keywords = selected_plant_keywords
-                    st.info(f"Test mode: Using selected plant keywords: {', '.join(plants_keywords)}")
-                else:
-                    plants_keywords = data_processor.extract_keywords(
-                        st.session_state.plants_data,
-                        name_col=st.session_state.plants_name_col_value,
-                        owner_col=st.session_state.plants_owner_col_value
-                    )
-            
+                keyword_sets['plant'] = selected_plant_keywords if test_mode else data_processor.extract_keywords(
+                    st.session_state.plants_data,
+                    name_col=st.session_state.plants_name_col_value,
+                    owner_col=st.session_state.plants_owner_col_value
+                )
             if st.session_state.vessels_data is not None:
-                if test_mode:
-                    vessels_keywords = selected_vessel_keywords
-                    st.info(f"Test mode: Using selected vessel keywords: {', '.join(vessels_keywords)}")
-                else:
-                    vessels_keywords = data_processor.extract_keywords(
-                        st.session_state.vessels_data,
-                        name_col=st.session_state.vessels_name_col_value,
-                        owner_col=st.session_state.vessels_owner_col_value
-                    )
-            
-            # Set progress display and initialize timing metrics
-            st.session_state.progress = 0
-            st.session_state.current_task = "Connecting to Reddit API..."
-            st.session_state.start_time = time.time()
-            st.session_state.search_log = []  # Reset search log
-            
-            # Calculate total steps for progress tracking
-            total_subreddits = len(st.session_state.subreddits)
-            total_plant_keywords = len(plants_keywords) if plants_keywords else 0
-            total_vessel_keywords = len(vessels_keywords) if vessels_keywords else 0
-            
-            # Total steps = (subreddits × plant keywords) + (subreddits × vessel keywords)
-            st.session_state.total_steps = (total_subreddits * total_plant_keywords) + (total_subreddits * total_vessel_keywords)
-            st.session_state.completed_steps = 0
-            
-            # Progress updates for display
-            def progress_update_callback(progress, task_description):
-                st.session_state.progress = progress
-                st.session_state.current_task = task_description
-                
-                # Update step counter based on progress percentage
-                if st.session_state.total_steps > 0:
-                    st.session_state.completed_steps = int(progress * st.session_state.total_steps)
-                
-                # Add to search log
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                st.session_state.search_log.append(f"[{timestamp}] {task_description}")
-                
-                time.sleep(0.1)  # Small delay to allow UI to update
+                keyword_sets['vessel'] = selected_vessel_keywords if test_mode else data_processor.extract_keywords(
+                    st.session_state.vessels_data,
+                    name_col=st.session_state.vessels_name_col_value,
+                    owner_col=st.session_state.vessels_owner_col_value
+                )
             
-            # Perform search
-            try:
-                # Search for plants mentions
-                if plants_keywords:
-                    for keyword in plants_keywords:
-                        for subreddit in st.session_state.subreddits:
-                            current_task = f"Searching r/{subreddit} for plant keyword: {keyword}"
-                            progress_update_callback(
-                                st.session_state.progress,
-                                current_task
-                            )
-                            
-                            subreddit_results = reddit_service._make_api_request(
-                                subreddit=subreddit,
-                                keyword=keyword,
-                                limit=st.session_state.search_limit,
-                                time_filter=st.session_state.time_filter,
-                                include_comments=st.session_state.include_comments,
-                                comments_limit=st.session_state.comments_limit
-                            )
-                            
-                            # Add results to session state immediately
-                            for result in subreddit_results:
-                                result['entity_type'] = 'plant'
-                                st.session_state.plants_results.append(result)
-                            
-                            # Update progress
-                            st.session_state.completed_steps += 1
-                            if st.session_state.total_steps > 0:
-                                st.session_state.progress = st.session_state.completed_steps / st.session_state.total_steps
-                    
-                # Search for vessels mentions
-                if vessels_keywords:
-                    for keyword in vessels_keywords:
-                        for subreddit in st.session_state.subreddits:
-                            current_task = f"Searching r/{subreddit} for vessel keyword: {keyword}"
-                            progress_update_callback(
-                                st.session_state.progress,
-                                current_task
-                            )
-                            
-                            subreddit_results = reddit_service._make_api_request(
-                                subreddit=subreddit,
-                                keyword=keyword,
-                                limit=st.session_state.search_limit,
-                                time_filter=st.session_state.time_filter,
-                                include_comments=st.session_state.include_comments,
-                                comments_limit=st.session_state.comments_limit
-                            )
-                            
-                            # Add results to session state immediately
-                            for result in subreddit_results:
-                                result['entity_type'] = 'vessel'
-                                st.session_state.vessels_results.append(result)
-                            
-                            # Update progress
-                            st.session_state.completed_steps += 1
-                            if st.session_state.total_steps > 0:
-                                st.session_state.progress = st.session_state.completed_steps / st.session_state.total_steps
-                
-                # Display final results count
-                st.success(f"Search completed! Found {len(st.session_state.plants_results)} plant mentions and {len(st.session_state.vessels_results)} vessel mentions.")
-                
-                # Add download button for search log
-                if st.download_button(
-                    label="Download Search Log",
-                    data="\n".join(st.session_state.search_log),
-                    file_name=f"reddit_search_log_{get_timestamp()}.txt",
-                    mime="text/plain"
-                ):
-                    st.success("Search log downloaded")
-                
-                # Reset search-related session state
-                st.session_state.search_in_progress = False
-                st.session_state.progress = 0
-                st.session_state.current_task = ""
-                st.session_state.start_time = None
-                st.session_state.total_steps = 0
-                st.session_state.completed_steps = 0
-                
-                # Switch to Results tab
-                time.sleep(1)
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"Error during Reddit search: {str(e)}")
-                # Reset search-related session state
-                st.session_state.search_in_progress = False
-                st.session_state.progress = 0
-                st.session_state.current_task = ""
-                st.session_state.start_time = None
-                st.session_state.total_steps = 0
-                st.session_state.completed_steps = 0
+            # The stream runs in the background worker like a search, so it outlives this session
+            job_id = job_store.submit({
+                'kind': STREAM,
+                'credentials_fingerprint': credentials_fingerprint(session_credentials()),
+                'user_agent': reddit_user_agent,
+                'keywords': keyword_sets,
+                'entity_refs': entity_ref_sets(keyword_sets),
+                'subreddits': subreddits,
+                'include_comments': include_comments,
+                'duration_minutes': stream_minutes,
+                'budget_usd': budget_usd,
+                'cost_per_1000_calls': cost_per_1000_calls
+            }, submitted_by=reddit_user_agent)
+            st.session_state.active_job_id = job_id
+            ensure_worker_running(job_store, mention_store.db_path, session_credentials())
+            st.success(f"Live stream job #{job_id} queued for {stream_minutes} minutes. "
+                       "Stop it from the job panel above.")
 
 # Results Tab
 with tab3:
     st.header("Search Results")
     
-    # Show current search status if search is in progress
-    if st.session_state.search_in_progress:
-        st.subheader("Search in Progress")
-        st.progress(st.session_state.progress)
-        st.markdown(f"**Current task:** {st.session_state.current_task}")
-        
-        if st.session_state.start_time is not None:
-            elapsed_time = time.time() - st.session_state.start_time
-            st.markdown(f"**Elapsed time:** {time.strftime('%H:%M:%S', time.gmtime(elapsed_time))}")
-        
-        if st.session_state.completed_steps > 0 and st.session_state.total_steps > 0:
-            st.markdown(f"**Progress:** {st.session_state.completed_steps} of {st.session_state.total_steps} steps completed")
+    # Show the status of this session's search job while it runs
+    render_active_job_status()
     
     # Check if results exist
-    if not st.session_state.plants_results and not st.session_state.vessels_results:
+    plants_count = mention_store.count_mentions('plant')
+    vessels_count = mention_store.count_mentions('vessel')
+    if not plants_count and not vessels_count:
         st.info("No search results yet. Please go to the Reddit Search tab to start a search.")
     else:
         # Results tabs for plants and vessels
@@ -587,123 +914,11 @@ with tab3:
         
         # Plants Results Tab
         with results_tab1:
-            if st.session_state.plants_results:
-                st.subheader(f"Found {len(st.session_state.plants_results)} mentions of plants")
-                
-                # Convert results to DataFrame for display
-                plants_df = pd.DataFrame(st.session_state.plants_results)
-                
-                # Display results table
-                st.dataframe(plants_df)
-                
-                # Download button
-                csv_filename = f"plants_reddit_mentions_{get_timestamp()}.csv"
-                
-                if st.download_button(
-                    label="Download Plants Results as CSV",
-                    data=plants_df.to_csv(index=False),
-                    file_name=csv_filename,
-                    mime="text/csv"
-                ):
-                    st.success(f"Downloaded {csv_filename}")
-                
-                # Detailed view of mentions
-                st.subheader("Detailed View")
-                
-                for i, mention in enumerate(st.session_state.plants_results):
-                    with st.expander(f"{mention['keyword']} - {mention['title']}"):
-                        st.markdown(f"**Keyword:** {mention['keyword']}")
-                        st.markdown(f"**Post/Comment ID:** {mention['id']}")
-                        st.markdown(f"**Title/Context:** {mention['title']}")
-                        st.markdown(f"**Author:** {mention['author']}")
-                        st.markdown(f"**Date/Time:** {mention['datetime']}")
-                        st.markdown(f"**Subreddit:** r/{mention['subreddit']}")
-                        
-                        # Create a permalink with full URL
-                        full_url = f"https://www.reddit.com{mention['permalink']}"
-                        st.markdown(f"**Permalink:** [Link to post]({full_url})")
-                        
-                        st.markdown("**Snippet:**")
-                        st.markdown(f"> {mention['snippet']}")
-                        
-                        # Source label (post or comment)
-                        st.markdown(f"**Source:** {mention['source']}")
-                        
-                        # Add a button to scrape additional content
-                        if st.button(f"Get additional content for {mention['keyword']}", key=f"scrape_plant_{i}"):
-                            try:
-                                with st.spinner("Fetching additional content..."):
-                                    scraped_content = get_website_text_content(full_url)
-                                    if scraped_content:
-                                        st.subheader("Additional Content")
-                                        st.text_area("Full Text Content", scraped_content, height=300)
-                                        st.success("Successfully retrieved additional content")
-                                    else:
-                                        st.warning("No additional content could be retrieved")
-                            except Exception as e:
-                                st.error(f"Error retrieving additional content: {str(e)}")
-            else:
-                st.info("No plants mentions found in the search results.")
+            render_mentions('plant', 'plants')
         
         # Vessels Results Tab
         with results_tab2:
-            if st.session_state.vessels_results:
-                st.subheader(f"Found {len(st.session_state.vessels_results)} mentions of vessels")
-                
-                # Convert results to DataFrame for display
-                vessels_df = pd.DataFrame(st.session_state.vessels_results)
-                
-                # Display results table
-                st.dataframe(vessels_df)
-                
-                # Download button
-                csv_filename = f"vessels_reddit_mentions_{get_timestamp()}.csv"
-                
-                if st.download_button(
-                    label="Download Vessels Results as CSV",
-                    data=vessels_df.to_csv(index=False),
-                    file_name=csv_filename,
-                    mime="text/csv"
-                ):
-                    st.success(f"Downloaded {csv_filename}")
-                
-                # Detailed view of mentions
-                st.subheader("Detailed View")
-                
-                for i, mention in enumerate(st.session_state.vessels_results):
-                    with st.expander(f"{mention['keyword']} - {mention['title']}"):
-                        st.markdown(f"**Keyword:** {mention['keyword']}")
-                        st.markdown(f"**Post/Comment ID:** {mention['id']}")
-                        st.markdown(f"**Title/Context:** {mention['title']}")
-                        st.markdown(f"**Author:** {mention['author']}")
-                        st.markdown(f"**Date/Time:** {mention['datetime']}")
-                        st.markdown(f"**Subreddit:** r/{mention['subreddit']}")
-                        
-                        # Create a permalink with full URL
-                        full_url = f"https://www.reddit.com{mention['permalink']}"
-                        st.markdown(f"**Permalink:** [Link to post]({full_url})")
-                        
-                        st.markdown("**Snippet:**")
-                        st.markdown(f"> {mention['snippet']}")
-                        
-                        # Source label (post or comment)
-                        st.markdown(f"**Source:** {mention['source']}")
-                        
-                        # Add a button to scrape additional content
-                        if st.button(f"Get additional content for {mention['keyword']}", key=f"scrape_vessel_{i}"):
-                            try:
-                                with st.spinner("Fetching additional content..."):
-                                    scraped_content = get_website_text_content(full_url)
-                                    if scraped_content:
-                                        st.subheader("Additional Content")
-                                        st.text_area("Full Text Content", scraped_content, height=300)
-                                        st.success("Successfully retrieved additional content")
-                                    else:
-                                        st.warning("No additional content could be retrieved")
-                            except Exception as e:
-                                st.error(f"Error retrieving additional content: {str(e)}")
-            else:
-                st.info("No vessels mentions found in the search results.")
+            render_mentions('vessel', 'vessels')
 
 # About section in sidebar
 with st.sidebar:
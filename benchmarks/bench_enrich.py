@@ -0,0 +1,92 @@
+"""
+Benchmark bulk content enrichment against the local Reddit stand-in
+
+Usage:
+    python benchmarks/bench_enrich.py [--pages 200] [--latency 0.05] [--per-host 4]
+
+Fetches the permalink pages of `--pages` submissions served by
+benchmarks/fake_reddit.py (in a separate process) three ways and reports
+wall time and the pages the server actually served:
+
+- sequential: get_website_text_content on one URL after another, no cache
+- cold: ContentEnricher with an empty PageCache
+- warm: ContentEnricher again over the same URLs, answered from the cache
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_scraper import ContentEnricher, get_website_text_content, permalink_url  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+from fake_reddit import generate_corpus  # noqa: E402
+from bench_search import SUBREDDITS, build_keywords, serve  # noqa: E402
+
+
+def pages_served(url: str) -> int:
+    """Permalink pages served by the stand-in so far"""
+    with urllib.request.urlopen(f"{url}/_stats") as response:
+        return json.load(response)["calls"].get("page", 0)
+
+
+def measure(name: str, url: str, run) -> None:
+    """Run one scenario and print its wall time and server page count"""
+    before = pages_served(url)
+    start = time.perf_counter()
+    extracted = run()
+    seconds = time.perf_counter() - start
+    print(f"  {name:<11} {seconds:8.2f}s  {extracted:5d} pages extracted  "
+          f"server: {pages_served(url) - before} pages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="Permalinks to enrich")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--extract-workers", type=int, default=None, help="0 extracts on the download threads")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(build_keywords(50), SUBREDDITS, num_submissions=args.pages)
+    queue = multiprocessing.Queue()
+    corpus_args = {"keywords": build_keywords(50), "submissions": args.pages}
+    process = multiprocessing.Process(target=serve, args=(corpus_args, {"latency": args.latency}, queue),
+                                      daemon=True)
+    process.start()
+    url = queue.get(timeout=120)
+    urls = [permalink_url(f"/r/{s['subreddit']}/comments/{s['id']}/post/", url) for s in corpus["submissions"]]
+    print(f"Reddit stand-in at {url} (latency {args.latency}s), {len(urls)} pages")
+
+    def sequential():
+        extracted = 0
+        for page_url in urls:
+            try:
+                extracted += bool(get_website_text_content(page_url))
+            except Exception:
+                pass
+        return extracted
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PageCache(os.path.join(tmp, "pages"))
+            enricher = ContentEnricher(cache, max_connections=args.connections, per_host_limit=args.per_host,
+                                       extract_workers=args.extract_workers)
+            with enricher:
+                measure("sequential", url, sequential)
+                measure("cold", url, lambda: sum(1 for text in enricher.enrich(urls).values() if text))
+                measure("warm", url, lambda: sum(1 for text in enricher.enrich(urls).values() if text))
+            print(f"  {cache.summary()}; {enricher.summary()}")
+            cache.close()
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
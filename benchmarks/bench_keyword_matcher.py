@@ -0,0 +1,80 @@
+"""
+Benchmark the Aho-Corasick KeywordMatcher against per-keyword substring checks
+
+Usage:
+    python benchmarks/bench_keyword_matcher.py [--keywords 3000] [--texts 2000]
+
+The baseline reproduces the previous RedditService behaviour: lowercase the
+text and run `keyword in text` once per keyword.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+
+def random_word(rng: random.Random) -> str:
+    """Generate a random lowercase word"""
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+
+def build_corpus(num_keywords: int, num_texts: int, words_per_text: int, seed: int = 42):
+    """Generate synthetic keywords and comment-like texts that mention some of them"""
+    rng = random.Random(seed)
+    keywords = []
+    for _ in range(num_keywords):
+        words = [random_word(rng) for _ in range(rng.choice([1, 1, 2, 3]))]
+        keywords.append(" ".join(words))
+
+    texts = []
+    for _ in range(num_texts):
+        words = [random_word(rng) for _ in range(words_per_text)]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).title())
+        texts.append(" ".join(words) + ".")
+    return keywords, texts
+
+
+def naive_match(text: str, keywords: List[str]) -> List[str]:
+    """Previous implementation: one lowercase substring check per keyword"""
+    return [keyword for keyword in keywords if keyword.lower() in text.lower()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keywords", type=int, default=3000)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--words-per-text", type=int, default=60)
+    args = parser.parse_args()
+
+    keywords, texts = build_corpus(args.keywords, args.texts, args.words_per_text)
+    print(f"Corpus: {len(keywords)} keywords, {len(texts)} texts of ~{args.words_per_text} words")
+
+    start = time.perf_counter()
+    naive_hits = sum(len(naive_match(text, keywords)) for text in texts)
+    naive_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher_hits = sum(len(matcher.match(text)) for text in texts)
+    match_seconds = time.perf_counter() - start
+
+    print(f"Substring checks: {naive_seconds:8.3f}s  ({naive_hits} hits, includes partial-word hits)")
+    print(f"KeywordMatcher:   {match_seconds:8.3f}s  ({matcher_hits} hits, whole words only)")
+    print(f"Automaton build:  {build_seconds:8.3f}s")
+    if match_seconds > 0:
+        print(f"Speedup:          {naive_seconds / match_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark the search path end to end against the local Reddit stand-in
+
+Usage:
+    python benchmarks/bench_search.py [--sizes 10,1000,10000] [--latency 0.02] [--error-rate 0.01]
+
+For each keyword list size this runs two scenarios through PRAW against
+benchmarks/fake_reddit.py (served from a separate process so its memory is
+not counted):
+
+- search_reddit: RedditService.search_reddit over all keywords
+- app: the background job's search path, i.e. plant and vessel plans
+  streamed through one SearchExecutor into a MentionStore (mention_pipeline)
+
+and reports wall time, API calls (as metered by ApiBudget and as seen by
+the server) and peak Python memory (tracemalloc).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_service import RedditService  # noqa: E402
+from mention_store import MentionStore  # noqa: E402
+from search_executor import SearchExecutor, build_tasks  # noqa: E402
+from mention_pipeline import store_mentions, drain  # noqa: E402
+from api_budget import ApiBudget  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+from fake_reddit import FakeRedditServer, generate_corpus, load_corpus  # noqa: E402
+
+SUBREDDITS = ["Fishing", "CommercialFishing", "Seafood", "Maritime", "WorldNews"]
+
+
+def build_keywords(count: int, seed: int = 7) -> List[str]:
+    """Generate plant/vessel-like names of one to three words"""
+    rng = random.Random(seed)
+    keywords = set()
+    while len(keywords) < count:
+        words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                 for _ in range(rng.choice([1, 2, 2, 3]))]
+        keywords.add(" ".join(words))
+    return sorted(keywords)
+
+
+def serve(corpus_args: Dict[str, Any], server_args: Dict[str, Any], queue) -> None:
+    """Child process: build the corpus, start the stand-in and report its URL"""
+    if corpus_args.get("path"):
+        corpus = load_corpus(corpus_args["path"])
+    else:
+        corpus = generate_corpus(corpus_args["keywords"], SUBREDDITS,
+                                 num_submissions=corpus_args["submissions"])
+    server = FakeRedditServer(corpus, **server_args).start()
+    queue.put(server.url)
+    server._thread.join()
+
+
+def server_calls(url: str) -> Dict[str, int]:
+    """Per-endpoint call counts reported by the stand-in"""
+    with urllib.request.urlopen(f"{url}/_stats") as response:
+        return json.load(response)["calls"]
+
+
+def make_service(url: str) -> RedditService:
+    """RedditService pointed at the stand-in, with a fresh meter and no request pacing"""
+    return RedditService(
+        "bench-client", "bench-secret", "fish-tracker-benchmark",
+        rate_limiter=RateLimiter(requests_per_minute=60_000),
+        api_budget=ApiBudget(),
+        praw_options={"oauth_url": url, "reddit_url": url, "check_for_updates": False}
+    )
+
+
+def run_search_reddit(service: RedditService, keywords: List[str], args) -> int:
+    """Scenario: RedditService.search_reddit"""
+    results = service.search_reddit(
+        keywords, SUBREDDITS, limit=args.limit, time_filter="month",
+        include_comments=not args.no_comments, comments_limit=args.comments_limit,
+        entity_type="plant", combine_subreddits=True, max_workers=args.workers
+    )
+    return len(results)
+
+
+def run_app_path(service: RedditService, keywords: List[str], args) -> int:
+    """Scenario: the app.py search path with results persisted to a MentionStore"""
+    plants, vessels = keywords[::2], keywords[1::2]
+    plants_plan = service.plan_search(plants, SUBREDDITS, combine_subreddits=True, limit=args.limit)
+    vessels_plan = service.plan_search(vessels, SUBREDDITS, combine_subreddits=True, limit=args.limit)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MentionStore(os.path.join(tmp, "mentions.db"))
+        executor = SearchExecutor(service.clone, max_workers=args.workers)
+        events = executor.stream(
+            build_tasks({'plant': plants_plan, 'vessel': vessels_plan}),
+            limit=args.limit, time_filter="month",
+            include_comments=not args.no_comments, comments_limit=args.comments_limit
+        )
+        drain(store_mentions(events, store))
+        return store.count_mentions("plant") + store.count_mentions("vessel")
+
+
+def measure(name: str, scenario, url: str, keywords: List[str], args) -> None:
+    """Run one scenario and print its wall time, call counts and peak memory"""
+    service = make_service(url)
+    calls_before = server_calls(url)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    mentions = scenario(service, keywords, args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls_after = server_calls(url)
+    served = {endpoint: calls_after.get(endpoint, 0) - calls_before.get(endpoint, 0)
+              for endpoint in calls_after if endpoint != "access_token"}
+    served = {endpoint: count for endpoint, count in served.items() if count}
+    print(f"  {name:<14} {seconds:8.2f}s  {service.api_budget.total_calls:6d} calls  "
+          f"{peak / 1024 / 1024:7.1f} MiB peak  {mentions:6d} mentions  server: {served}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma separated keyword list sizes")
+    parser.add_argument("--corpus", help="Corpus JSON recorded with fake_reddit.record_corpus")
+    parser.add_argument("--submissions", type=int, default=2000, help="Posts in the synthetic corpus")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--comments-limit", type=int, default=100)
+    parser.add_argument("--no-comments", action="store_true")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    all_keywords = build_keywords(max(sizes))
+
+    queue = multiprocessing.Queue()
+    corpus_args = {"path": args.corpus, "keywords": all_keywords, "submissions": args.submissions}
+    server_args = {"latency": args.latency, "error_rate": args.error_rate}
+    process = multiprocessing.Process(target=serve, args=(corpus_args, server_args, queue), daemon=True)
+    process.start()
+    url = queue.get(timeout=120)
+    print(f"Reddit stand-in at {url} (latency {args.latency}s, 429 rate {args.error_rate:.0%})")
+
+    try:
+        for size in sizes:
+            # Every size draws from the same corpus, so smaller lists simply match fewer posts
+            keywords = all_keywords[:size]
+            print(f"{size} keywords:")
+            measure("search_reddit", run_search_reddit, url, keywords, args)
+            measure("app path", run_app_path, url, keywords, args)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+Local stand-in for the Reddit API endpoints used by RedditService
+
+Serves a synthetic or recorded corpus over HTTP so PRAW (and therefore
+RedditService) can run end to end without touching the live API:
+
+    server = FakeRedditServer(generate_corpus(keywords), latency=0.05, error_rate=0.01)
+    server.start()
+    service = RedditService("id", "secret", "bench", praw_options=server.praw_options())
+    ...
+    server.stop()
+
+It can also be run on its own and shared by several processes:
+
+    python benchmarks/fake_reddit.py --port 8080 --keywords-file keywords.txt
+
+Supported endpoints: the OAuth token endpoint, subreddit search listings
+(including "sub1+sub2" multireddits and "after" pagination), submission
+comment trees (with a "more" stub past the requested limit),
+/api/morechildren, /api/info and HTML pages at the submission permalinks (for the
+content enricher). GET /_stats returns the per-endpoint call counts.
+Latency and 429 responses can be injected, and every response carries
+X-Ratelimit headers for a configurable quota.
+
+Corpus format (JSON):
+    {"submissions": [{"id", "subreddit", "title", "selftext", "author", "created_utc"}, ...],
+     "comments": {"<submission id>": [{"id", "parent_id", "body", "author", "created_utc"}, ...]}}
+Comments are listed parents first; parent_id is "t3_<submission>" for
+top-level comments and "t1_<comment>" for replies.
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+WORD_RE = re.compile(r"\w+")
+PAGE_SIZE = 100
+DEFAULT_COMMENT_LIMIT = 200
+
+
+def generate_corpus(keywords: List[str], subreddits: Optional[List[str]] = None,
+                    num_submissions: int = 2000, comments_per_submission: int = 20,
+                    mention_rate: float = 0.3, seed: int = 42) -> Dict[str, Any]:
+    """
+    Generate a synthetic corpus in which some posts and comments mention keywords
+
+    Args:
+        keywords: Keywords to sprinkle into titles and comment bodies
+        subreddits: Subreddit names to spread the posts over
+        num_submissions: Number of posts
+        comments_per_submission: Average number of comments per post
+        mention_rate: Probability that a title or comment mentions a keyword
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        Corpus dict (see module docstring)
+    """
+    rng = random.Random(seed)
+    subreddits = subreddits or ["Fishing", "CommercialFishing", "Seafood", "Maritime", "WorldNews"]
+    filler = ["the", "boat", "harbor", "catch", "today", "season", "crew", "price", "plant", "news",
+              "fleet", "quota", "report", "local", "workers", "smell", "factory", "port", "trawler"]
+
+    def sentence(length: int) -> str:
+        words = [rng.choice(filler) for _ in range(length)]
+        if keywords and rng.random() < mention_rate:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).title())
+        return " ".join(words).capitalize() + "."
+
+    now = time.time()
+    submissions = []
+    comments: Dict[str, List[Dict[str, Any]]] = {}
+    for i in range(num_submissions):
+        submission_id = f"s{i:06d}"
+        submissions.append({
+            "id": submission_id,
+            "subreddit": rng.choice(subreddits),
+            "title": sentence(rng.randint(4, 12)),
+            "selftext": sentence(rng.randint(10, 40)),
+            "author": f"user{rng.randint(1, 500)}",
+            "created_utc": now - i * 600,
+        })
+        thread = []
+        for j in range(rng.randint(0, comments_per_submission * 2)):
+            parent = rng.choice(thread)["id"] if thread and rng.random() < 0.5 else None
+            thread.append({
+                "id": f"c{i:06d}x{j:04d}",
+                "parent_id": f"t1_{parent}" if parent else f"t3_{submission_id}",
+                "body": sentence(rng.randint(5, 60)),
+                "author": f"user{rng.randint(1, 500)}",
+                "created_utc": now - i * 600 + j * 30,
+            })
+        comments[submission_id] = thread
+    return {"submissions": submissions, "comments": comments}
+
+
+def load_corpus(path: str) -> Dict[str, Any]:
+    """Load a corpus saved by save_corpus or record_corpus"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_corpus(corpus: Dict[str, Any], path: str) -> None:
+    """Save a corpus as JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(corpus, f)
+
+
+def record_corpus(reddit, subreddits: List[str], queries: List[str], path: str,
+                  limit: int = 100, time_filter: str = "month") -> Dict[str, Any]:
+    """
+    Record a corpus from the live API for later replay
+
+    Args:
+        reddit: Authenticated praw.Reddit instance
+        subreddits: Subreddits to search
+        queries: Search strings to run in each subreddit
+        path: File to save the corpus to
+        limit: Maximum posts per search
+        time_filter: Time filter for the searches
+
+    Returns:
+        The recorded corpus
+    """
+    submissions: Dict[str, Dict[str, Any]] = {}
+    comments: Dict[str, List[Dict[str, Any]]] = {}
+    for subreddit in subreddits:
+        for query in queries:
+            for submission in reddit.subreddit(subreddit).search(query, limit=limit, time_filter=time_filter):
+                if submission.id in submissions:
+                    continue
+                submissions[submission.id] = {
+                    "id": submission.id,
+                    "subreddit": submission.subreddit.display_name,
+                    "title": submission.title,
+                    "selftext": submission.selftext,
+                    "author": str(submission.author),
+                    "created_utc": submission.created_utc,
+                }
+                submission.comments.replace_more(limit=0)
+                comments[submission.id] = [
+                    {
+                        "id": comment.id,
+                        "parent_id": comment.parent_id,
+                        "body": comment.body,
+                        "author": str(comment.author),
+                        "created_utc": comment.created_utc,
+                    }
+                    for comment in submission.comments.list()
+                ]
+    corpus = {"submissions": list(submissions.values()), "comments": comments}
+    save_corpus(corpus, path)
+    return corpus
+
+
+class FakeRedditServer:
+    """Threaded HTTP server replaying a corpus through Reddit's API shapes"""
+
+    def __init__(self, corpus: Dict[str, Any], latency: float = 0.0, error_rate: float = 0.0,
+                 quota: int = 1_000_000, window_seconds: int = 600, seed: int = 0):
+        """
+        Initialize the stand-in
+
+        Args:
+            corpus: Corpus dict (see module docstring)
+            latency: Seconds added to every response
+            error_rate: Probability that a request is answered with a 429
+            quota: Requests allowed per rate limit window (reported in X-Ratelimit headers)
+            window_seconds: Length of the rate limit window
+            seed: Random seed for error injection
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota = quota
+        self.window_seconds = window_seconds
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_used = 0
+
+        self.submissions = {s["id"]: s for s in corpus["submissions"]}
+        self.comments = corpus.get("comments", {})
+        self._comments_by_id = {c["id"]: (sid, c) for sid, thread in self.comments.items() for c in thread}
+        self._newest_first = sorted(self.submissions.values(), key=lambda s: -s["created_utc"])
+
+        # Inverted index from lowercase word to submission ids, so searches don't scan the corpus
+        self._index: Dict[str, set] = defaultdict(set)
+        for submission in self.submissions.values():
+            for word in WORD_RE.findall(f"{submission['title']} {submission.get('selftext', '')}".lower()):
+                self._index[word].add(submission["id"])
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def praw_options(self) -> Dict[str, Any]:
+        """praw.Reddit keyword arguments that point PRAW at this server"""
+        return {"oauth_url": self.url, "reddit_url": self.url, "check_for_updates": False}
+
+    def start(self, port: int = 0) -> "FakeRedditServer":
+        """Start serving on a local port (a free one by default) in a background thread"""
+        handler = type("Handler", (_RequestHandler,), {"fake": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def total_calls(self) -> int:
+        """Number of API requests served (excluding the token endpoint)"""
+        return sum(count for endpoint, count in self.calls.items() if endpoint != "access_token")
+
+    # Rate limit bookkeeping
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        """Consume one request from the quota and return X-Ratelimit headers"""
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.window_seconds:
+                self._window_start, self._window_used = now, 0
+            self._window_used += 1
+            reset = int(self.window_seconds - (now - self._window_start))
+            return {
+                "x-ratelimit-used": str(self._window_used),
+                "x-ratelimit-remaining": str(max(0, self.quota - self._window_used)),
+                "x-ratelimit-reset": str(max(0, reset)),
+            }
+
+    def _should_fail(self) -> bool:
+        """Decide whether to inject a 429 for this request"""
+        with self._lock:
+            if self._window_used >= self.quota:
+                return True
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    # Endpoint implementations
+
+    def search(self, subreddit_path: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """Search listing for a subreddit or multireddit"""
+        subreddits = {s.lower() for s in subreddit_path.split("+")}
+        phrases = [p.strip().strip('"').lower() for p in re.split(r"\s+OR\s+", params.get("q", ""))]
+        phrases = [p for p in phrases if p]
+        matcher = KeywordMatcher(phrases)
+
+        candidates = set()
+        for phrase in phrases:
+            words = WORD_RE.findall(phrase)
+            if not words:
+                continue
+            ids = set(self._index.get(words[0], ()))
+            for word in words[1:]:
+                ids &= self._index.get(word, set())
+            candidates |= ids
+
+        ordered = [s for s in self._newest_first if s["id"] in candidates]
+        hits = [s for s in ordered
+                if (subreddits & {"all"} or s["subreddit"].lower() in subreddits)
+                and matcher.match(f"{s['title']}\n{s.get('selftext', '')}")]
+        return self._listing(hits, params, _submission_thing)
+
+    def submission_comments(self, submission_id: str, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Submission plus its comment tree, truncated with a "more" stub at `limit`"""
+        submission = self.submissions.get(submission_id)
+        if submission is None:
+            return None
+        limit = int(params.get("limit") or DEFAULT_COMMENT_LIMIT)
+        thread = self.comments.get(submission_id, [])
+        shown, hidden = thread[:limit], thread[limit:]
+
+        nodes = {c["id"]: _comment_thing(c, submission) for c in shown}
+        roots = []
+        for comment in shown:
+            node = nodes[comment["id"]]
+            parent_kind, parent_id = comment["parent_id"].split("_", 1)
+            if parent_kind == "t1" and parent_id in nodes:
+                replies = nodes[parent_id]["data"]["replies"]
+                if not replies:
+                    replies = nodes[parent_id]["data"]["replies"] = _listing_data([])
+                replies["data"]["children"].append(node)
+            else:
+                roots.append(node)
+        if hidden:
+            roots.append({"kind": "more", "data": {
+                "id": hidden[0]["id"], "name": f"t1_{hidden[0]['id']}", "count": len(hidden),
+                "parent_id": f"t3_{submission_id}", "depth": 0, "children": [c["id"] for c in hidden],
+            }})
+
+        thing = _submission_thing(submission)
+        thing["data"]["num_comments"] = len(thread)
+        return [_listing_data([thing]), _listing_data(roots)]
+
+    def more_children(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Flat list of the requested comments, parents first"""
+        things = []
+        for comment_id in params.get("children", "").split(","):
+            found = self._comments_by_id.get(comment_id.strip())
+            if found:
+                submission_id, comment = found
+                things.append(_comment_thing(comment, self.submissions[submission_id]))
+        return {"json": {"errors": [], "data": {"things": things}}}
+
+    def info(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Listing of the submissions and comments named in `id` (comma separated fullnames)"""
+        things = []
+        for fullname in params.get("id", "").split(","):
+            kind, _, thing_id = fullname.strip().partition("_")
+            if kind == "t3" and thing_id in self.submissions:
+                things.append(_submission_thing(self.submissions[thing_id]))
+            elif kind == "t1" and thing_id in self._comments_by_id:
+                submission_id, comment = self._comments_by_id[thing_id]
+                things.append(_comment_thing(comment, self.submissions[submission_id]))
+        return _listing_data(things)
+
+    def submission_page(self, submission_id: str) -> Optional[str]:
+        """HTML page of a submission and its comments, as served at its permalink"""
+        submission = self.submissions.get(submission_id)
+        if submission is None:
+            return None
+        comments = "".join(f"<div class=\"comment\"><p>{html.escape(c['body'])}</p></div>"
+                           for c in self.comments.get(submission_id, []))
+        return (f"<html><head><title>{html.escape(submission['title'])}</title></head><body>"
+                f"<article><h1>{html.escape(submission['title'])}</h1>"
+                f"<p>{html.escape(submission.get('selftext', ''))}</p></article>"
+                f"<section>{comments}</section></body></html>")
+
+    def _listing(self, items: List[Dict[str, Any]], params: Dict[str, str], to_thing) -> Dict[str, Any]:
+        """Paginate items the way Reddit listings do (limit + after fullname)"""
+        limit = min(int(params.get("limit") or 25), PAGE_SIZE)
+        start = 0
+        after = params.get("after")
+        if after:
+            ids = [f"t3_{item['id']}" for item in items]
+            start = ids.index(after) + 1 if after in ids else len(items)
+        page = items[start:start + limit]
+        listing = _listing_data([to_thing(item) for item in page])
+        if start + limit < len(items) and page:
+            listing["data"]["after"] = f"t3_{page[-1]['id']}"
+        return listing
+
+
+def _listing_data(children: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap things in a Listing"""
+    return {"kind": "Listing", "data": {"after": None, "before": None, "dist": len(children),
+                                        "children": children}}
+
+
+def _submission_thing(submission: Dict[str, Any]) -> Dict[str, Any]:
+    """Serialize a corpus submission as a t3 thing"""
+    sid = submission["id"]
+    return {"kind": "t3", "data": {
+        "id": sid, "name": f"t3_{sid}", "title": submission["title"],
+        "selftext": submission.get("selftext", ""), "author": submission.get("author", "[deleted]"),
+        "created_utc": submission["created_utc"], "subreddit": submission["subreddit"],
+        "permalink": f"/r/{submission['subreddit']}/comments/{sid}/post/",
+        "url": f"https://www.reddit.com/r/{submission['subreddit']}/comments/{sid}/post/",
+        "num_comments": 0, "score": 1, "is_self": True,
+    }}
+
+
+def _comment_thing(comment: Dict[str, Any], submission: Dict[str, Any]) -> Dict[str, Any]:
+    """Serialize a corpus comment as a t1 thing"""
+    sid = submission["id"]
+    return {"kind": "t1", "data": {
+        "id": comment["id"], "name": f"t1_{comment['id']}", "body": comment["body"],
+        "author": comment.get("author", "[deleted]"), "created_utc": comment["created_utc"],
+        "parent_id": comment["parent_id"], "link_id": f"t3_{sid}", "subreddit": submission["subreddit"],
+        "link_title": submission["title"],
+        "permalink": f"/r/{submission['subreddit']}/comments/{sid}/post/{comment['id']}/",
+        "replies": "", "score": 1, "depth": 0,
+    }}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the FakeRedditServer set as the class attribute `fake`"""
+
+    fake: FakeRedditServer = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep benchmark output quiet
+        pass
+
+    def do_GET(self):
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        params = parse_qs(urlparse(self.path).query)
+        params.update(parse_qs(body))
+        self._handle(params)
+
+    def _handle(self, raw_params):
+        params = {key: values[-1] for key, values in raw_params.items()}
+        path = urlparse(self.path).path.strip("/")
+        fake = self.fake
+
+        if path == "_stats":
+            return self._send(200, {"calls": dict(fake.calls)})
+
+        if path == "api/v1/access_token":
+            fake.calls["access_token"] += 1
+            return self._send(200, {"access_token": "fake-token", "token_type": "bearer",
+                                    "expires_in": 86400, "scope": "*"})
+
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        endpoint, handler = self._route(path, params)
+        fake.calls[endpoint] += 1
+        headers = fake._rate_limit_headers()
+        if fake._should_fail():
+            return self._send(429, {"message": "Too Many Requests", "error": 429},
+                              dict(headers, **{"retry-after": "1"}))
+        if handler is None:
+            return self._send(404, {"message": "Not Found", "error": 404}, headers)
+        payload = handler()
+        if payload is None:
+            return self._send(404, {"message": "Not Found", "error": 404}, headers)
+        return self._send(200, payload, headers)
+
+    def _route(self, path, params):
+        parts = path.split("/")
+        fake = self.fake
+        if len(parts) == 3 and parts[0] == "r" and parts[2] == "search":
+            return "search", lambda: fake.search(parts[1], params)
+        if parts[0] == "comments" and len(parts) >= 2:
+            return "comments", lambda: fake.submission_comments(parts[1], params)
+        if path == "api/info":
+            return "info", lambda: fake.info(params)
+        if path == "api/morechildren":
+            return "morechildren", lambda: fake.more_children(params)
+        if len(parts) >= 4 and parts[0] == "r" and parts[2] == "comments":
+            return "page", lambda: fake.submission_page(parts[3])
+        return "other", None
+
+    def _send(self, status, payload, headers=None):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/html; charset=UTF-8"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json; charset=UTF-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded or synthetic corpus as a Reddit API stand-in")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--corpus", help="Corpus JSON file (a synthetic corpus is generated otherwise)")
+    parser.add_argument("--keywords-file", help="Keywords for the synthetic corpus, one per line")
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        keywords = ["seafood plant", "trawler", "processing plant"]
+        if args.keywords_file:
+            with open(args.keywords_file, "r", encoding="utf-8") as f:
+                keywords = [line.strip() for line in f if line.strip()]
+        corpus = generate_corpus(keywords, num_submissions=args.submissions)
+
+    server = FakeRedditServer(corpus, latency=args.latency, error_rate=args.error_rate, quota=args.quota)
+    server.start(args.port)
+    print(f"Serving {len(server.submissions)} submissions at {server.url} (Ctrl+C to stop)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class CommentCache:
+    """
+    LRU cache of flattened comment lists keyed by submission id
+
+    Each comment is stored as a small dict (id, author, body, created_utc,
+    parent_id) so later keyword passes over the same submission can be matched
+    without any network traffic. Entries remember the comment limit they were
+    fetched with and are only served to lookups asking for at most as many
+    comments. When a cache directory is given, entries are also written
+    to disk as JSON and survive across runs. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 500, cache_dir: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of submissions kept in memory
+            cache_dir: Optional directory for persisting entries between runs
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[int], List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, submission_id: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up the cached comments for a submission
+
+        Args:
+            submission_id: Reddit submission id
+            limit: Comment limit the caller would fetch with; entries fetched with a
+                smaller limit are treated as missing (any entry is served by default)
+
+        Returns:
+            List of comment dicts, or None if the submission is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(submission_id)
+            if entry is not None and _covers(entry[0], limit):
+                self._entries.move_to_end(submission_id)
+                self.hits += 1
+                return entry[1]
+
+        entry = self._read_from_disk(submission_id) if entry is None else None
+        with self._lock:
+            if entry is not None and _covers(entry[0], limit):
+                self._store_in_memory(submission_id, *entry)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            return None
+
+    def put(self, submission_id: str, comments: List[Dict[str, Any]], limit: Optional[int] = None) -> None:
+        """
+        Store the flattened comments of a submission
+
+        Args:
+            submission_id: Reddit submission id
+            comments: List of comment dicts
+            limit: Comment limit the comments were fetched with (None for a complete tree)
+        """
+        with self._lock:
+            self._store_in_memory(submission_id, limit, comments)
+        self._write_to_disk(submission_id, limit, comments)
+
+    def summary(self) -> str:
+        """Human readable hit/miss counts for the search log"""
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return (f"Comment cache: {self.hits} hits, {self.misses} misses "
+                f"({hit_rate:.0f}% hit rate, {len(self._entries)} submissions in memory)")
+
+    def _store_in_memory(self, submission_id: str, limit: Optional[int], comments: List[Dict[str, Any]]) -> None:
+        """Insert an entry and evict the least recently used ones beyond the size bound"""
+        self._entries[submission_id] = (limit, comments)
+        self._entries.move_to_end(submission_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, submission_id: str) -> str:
+        """Path of the JSON file for a submission"""
+        return os.path.join(self.cache_dir, f"{submission_id}.json")
+
+    def _read_from_disk(self, submission_id: str) -> Optional[Tuple[Optional[int], List[Dict[str, Any]]]]:
+        """Load an entry (fetch limit and comments) from the cache directory if present"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(submission_id), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if isinstance(entry, list):
+                # Written before limits were recorded; only serves lookups without a limit
+                return 0, entry
+            return entry['limit'], entry['comments']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached comments for submission {submission_id}: {str(e)}")
+            return None
+
+    def _write_to_disk(self, submission_id: str, limit: Optional[int], comments: List[Dict[str, Any]]) -> None:
+        """Persist an entry to the cache directory"""
+        if not self.cache_dir:
+            return
+        try:
+            # Write to a temporary file first so a crash never leaves a truncated entry
+            path = self._disk_path(submission_id)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({'limit': limit, 'comments': comments}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error caching comments for submission {submission_id}: {str(e)}")
+
+
+def _covers(cached_limit: Optional[int], limit: Optional[int]) -> bool:
+    """Whether an entry fetched with cached_limit holds everything a lookup with limit needs"""
+    return limit is None or cached_limit is None or cached_limit >= limit
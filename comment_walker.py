@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Iterator
+
+from praw.models import MoreComments
+
+
+class CommentWalker:
+    """
+    Bounded breadth-first traversal of a submission's comment tree
+
+    The first request asks Reddit for at most `limit` comments
+    (submission.comment_limit), and the walk then visits them top level
+    first, yielding each comment as it goes. "Load more comments" stubs are
+    only expanded - one request each - up to `more_limit` per thread, and no
+    further requests are made once the limit or the per-thread time budget
+    is reached. Fetched and skipped comment counts are kept for the search
+    log. Safe to share between threads.
+    """
+
+    def __init__(self, time_budget: float = 10.0, more_limit: int = 0):
+        """
+        Initialize the walker
+
+        Args:
+            time_budget: Seconds one thread may spend on expansion requests
+            more_limit: "Load more comments" stubs expanded per thread (0 never expands)
+        """
+        self.time_budget = time_budget
+        self.more_limit = max(0, more_limit)
+        self._lock = threading.Lock()
+        self.stats = {'threads': 0, 'fetched': 0, 'skipped': 0, 'more_expanded': 0, 'out_of_time': 0}
+
+    def iter_comments(self, submission, limit: int) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily walk a submission's comments, top level first
+
+        Args:
+            submission: PRAW submission (not yet loaded)
+            limit: Maximum number of comments to yield
+
+        Yields:
+            Comment dicts (id, author, body, created_utc, parent_id)
+        """
+        submission.comment_limit = max(1, limit)
+        deadline = time.monotonic() + self.time_budget
+        queue = deque(submission.comments)  # One request for the first `limit` comments
+        fetched = expanded = unexpanded = 0
+        out_of_time = False
+
+        try:
+            while queue and fetched < limit:
+                item = queue.popleft()
+                if isinstance(item, MoreComments):
+                    if expanded >= self.more_limit or out_of_time:
+                        unexpanded += item.count
+                        continue
+                    if time.monotonic() >= deadline:
+                        out_of_time = True
+                        unexpanded += item.count
+                        continue
+                    expanded += 1
+                    queue.extend(item.comments())
+                    continue
+                fetched += 1
+                yield {
+                    'id': item.id,
+                    'author': str(item.author),
+                    'body': item.body,
+                    'created_utc': item.created_utc,
+                    'parent_id': item.parent_id
+                }
+                queue.extend(item.replies)
+        finally:
+            # Comments left behind: stubs not expanded plus loaded comments not visited
+            unexpanded += sum(item.count if isinstance(item, MoreComments) else 1 for item in queue)
+            skipped = max(unexpanded, (getattr(submission, 'num_comments', 0) or 0) - fetched)
+            with self._lock:
+                self.stats['threads'] += 1
+                self.stats['fetched'] += fetched
+                self.stats['skipped'] += skipped
+                self.stats['more_expanded'] += expanded
+                self.stats['out_of_time'] += int(out_of_time)
+
+    def walk(self, submission, limit: int) -> List[Dict[str, Any]]:
+        """
+        Fetch up to `limit` comments of a submission
+
+        Args:
+            submission: PRAW submission (not yet loaded)
+            limit: Maximum number of comments to return
+
+        Returns:
+            Comment dicts in breadth-first order
+        """
+        return list(self.iter_comments(submission, limit))
+
+    def summary(self) -> str:
+        """Human readable fetched/skipped counts for the search log"""
+        return (f"Comment walker: {self.stats['fetched']} comments fetched, {self.stats['skipped']} skipped "
+                f"across {self.stats['threads']} threads ({self.stats['more_expanded']} 'more' stubs expanded, "
+                f"{self.stats['out_of_time']} threads out of time)")
@@ -1,6 +1,174 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 import pandas as pd
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+# Runs of special characters and whitespace, collapsed to a single space when cleaning
+NON_WORD_RE = re.compile(r'\W+')
+
+# Words that would create too many false positives as search keywords
+COMMON_WORDS = frozenset({
+    "the", "and", "fishing", "fish", "inc", "incorporated", "llc", 
+    "company", "corp", "corporation", "industries", "seafood", "vessel",
+    "boat", "ship", "processing", "plant", "factory", "international",
+    "pacific", "atlantic", "north", "south", "east", "west", "marine",
+    "sea", "ocean", "gulf", "bay", "harbor", "port", "enterprises", 
+    "limited", "ltd", "holdings", "group"
+})
+
+# Memoized entity indexes (and so extract_keywords results), shared across DataProcessor instances and Streamlit reruns
+KEYWORD_CACHE_SIZE = 32
+_KEYWORD_CACHE: "OrderedDict[tuple, EntityIndex]" = OrderedDict()
+_KEYWORD_CACHE_LOCK = threading.Lock()
+
+def encode_refs(refs: Iterable[int], dataset: Optional[str] = None) -> str:
+    """
+    Serialize entity refs as a compact comma separated string (e.g. 12,57)
+
+    Refs are row positions, so they are prefixed with the fingerprint of the
+    dataset they point into (e.g. 3f09c2a1b7d4e6f8:12,57) when it is known.
+    """
+    encoded = ",".join(str(ref) for ref in refs)
+    return f"{dataset}:{encoded}" if dataset and encoded else encoded
+
+
+def split_refs(encoded: Optional[str]) -> Tuple[Optional[str], List[int]]:
+    """Parse a string written by encode_refs into its dataset fingerprint (if any) and refs"""
+    if not encoded:
+        return None, []
+    dataset, _, refs = encoded.rpartition(":")
+    return dataset or None, [int(ref) for ref in refs.split(",")] if refs else []
+
+
+def decode_refs(encoded: Optional[str], dataset: Optional[str] = None) -> List[int]:
+    """Parse a string written by encode_refs, dropping refs into a dataset other than `dataset`"""
+    encoded_dataset, refs = split_refs(encoded)
+    return refs if encoded_dataset == dataset else []
+
+
+def content_hash(df: pd.DataFrame, columns: List[str]) -> str:
+    """Hash of the given columns' values, in row order"""
+    digest = hashlib.sha1()
+    for col in columns:
+        digest.update(str(col).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df[col], index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class EntityIndex:
+    """
+    Inverted index from normalized keyword to the CSV rows it was extracted from
+
+    Each posting is a compact int ref encoding the row position and the source
+    column (row * number of columns + column position), so a mention's keyword
+    leads straight back to the plant or vessel rows (IMO number, flag, owner,
+    ...) without rescanning the CSV. Refs are positions in the DataFrame the
+    index was built from, so encoded refs carry the index's fingerprint (a
+    hash of the keyword columns) and refs from another dataset are ignored.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: List[str], postings: Dict[str, Tuple[int, ...]],
+                 fingerprint: Optional[str] = None):
+        """
+        Initialize the index
+
+        Args:
+            df: DataFrame the keywords were extracted from
+            columns: Source columns, in ref order
+            postings: Keyword to refs
+            fingerprint: Hash of the source columns (computed from df by default)
+        """
+        self._source = df
+        self._rows = df.reset_index(drop=True)
+        self.columns = tuple(columns)
+        self._postings = postings
+        self.keywords = sorted(postings)
+        self.fingerprint = fingerprint or content_hash(df, columns)[:16]
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def with_rows(self, df: pd.DataFrame) -> "EntityIndex":
+        """
+        The same postings over another DataFrame with the same keyword columns
+
+        Lets a memoized index serve a DataFrame whose other columns have
+        changed since it was built, so entity() and group_mentions() return
+        current rows.
+        """
+        if df is self._source:
+            return self
+        index = copy.copy(self)
+        index._source = df
+        index._rows = df.reset_index(drop=True)
+        return index
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self._postings
+
+    def refs(self, keyword: str) -> Tuple[int, ...]:
+        """Refs of the rows a keyword came from (empty for unknown keywords)"""
+        return self._postings.get(keyword, ())
+
+    def ref_map(self, keywords: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Encoded refs per keyword, for attaching to mentions
+
+        Args:
+            keywords: Keywords to include (all keywords by default)
+        """
+        keywords = self.keywords if keywords is None else keywords
+        return {keyword: encode_refs(self.refs(keyword), self.fingerprint)
+                for keyword in keywords if keyword in self._postings}
+
+    def resolve(self, ref: int) -> Tuple[int, str]:
+        """Row position and source column of a ref"""
+        row, column = divmod(ref, len(self.columns))
+        return row, self.columns[column]
+
+    def entity(self, ref: int) -> Dict[str, Any]:
+        """
+        Source row of a ref
+
+        Returns:
+            The row's values plus the column the keyword came from, or an empty
+            dict if the ref is outside the DataFrame
+        """
+        row, column = self.resolve(ref)
+        if row >= len(self._rows):
+            return {}
+        entity = self._rows.iloc[row].to_dict()
+        entity['matched_column'] = column
+        return entity
+
+    def group_mentions(self, mentions: Iterable[Tuple[str, Optional[str]]]) -> pd.DataFrame:
+        """
+        Count mentions per source row
+
+        Args:
+            mentions: (reddit id, encoded refs) pairs; refs into other datasets are skipped
+
+        Returns:
+            The source rows that were mentioned with a 'mentions' column
+            (distinct Reddit ids), most mentioned first
+        """
+        ids_by_row: Dict[int, set] = {}
+        for mention_id, encoded in mentions:
+            for ref in decode_refs(encoded, self.fingerprint):
+                row, _ = self.resolve(ref)
+                if row < len(self._rows):
+                    ids_by_row.setdefault(row, set()).add(mention_id)
+        if not ids_by_row:
+            return pd.DataFrame(columns=['mentions'] + list(self._rows.columns))
+
+        rows = list(ids_by_row)
+        report = self._rows.iloc[rows].copy()
+        report.insert(0, 'mentions', [len(ids_by_row[row]) for row in rows])
+        return report.sort_values('mentions', ascending=False, kind='stable')
+
 
 class DataProcessor:
     """Class for processing CSV data and extracting keywords"""
@@ -12,6 +180,10 @@ class DataProcessor:
                          min_keyword_length: int = 3) -> List[str]:
         """
         Extract keywords from the specified columns in the dataframe
+
+        Results are memoized by a hash of the column contents plus the column
+        choices, so Streamlit reruns and repeated searches over the same file
+        don't redo the extraction.
         
         Args:
             df: The pandas DataFrame containing the data
@@ -22,45 +194,73 @@ class DataProcessor:
         Returns:
             List of unique keywords for searching
         """
-        keywords = set()
-        
-        # Process name column
-        if name_col in df.columns:
-            name_values = df[name_col].dropna().astype(str).tolist()
-            for name in name_values:
-                # Clean and process the name
-                processed_name = self._clean_text(name)
-                if processed_name and len(processed_name) >= min_keyword_length:
-                    keywords.add(processed_name)
-                
-                # Also add parts of compound names (e.g., "Pacific Harvester" -> "Pacific", "Harvester")
-                parts = processed_name.split()
-                for part in parts:
-                    if len(part) >= min_keyword_length and self._is_valid_keyword(part):
-                        keywords.add(part)
-        
-        # Process owner column
-        if owner_col in df.columns:
-            owner_values = df[owner_col].dropna().astype(str).tolist()
-            for owner in owner_values:
-                # Clean and process the owner name
-                processed_owner = self._clean_text(owner)
-                if processed_owner and len(processed_owner) >= min_keyword_length:
-                    keywords.add(processed_owner)
-                
-                # Add parts of compound owner names
-                parts = processed_owner.split()
-                for part in parts:
-                    if len(part) >= min_keyword_length and self._is_valid_keyword(part):
-                        keywords.add(part)
-        
-        # Convert set to list and sort
-        keyword_list = sorted(list(keywords))
-        
-        # Remove very common words that might create false positives
-        filtered_keywords = [k for k in keyword_list if not self._is_common_word(k)]
-        
-        return filtered_keywords
+        return list(self.build_entity_index(df, name_col, owner_col, min_keyword_length).keywords)
+
+    def build_entity_index(self,
+                           df: pd.DataFrame,
+                           name_col: str,
+                           owner_col: str,
+                           min_keyword_length: int = 3) -> EntityIndex:
+        """
+        Build the keyword to source row index behind extract_keywords
+
+        Memoized like extract_keywords on the keyword columns; the rows the
+        index returns always come from `df`. The returned index must not be
+        modified.
+
+        Args:
+            df: The pandas DataFrame containing the data
+            name_col: Column name for names (plant or vessel names)
+            owner_col: Column name for owners
+            min_keyword_length: Minimum length for a keyword to be included
+
+        Returns:
+            EntityIndex over the keywords and the rows they came from
+        """
+        columns = [col for col in dict.fromkeys([name_col, owner_col]) if col in df.columns]
+        digest = content_hash(df, columns)
+        cache_key = (digest, name_col, owner_col, min_keyword_length)
+        with _KEYWORD_CACHE_LOCK:
+            cached = _KEYWORD_CACHE.get(cache_key)
+            if cached is not None:
+                _KEYWORD_CACHE.move_to_end(cache_key)
+                return cached.with_rows(df)
+
+        positions = pd.Series(range(len(df)), index=df.index)
+        postings = []
+        for column_position, col in enumerate(columns):
+            cleaned = self._clean_series(df[col])
+            refs = positions[cleaned.index] * len(columns) + column_position
+
+            # Whole names, e.g. "pacific harvester"
+            whole = cleaned.str.len() >= min_keyword_length
+            postings.append(pd.DataFrame({'keyword': cleaned[whole].values, 'ref': refs[whole].values}))
+
+            # Also add parts of compound names (e.g., "Pacific Harvester" -> "Pacific", "Harvester")
+            parts = cleaned.str.split().explode().dropna()
+            parts = parts[(parts.str.len() >= max(min_keyword_length, 2)) & ~parts.str.isdigit()]
+            postings.append(pd.DataFrame({'keyword': parts.values, 'ref': refs[parts.index].values}))
+
+        index = {}
+        if postings:
+            postings = pd.concat(postings, ignore_index=True).drop_duplicates()
+            # Remove very common words that might create false positives (keywords are already lowercase)
+            postings = postings[~postings['keyword'].isin(COMMON_WORDS)]
+            index = {keyword: tuple(sorted(refs))
+                     for keyword, refs in postings.groupby('keyword', sort=False)['ref']}
+        entity_index = EntityIndex(df, columns, index, fingerprint=digest[:16])
+
+        with _KEYWORD_CACHE_LOCK:
+            _KEYWORD_CACHE[cache_key] = entity_index
+            while len(_KEYWORD_CACHE) > KEYWORD_CACHE_SIZE:
+                _KEYWORD_CACHE.popitem(last=False)
+        return entity_index
+
+    def _clean_series(self, values: pd.Series) -> pd.Series:
+        """Vectorized _clean_text over a column, skipping missing values"""
+        return (values.dropna().astype(str).str.lower()
+                .str.replace(NON_WORD_RE, ' ', regex=True)
+                .str.strip())
     
     def _clean_text(self, text: str) -> str:
         """Clean text by removing special characters and normalizing"""
@@ -70,9 +270,8 @@ class DataProcessor:
         # Convert to lowercase
         text = text.lower()
         
-        # Remove special characters and extra whitespace
-        text = re.sub(r'[^\w\s]', ' ', text)  # Replace special chars with space
-        text = re.sub(r'\s+', ' ', text)      # Replace multiple spaces with single space
+        # Replace runs of special characters and whitespace with a single space
+        text = NON_WORD_RE.sub(' ', text)
         
         return text.strip()
     
@@ -93,13 +292,4 @@ class DataProcessor:
     
     def _is_common_word(self, word: str) -> bool:
         """Check if word is a common word that would create too many false positives"""
-        common_words = {
-            "the", "and", "fishing", "fish", "inc", "incorporated", "llc", 
-            "company", "corp", "corporation", "industries", "seafood", "vessel",
-            "boat", "ship", "processing", "plant", "factory", "international",
-            "pacific", "atlantic", "north", "south", "east", "west", "marine",
-            "sea", "ocean", "gulf", "bay", "harbor", "port", "enterprises", 
-            "limited", "ltd", "holdings", "group"
-        }
-        
-        return word.lower() in common_words
+        return word.lower() in COMMON_WORDS
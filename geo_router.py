@@ -0,0 +1,163 @@
+import math
+from typing import List, Dict, Tuple, Optional, Iterable
+
+import pandas as pd
+
+from data_processor import EntityIndex
+
+DEFAULT_LOCAL_SUBREDDITS_PATH = "data/local_subreddits.csv"
+
+# Plants.csv columns holding each plant's location
+LOCATION_COLUMNS = {
+    'country': "Country",
+    'province': "Province",
+    'city': "City",
+    'latitude': "Latitude",
+    'longitude': "Longitude",
+}
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.2
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GeoRouter:
+    """
+    Maps plant locations to the local subreddits of their area
+
+    Reads a bundled, offline table of subreddits (data/local_subreddits.csv):
+    country subreddits are matched by country name, city and region
+    subreddits by distance from their centre (within radius_km) or, for
+    plants without coordinates, by name. Centres are kept in a grid of
+    cell_degrees x cell_degrees cells, each listing the entries whose radius
+    reaches into it, so a lookup only measures distances to a handful of
+    candidates.
+    """
+
+    def __init__(self, table_path: str = DEFAULT_LOCAL_SUBREDDITS_PATH, cell_degrees: float = 1.0):
+        """
+        Load the subreddit table and build the spatial index
+
+        Args:
+            table_path: CSV with subreddit, scope, name, country, latitude, longitude, radius_km
+            cell_degrees: Size of the grid cells in degrees
+        """
+        self.cell_degrees = cell_degrees
+        self._by_country: Dict[str, List[str]] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._places: List[Tuple[str, float, float, float]] = []  # subreddit, latitude, longitude, radius_km
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+
+        table = pd.read_csv(table_path)
+        for row in table.itertuples(index=False):
+            subreddit = str(row.subreddit).strip()
+            if row.scope == 'country':
+                self._by_country.setdefault(self._normalize(row.country), []).append(subreddit)
+                continue
+            self._by_name.setdefault(self._normalize(row.name), []).append(subreddit)
+            if pd.notna(row.latitude) and pd.notna(row.longitude):
+                self._add_place(subreddit, float(row.latitude), float(row.longitude), float(row.radius_km))
+
+    def _add_place(self, subreddit: str, latitude: float, longitude: float, radius_km: float) -> None:
+        """Index a city or region in every grid cell its radius overlaps"""
+        index = len(self._places)
+        self._places.append((subreddit, latitude, longitude, radius_km))
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(0.01, math.cos(math.radians(latitude))))
+        low_lat, high_lat = self._cell(latitude - lat_span), self._cell(latitude + lat_span)
+        low_lon, high_lon = self._cell(longitude - lon_span), self._cell(longitude + lon_span)
+        for lat_cell in range(low_lat, high_lat + 1):
+            for lon_cell in range(low_lon, high_lon + 1):
+                self._grid.setdefault((lat_cell, lon_cell), []).append(index)
+
+    def _cell(self, degrees: float) -> int:
+        """Grid cell number of a latitude or longitude"""
+        return math.floor(degrees / self.cell_degrees)
+
+    def _normalize(self, name) -> str:
+        """Lowercased, trimmed name for lookups ("" for missing values)"""
+        return str(name).strip().lower() if isinstance(name, str) else ""
+
+    def nearby(self, latitude: float, longitude: float) -> List[str]:
+        """
+        City and region subreddits whose area contains a point
+
+        Returns:
+            Subreddit names, nearest centre first
+        """
+        candidates = self._grid.get((self._cell(latitude), self._cell(longitude)), [])
+        hits = []
+        for index in candidates:
+            subreddit, place_lat, place_lon, radius_km = self._places[index]
+            distance = haversine_km(latitude, longitude, place_lat, place_lon)
+            if distance <= radius_km:
+                hits.append((distance, subreddit))
+        return [subreddit for _, subreddit in sorted(hits)]
+
+    def local_subreddits(self, country: Optional[str] = None, province: Optional[str] = None,
+                         city: Optional[str] = None, latitude: Optional[float] = None,
+                         longitude: Optional[float] = None) -> List[str]:
+        """
+        Local subreddits for one location
+
+        Args:
+            country: Country name as written in Plants.csv
+            province: Province or region name
+            city: City name
+            latitude: Latitude in degrees (used together with longitude)
+            longitude: Longitude in degrees
+
+        Returns:
+            Nearby city/region subreddits (or name matches without
+            coordinates) followed by the country subreddit
+        """
+        subreddits = []
+        if latitude is not None and longitude is not None and pd.notna(latitude) and pd.notna(longitude):
+            subreddits.extend(self.nearby(float(latitude), float(longitude)))
+        else:
+            for name in (city, province):
+                subreddits.extend(self._by_name.get(self._normalize(name), []))
+        subreddits.extend(self._by_country.get(self._normalize(country), []))
+        return list(dict.fromkeys(subreddits))
+
+    def route_keywords(self, df: pd.DataFrame, index: EntityIndex, keywords: Iterable[str],
+                       columns: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+        """
+        Local subreddits for each keyword, from the locations of the rows it came from
+
+        Args:
+            df: Plants DataFrame the entity index was built from
+            index: EntityIndex over df
+            keywords: Keywords to route
+            columns: Location column names (LOCATION_COLUMNS by default); missing ones are ignored
+
+        Returns:
+            Keyword to local subreddit names; keywords without any are left out
+        """
+        columns = columns or LOCATION_COLUMNS
+        locations = {}
+        for field, column in columns.items():
+            values = df[column] if column in df.columns else pd.Series([None] * len(df), dtype=object)
+            if field in ('latitude', 'longitude'):
+                values = pd.to_numeric(values, errors='coerce')
+            locations[field] = values.tolist()
+        fields = list(locations)
+        by_row = [self.local_subreddits(**dict(zip(fields, values))) for values in zip(*locations.values())]
+
+        routes = {}
+        for keyword in keywords:
+            subreddits: Dict[str, None] = {}
+            for ref in index.refs(keyword):
+                row, _ = index.resolve(ref)
+                if row < len(by_row):
+                    subreddits.update(dict.fromkeys(by_row[row]))
+            if subreddits:
+                routes[keyword] = list(subreddits)
+        return routes
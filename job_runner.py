@@ -0,0 +1,813 @@
+"""
+Background search jobs
+
+Searches and live streams are queued in a small SQLite database and run by a
+separate worker process, so a run survives browser reloads and no Streamlit
+session is tied up for the hours a full run can take. The app submits jobs and polls their
+progress; the worker claims queued jobs one at a time, runs them and writes
+progress, log lines and a result summary back to the database. Mentions are
+stored in the MentionStore as each search completes.
+
+Run the worker by hand with `python job_runner.py` (with REDDIT_CLIENT_ID and
+REDDIT_CLIENT_SECRET set), or let the app start it (see ensure_worker_running).
+Credentials are only kept in the worker's environment, never in the database.
+Each set of credentials gets its own worker, which only runs the jobs
+submitted with them (matched by credentials_fingerprint).
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from reddit_service import RedditService
+from mention_store import MentionStore, WatermarkStore, KeywordStatsStore, DEFAULT_DB_PATH
+from search_executor import SearchExecutor, build_tasks
+from mention_pipeline import store_mentions, tap, drain
+from api_budget import ApiBudget
+from comment_walker import CommentWalker
+
+DEFAULT_JOBS_DB_PATH = "data/jobs.db"
+WORKER_LOG_PATH = "data/job_worker.log"
+
+# Comment trees fetched by a job are kept here until it completes, so a resumed run doesn't fetch them again
+JOB_CACHE_DIR = "cache/jobs"
+
+# A worker that has not reported in this long is considered gone
+WORKER_HEARTBEAT_TIMEOUT = 30
+HEARTBEAT_INTERVAL = 5
+
+# Job kinds: keyword searches (the default) and live streams of new posts and comments
+SEARCH = "search"
+STREAM = "stream"
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED, INTERRUPTED)
+RESUMABLE_STATES = (FAILED, CANCELLED, INTERRUPTED)
+
+# Reddit credentials never go into the job database; the worker reads them from its environment
+CLIENT_ID_ENV = "REDDIT_CLIENT_ID"
+CLIENT_SECRET_ENV = "REDDIT_CLIENT_SECRET"
+
+# Credential parameters that older versions stored with jobs, removed when the database is opened
+SECRET_PARAMS = ("client_id", "client_secret")
+SCRUB_SECRETS_SQL = (
+    "UPDATE jobs SET params = json_remove(params, " + ", ".join(f"'$.{key}'" for key in SECRET_PARAMS) + ") "
+    "WHERE " + " OR ".join(f"json_extract(params, '$.{key}') IS NOT NULL" for key in SECRET_PARAMS)
+)
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    submitted_by TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    completed_steps INTEGER NOT NULL DEFAULT 0,
+    total_steps INTEGER NOT NULL DEFAULT 0,
+    current_task TEXT,
+    summary TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+CREATE TABLE IF NOT EXISTS job_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    logged_at TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_log_job ON job_log (job_id, id);
+CREATE TABLE IF NOT EXISTS job_tasks (
+    job_id INTEGER NOT NULL,
+    task_key TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    cursor TEXT,
+    mentions INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, task_key)
+);
+-- One worker per credentials fingerprint (replaces the single-slot worker table)
+DROP TABLE IF EXISTS worker;
+CREATE TABLE IF NOT EXISTS workers (
+    fingerprint TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed queue and state of background search jobs
+
+    Shared by the app (submitting and polling) and the worker process
+    (claiming and updating). All reads are single indexed queries, so
+    polling from several sessions stays cheap.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_JOBS_DB_PATH):
+        """
+        Open (and create if needed) the job database
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(JOBS_SCHEMA)
+        with self._conn:
+            self._conn.execute(SCRUB_SECRETS_SQL)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    def submit(self, params: Dict[str, Any], submitted_by: str = "") -> int:
+        """
+        Queue a search job
+
+        Args:
+            params: Search parameters (see run_search_job)
+            submitted_by: Free-form label of who queued the job
+
+        Returns:
+            Id of the new job
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (status, params, submitted_by, created_at) VALUES (?, ?, ?, ?)",
+                (QUEUED, json.dumps(params), submitted_by, _now())
+            )
+        return cursor.lastrowid
+
+    def claim_next(self, fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Mark the oldest queued job as running and return it
+
+        Args:
+            fingerprint: Only claim jobs submitted with these credentials (see credentials_fingerprint)
+
+        Returns:
+            The claimed job, or None if the queue is empty
+        """
+        query, params = "SELECT id FROM jobs WHERE status = ?", [QUEUED]
+        if fingerprint is not None:
+            query += " AND json_extract(params, '$.credentials_fingerprint') = ?"
+            params.append(fingerprint)
+        with self._lock, self._conn:
+            row = self._conn.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, _now(), row["id"], QUEUED)
+            )
+        return self.get_job(row["id"])
+
+    def update_progress(self, job_id: int, completed_steps: int, total_steps: int,
+                        current_task: str) -> None:
+        """Record how far a running job has got"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET completed_steps = ?, total_steps = ?, current_task = ? WHERE id = ?",
+                (completed_steps, total_steps, current_task, job_id)
+            )
+
+    def append_log(self, job_id: int, message: str) -> None:
+        """Add a line to a job's search log"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO job_log (job_id, logged_at, message) VALUES (?, ?, ?)",
+                (job_id, _now(), message)
+            )
+
+    def finish(self, job_id: int, status: str, summary: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> None:
+        """
+        Mark a job as finished
+
+        Args:
+            job_id: Job id
+            status: One of the finished states
+            summary: Result summary to keep with the job
+            error: Error message for failed jobs
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, summary = ?, error = ? WHERE id = ?",
+                (status, _now(), json.dumps(summary) if summary is not None else None, error, job_id)
+            )
+
+    def request_cancel(self, job_id: int) -> None:
+        """Ask for a job to stop; queued jobs are cancelled straight away"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, _now(), job_id, QUEUED)
+            )
+
+    def cancel_requested(self, job_id: int) -> bool:
+        """Whether a stop has been requested for a job"""
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def resume(self, job_id: int, credentials: Dict[str, str], budget_usd: Optional[float] = None) -> bool:
+        """
+        Queue a stopped job again so it continues from its checkpoint
+
+        Args:
+            job_id: Job id
+            credentials: client_id and client_secret the job is resumed with (only their
+                fingerprint is stored; see credentials_fingerprint)
+            budget_usd: New total budget for the job, including what earlier attempts spent.
+                Needed to resume a job whose budget is used up.
+
+        Returns:
+            False if the job does not exist, is not in a resumable state or has no budget left
+        """
+        job = self.get_job(job_id)
+        if job is None or not is_resumable(job):
+            return False
+        params = dict(job["params"], credentials_fingerprint=credentials_fingerprint(credentials))
+        if budget_usd is not None:
+            params["budget_usd"] = budget_usd
+        remaining = remaining_budget(dict(job, params=params))
+        if remaining is not None and remaining <= 0:
+            return False
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, params = ?, cancel_requested = 0, error = NULL, "
+                "finished_at = NULL WHERE id = ?",
+                (QUEUED, json.dumps(params), job_id)
+            )
+        self.append_log(job_id, "Run resumed from checkpoint")
+        return True
+
+    def get_checkpoints(self, job_id: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Checkpointed tasks of a job
+
+        Returns:
+            Dictionary from task key to {'entity_type', 'done', 'cursor', 'mentions'}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_key, entity_type, done, cursor, mentions FROM job_tasks WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {
+            row["task_key"]: {
+                'entity_type': row["entity_type"],
+                'done': bool(row["done"]),
+                'cursor': json.loads(row["cursor"]) if row["cursor"] else None,
+                'mentions': row["mentions"]
+            }
+            for row in rows
+        }
+
+    def checkpoint_task(self, job_id: int, task_key: str, entity_type: str,
+                        cursor: Optional[Dict[str, Any]], new_mentions: int, done: bool = False) -> None:
+        """
+        Record the position of a task
+
+        Args:
+            job_id: Job id
+            task_key: SearchTask.key
+            entity_type: Entity type of the task
+            cursor: Pagination state to resume from (None once the task is done)
+            new_mentions: Mentions stored since the previous checkpoint
+            done: Whether the task has finished
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO job_tasks (job_id, task_key, entity_type, done, cursor, mentions, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job_id, task_key) DO UPDATE SET
+                    done = excluded.done,
+                    cursor = COALESCE(excluded.cursor, job_tasks.cursor),
+                    mentions = job_tasks.mentions + excluded.mentions,
+                    updated_at = excluded.updated_at
+                """,
+                (job_id, task_key, entity_type, int(done), json.dumps(cursor) if cursor else None,
+                 new_mentions, _now())
+            )
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Look up a job by id"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent jobs, newest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [_job_from_row(row) for row in rows]
+
+    def queued_count(self, fingerprint: Optional[str] = None) -> int:
+        """Number of jobs waiting for a worker (only those submitted with `fingerprint`'s credentials if given)"""
+        query, params = "SELECT COUNT(*) FROM jobs WHERE status = ?", [QUEUED]
+        if fingerprint is not None:
+            query += " AND json_extract(params, '$.credentials_fingerprint') = ?"
+            params.append(fingerprint)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def get_log(self, job_id: int, last: Optional[int] = None) -> List[str]:
+        """
+        Search log of a job
+
+        Args:
+            job_id: Job id
+            last: Only return the most recent lines
+
+        Returns:
+            Log lines formatted as "[timestamp] message", oldest first
+        """
+        query = "SELECT logged_at, message FROM job_log WHERE job_id = ? ORDER BY id DESC"
+        params: List[Any] = [job_id]
+        if last is not None:
+            query += " LIMIT ?"
+            params.append(last)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [f"[{row['logged_at']}] {row['message']}" for row in reversed(rows)]
+
+    def register_worker(self, pid: int, fingerprint: str) -> bool:
+        """
+        Claim the worker slot of one set of credentials
+
+        Jobs of these credentials left running by a previous worker that died
+        are marked interrupted.
+
+        Args:
+            pid: Process id of the worker
+            fingerprint: credentials_fingerprint of the worker's credentials
+
+        Returns:
+            False if another live worker already holds the slot
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT pid, heartbeat FROM workers WHERE fingerprint = ?",
+                                     (fingerprint,)).fetchone()
+            if row and row["pid"] != pid and time.time() - row["heartbeat"] < WORKER_HEARTBEAT_TIMEOUT:
+                return False
+            self._conn.execute(
+                "INSERT INTO workers (fingerprint, pid, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT (fingerprint) DO UPDATE SET pid = excluded.pid, heartbeat = excluded.heartbeat",
+                (fingerprint, pid, time.time())
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? "
+                "WHERE status = ? AND json_extract(params, '$.credentials_fingerprint') = ?",
+                (INTERRUPTED, _now(), "The worker stopped while this job was running", RUNNING, fingerprint)
+            )
+        return True
+
+    def heartbeat(self, pid: int, fingerprint: str) -> None:
+        """Report that the worker is still alive"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE workers SET heartbeat = ? WHERE fingerprint = ? AND pid = ?",
+                               (time.time(), fingerprint, pid))
+
+    def worker_alive(self, fingerprint: str) -> bool:
+        """Whether the worker of one set of credentials has reported in recently"""
+        with self._lock:
+            row = self._conn.execute("SELECT heartbeat FROM workers WHERE fingerprint = ?",
+                                     (fingerprint,)).fetchone()
+        return bool(row) and time.time() - row[0] < WORKER_HEARTBEAT_TIMEOUT
+
+
+def credentials_fingerprint(credentials: Dict[str, str]) -> str:
+    """Hash identifying a client_id/client_secret pair without revealing them"""
+    pair = f"{credentials.get('client_id', '')}:{credentials.get('client_secret', '')}"
+    return hashlib.sha256(pair.encode("utf-8")).hexdigest()[:16]
+
+
+def worker_credentials() -> Dict[str, str]:
+    """Reddit credentials from the worker's environment"""
+    return {'client_id': os.environ.get(CLIENT_ID_ENV, ''), 'client_secret': os.environ.get(CLIENT_SECRET_ENV, '')}
+
+
+def run_search_job(job: Dict[str, Any], job_store: JobStore, mention_store: MentionStore,
+                   credentials: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Run one queued search job
+
+    Args:
+        job: Job as returned by JobStore.claim_next. Its params hold the user
+            agent, `keywords` ({'plant': [...], 'vessel': [...]}), the
+            matching `entity_refs` ({'plant': {keyword: refs}, ...}) and the
+            search settings chosen in the app. Low-yield keywords have already
+            been pruned by the app; `pruning` describes what was skipped.
+            `local_subreddits` ({'plant': {keyword: [...]}}) routes keywords to
+            local subreddits searched in addition to `subreddits`.
+        job_store: Store to report progress to
+        mention_store: Store the mentions are written to
+        credentials: Reddit client_id and client_secret; must match the
+            job's `credentials_fingerprint`
+
+    Returns:
+        Result summary (mention counts, API usage, whether the run was cut short).
+        If the run fails, the summary so far is attached to the exception as
+        `partial_summary`.
+    """
+    job_id = job["id"]
+    params = job["params"]
+    # API usage accumulates over every attempt of the job, and earlier attempts count against the budget
+    previous = job["summary"] or {}
+    budget_usd = remaining_budget(job)
+    if budget_usd is not None:
+        budget_usd = max(0.0, budget_usd)
+
+    _check_credentials(params, credentials)
+
+    # Per-job connections to the mentions database, closed when the job ends
+    watermark_store = WatermarkStore(mention_store.db_path)
+    keyword_stats = KeywordStatsStore(mention_store.db_path)
+    try:
+        reddit_service = RedditService(
+            client_id=credentials["client_id"],
+            client_secret=credentials["client_secret"],
+            user_agent=params["user_agent"],
+            comment_cache_dir="cache/comments" if params.get("cache_comments_on_disk") else job_cache_dir(job_id),
+            watermark_store=watermark_store,
+            keyword_stats=keyword_stats,
+            api_budget=ApiBudget(
+                max_cost=budget_usd,
+                cost_per_1000_calls=params["cost_per_1000_calls"]
+            ),
+            praw_options=params.get("praw_options"),
+            comment_walker=CommentWalker(more_limit=params.get("more_comments_limit", 0))
+        )
+        return _run_searches(job, job_store, mention_store, reddit_service)
+    finally:
+        watermark_store.close()
+        keyword_stats.close()
+
+
+def run_stream_job(job: Dict[str, Any], job_store: JobStore, mention_store: MentionStore,
+                   credentials: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Run one queued live stream job (see RedditService.stream_mentions)
+
+    Args:
+        job: Job as returned by JobStore.claim_next. Its params hold `kind`
+            'stream', the user agent, `keywords` and `entity_refs` as for
+            run_search_job, `subreddits`, `include_comments`,
+            `duration_minutes` and the API budget settings.
+        job_store: Store to report progress to; a stop request ends the stream
+        mention_store: Store the mentions are written to as they are found
+        credentials: Reddit client_id and client_secret; must match the
+            job's `credentials_fingerprint`
+
+    Returns:
+        Result summary (mention counts, items scanned, API usage, whether the
+        stream was stopped or ran out of budget)
+    """
+    job_id = job["id"]
+    params = job["params"]
+    _check_credentials(params, credentials)
+    reddit_service = RedditService(
+        client_id=credentials["client_id"],
+        client_secret=credentials["client_secret"],
+        user_agent=params["user_agent"],
+        api_budget=ApiBudget(max_cost=params.get("budget_usd"), cost_per_1000_calls=params["cost_per_1000_calls"]),
+        praw_options=params.get("praw_options")
+    )
+    entity_refs = params.get("entity_refs")
+    minutes = params["duration_minutes"]
+    mentions_found = {entity_type: 0 for entity_type in params["keywords"]}
+
+    def sink(batch: List[Dict[str, Any]]) -> None:
+        mention_store.upsert_mentions(batch, entity_refs=entity_refs)
+        for mention in batch:
+            mentions_found[mention['entity_type']] = mentions_found.get(mention['entity_type'], 0) + 1
+
+    def on_progress(progress: float, message: str) -> None:
+        # Progress is counted in minutes streamed
+        job_store.update_progress(job_id, int(progress * minutes), minutes, message)
+        job_store.append_log(job_id, message)
+
+    job_store.update_progress(job_id, 0, minutes, "Connecting to Reddit API...")
+    stats = reddit_service.stream_mentions(
+        keyword_sets=params["keywords"],
+        subreddits=params["subreddits"],
+        sink=sink,
+        include_comments=params["include_comments"],
+        duration=minutes * 60,
+        should_stop=lambda: job_store.cancel_requested(job_id),
+        progress_callback=on_progress
+    )
+    job_store.append_log(job_id, reddit_service.api_budget.summary())
+    return {
+        'mentions_found': mentions_found,
+        'items_scanned': stats['items_scanned'],
+        'stream_errors': stats['stream_errors'],
+        'api_calls': reddit_service.api_budget.total_calls,
+        'api_cost': reddit_service.api_budget.cost,
+        'budget_exhausted': stats['budget_exhausted'],
+        'stopped': job_store.cancel_requested(job_id)
+    }
+
+
+def _check_credentials(params: Dict[str, Any], credentials: Dict[str, str]) -> None:
+    """Refuse to run a job with other credentials than the ones it was submitted with"""
+    if credentials_fingerprint(credentials) != params.get("credentials_fingerprint"):
+        raise ValueError("The job worker's Reddit credentials are missing or differ from the ones the job was "
+                         f"submitted with. Restart the worker with {CLIENT_ID_ENV} and {CLIENT_SECRET_ENV} set, "
+                         "then resume the job.")
+
+
+def _run_searches(job: Dict[str, Any], job_store: JobStore, mention_store: MentionStore,
+                  reddit_service: RedditService) -> Dict[str, Any]:
+    """Plan, run and checkpoint the searches of a job (see run_search_job)"""
+    job_id = job["id"]
+    params = job["params"]
+    previous = job["summary"] or {}
+
+    # Compile keywords into as few search calls as possible
+    plans = {
+        entity_type: reddit_service.plan_search(
+            keywords, params["subreddits"], combine_subreddits=params.get("combine_subreddits", False),
+            local_subreddits=params.get("local_subreddits", {}).get(entity_type), limit=params["limit"]
+        )
+        for entity_type, keywords in params["keywords"].items()
+    }
+    for entity_type, plan in plans.items():
+        job_store.append_log(job_id, f"{entity_type.title()}s: {plan.summary()}")
+    for entity_type, pruning in params.get("pruning", {}).items():
+        job_store.append_log(job_id, f"{entity_type.title()}s: {pruning}")
+
+    # Skip tasks finished by an earlier attempt and continue the others from their cursor
+    all_tasks = build_tasks(plans)
+    checkpoints = job_store.get_checkpoints(job_id)
+    tasks = []
+    for task in all_tasks:
+        checkpoint = checkpoints.get(task.key)
+        if checkpoint and checkpoint['done']:
+            continue
+        if checkpoint:
+            task.resume_state = checkpoint['cursor']
+        tasks.append(task)
+    completed = len(all_tasks) - len(tasks)
+    if checkpoints:
+        job_store.append_log(job_id, f"Resuming: {completed} of {len(all_tasks)} searches already done, "
+                                     f"{sum(1 for task in tasks if task.resume_state)} partly done")
+    job_store.update_progress(job_id, completed, len(all_tasks), "Connecting to Reddit API...")
+
+    entity_refs = params.get("entity_refs")
+    task_mentions: Dict[int, int] = {}
+    failed_searches = 0
+
+    def on_event(event):
+        # Runs after the event's mentions are stored, so a checkpoint never points past unsaved results
+        nonlocal completed, failed_searches
+        task = event.task
+        if not event.done:
+            job_store.checkpoint_task(job_id, task.key, task.entity_type, event.state, len(event.mentions))
+            task_mentions[task.index] = task_mentions.get(task.index, 0) + len(event.mentions)
+            return
+        if task.completed:
+            job_store.checkpoint_task(job_id, task.key, task.entity_type, None, 0, done=True)
+        elif task.error:
+            # Left at its checkpoint, so resuming the job retries it
+            failed_searches += 1
+            job_store.append_log(job_id, f"Search of {task.describe()} failed: {task.error}")
+        completed += 1
+        task_description = (f"Searched {task.describe()} ({task_mentions.pop(task.index, 0)} mentions) "
+                            f"- Step {completed} of {len(all_tasks)}")
+        job_store.update_progress(job_id, completed, len(all_tasks), task_description)
+        job_store.append_log(job_id, task_description)
+
+    # Mentions stream from the search workers to the store one submission at a time
+    executor = SearchExecutor(reddit_service.clone, max_workers=params.get("max_workers", 4))
+    events = executor.stream(
+        tasks,
+        should_stop=lambda: job_store.cancel_requested(job_id),
+        limit=params["limit"],
+        time_filter=params["time_filter"],
+        include_comments=params["include_comments"],
+        comments_limit=params["comments_limit"],
+        incremental=params.get("incremental", False),
+        full_rescan=params.get("full_rescan", False)
+    )
+
+    def summarize() -> Dict[str, Any]:
+        mentions_found = {entity_type: 0 for entity_type in plans}
+        for checkpoint in job_store.get_checkpoints(job_id).values():
+            entity_type = checkpoint['entity_type']
+            mentions_found[entity_type] = mentions_found.get(entity_type, 0) + checkpoint['mentions']
+        return {
+            'mentions_found': mentions_found,
+            'api_calls': previous.get('api_calls', 0) + reddit_service.api_budget.total_calls,
+            'api_cost': previous.get('api_cost', 0.0) + reddit_service.api_budget.cost,
+            'budget_exhausted': executor.budget_exhausted,
+            'stopped': executor.stopped,
+            'failed_searches': failed_searches
+        }
+
+    try:
+        drain(tap(store_mentions(events, mention_store, entity_refs=entity_refs), on_event))
+    except Exception as e:
+        # Keep what the attempt found and spent, for the failed job's summary and a resumed run's budget
+        e.partial_summary = summarize()
+        raise
+
+    job_store.append_log(job_id, reddit_service.comment_cache.summary())
+    job_store.append_log(job_id, reddit_service.comment_walker.summary())
+    job_store.append_log(job_id, reddit_service.rate_limiter.summary())
+    job_store.append_log(job_id, reddit_service.api_budget.summary())
+    if params.get("incremental"):
+        job_store.append_log(job_id, reddit_service.watermark_summary())
+
+    return summarize()
+
+
+class JobWorker:
+    """Claims queued jobs from a JobStore and runs them one at a time"""
+
+    def __init__(self, job_store: JobStore, mention_store: MentionStore, poll_interval: float = 2.0,
+                 credentials: Optional[Dict[str, str]] = None):
+        """
+        Initialize the worker
+
+        Args:
+            job_store: Queue to take jobs from
+            mention_store: Store the mentions are written to
+            poll_interval: Seconds between checks of an empty queue
+            credentials: Reddit client_id and client_secret (from the environment by default)
+        """
+        self.job_store = job_store
+        self.mention_store = mention_store
+        self.poll_interval = poll_interval
+        self.credentials = credentials or worker_credentials()
+        self.fingerprint = credentials_fingerprint(self.credentials)
+        self.pid = os.getpid()
+        self._stop = threading.Event()
+
+    def run_forever(self) -> None:
+        """Process jobs until stopped; returns at once if another worker runs these credentials' jobs"""
+        if not self.job_store.register_worker(self.pid, self.fingerprint):
+            print("Another job worker is already running for these credentials")
+            return
+
+        # Heartbeats come from their own thread so a long job doesn't look like a dead worker
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        print(f"Job worker {self.pid} waiting for jobs")
+        while not self._stop.is_set():
+            job = self.job_store.claim_next(self.fingerprint)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+
+    def run_job(self, job: Dict[str, Any]) -> None:
+        """Run one claimed job and record its outcome"""
+        job_id = job["id"]
+        print(f"Running job {job_id}")
+        self.job_store.append_log(job_id, "Job started")
+        try:
+            run = run_stream_job if job["params"].get("kind") == STREAM else run_search_job
+            summary = run(job, self.job_store, self.mention_store, self.credentials)
+            status = CANCELLED if summary['stopped'] else COMPLETED
+            self.job_store.append_log(job_id, f"Job {status}")
+            self.job_store.finish(job_id, status, summary=summary)
+        except Exception as e:
+            print(f"Error running job {job_id}: {str(e)}")
+            self.job_store.append_log(job_id, f"Error during Reddit search: {str(e)}")
+            # Keep the API usage of this and earlier attempts
+            self.job_store.finish(job_id, FAILED, summary=getattr(e, 'partial_summary', job["summary"]),
+                                  error=str(e))
+
+        if not is_resumable(self.job_store.get_job(job_id)):
+            shutil.rmtree(job_cache_dir(job_id), ignore_errors=True)
+
+    def stop(self) -> None:
+        """Stop after the current job"""
+        self._stop.set()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.job_store.heartbeat(self.pid, self.fingerprint)
+            except Exception as e:
+                print(f"Error recording worker heartbeat: {str(e)}")
+
+
+def ensure_worker_running(job_store: JobStore, mentions_db_path: str = DEFAULT_DB_PATH,
+                          credentials: Optional[Dict[str, str]] = None) -> bool:
+    """
+    Start a detached worker process for a set of credentials unless one is already alive
+
+    The worker runs in its own session, so it keeps going when the Streamlit
+    script reruns or the browser tab is closed. The Reddit credentials are
+    handed over in its environment and stay in its memory; the worker only
+    claims jobs submitted with them, so sessions with other credentials get
+    workers of their own.
+
+    Args:
+        job_store: Job queue the worker takes jobs from
+        mentions_db_path: Mentions database the worker writes to
+        credentials: Reddit client_id and client_secret for the worker (this
+            process's environment by default)
+
+    Returns:
+        True if a new worker process was started
+    """
+    credentials = credentials or worker_credentials()
+    if job_store.worker_alive(credentials_fingerprint(credentials)):
+        return False
+    log_dir = os.path.dirname(WORKER_LOG_PATH)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    env = dict(os.environ)
+    env[CLIENT_ID_ENV] = credentials['client_id']
+    env[CLIENT_SECRET_ENV] = credentials['client_secret']
+    with open(WORKER_LOG_PATH, "a") as log_file:
+        subprocess.Popen(
+            [sys.executable, "-u", os.path.abspath(__file__),
+             "--jobs-db", job_store.db_path, "--mentions-db", mentions_db_path],
+            stdout=log_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+            start_new_session=True, env=env
+        )
+    return True
+
+
+def job_cache_dir(job_id: int) -> str:
+    """Comment cache directory of a job"""
+    return os.path.join(JOB_CACHE_DIR, str(job_id))
+
+
+def remaining_budget(job: Dict[str, Any]) -> Optional[float]:
+    """Budget in USD left for a job's next attempt after what earlier attempts spent (None if unlimited)"""
+    budget_usd = job["params"].get("budget_usd")
+    if budget_usd is None:
+        return None
+    return budget_usd - (job["summary"] or {}).get('api_cost', 0.0)
+
+
+def is_resumable(job: Dict[str, Any]) -> bool:
+    """Whether a job stopped early and can continue from its checkpoint (streams have none)"""
+    if job["params"].get("kind") == STREAM:
+        return False
+    if job["status"] in RESUMABLE_STATES:
+        return True
+    summary = job["summary"] or {}
+    return job["status"] == COMPLETED and bool(summary.get('budget_exhausted') or summary.get('failed_searches'))
+
+
+def _now() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _job_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["params"] = json.loads(job["params"]) if job["params"] else {}
+    job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued Reddit search jobs")
+    parser.add_argument("--jobs-db", default=DEFAULT_JOBS_DB_PATH)
+    parser.add_argument("--mentions-db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    worker = JobWorker(JobStore(args.jobs_db), MentionStore(args.mentions_db), poll_interval=args.poll_interval)
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import List, Dict, Tuple, Iterable
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton for finding many keywords in a text in one pass
+
+    The automaton is built once from the full keyword set. Matching is case
+    insensitive and only whole words count, so "inca" matches "Inca's boat"
+    but not "incas" or "pincay".
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Build the automaton
+
+        Args:
+            keywords: Keywords to match (duplicates and blanks are ignored)
+        """
+        self.keywords: List[str] = []
+        # Trie nodes: child transitions, failure link and indexes of keywords ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        seen = set()
+        for keyword in keywords:
+            normalized = self._lower(keyword.strip()) if isinstance(keyword, str) else ""
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            self._add(normalized, len(self.keywords))
+            self.keywords.append(normalized)
+
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _add(self, keyword: str, index: int) -> None:
+        """Insert a keyword into the trie"""
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(index)
+
+    def _build_failure_links(self) -> None:
+        """Breadth-first pass computing failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Find every whole-word keyword occurrence in text
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of (keyword, start, end) tuples with offsets into the original
+            text, ordered by end offset
+        """
+        if not isinstance(text, str) or not self.keywords:
+            return []
+
+        lowered = self._lower(text)
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        length = len(lowered)
+        matches = []
+        node = 0
+        for position, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+            end = position + 1
+            if end < length and _is_word_char(lowered[end]):
+                continue
+            for index in output[node]:
+                keyword = keywords[index]
+                start = end - len(keyword)
+                if start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                matches.append((keyword, start, end))
+        return matches
+
+    def match(self, text: str) -> List[str]:
+        """
+        Return the distinct keywords found in text, in order of first appearance
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of matching keywords
+        """
+        return list(dict.fromkeys(keyword for keyword, _, _ in self.find_all(text)))
+
+    def _lower(self, text: str) -> str:
+        """Lowercase text without changing its length so offsets stay valid"""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        # A few characters (e.g. "İ") expand when lowercased; keep those as-is
+        return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(char: str) -> bool:
+    """Check whether a character is part of a word (letter, digit or underscore)"""
+    return char.isalnum() or char == "_"
@@ -0,0 +1,235 @@
+import datetime
+from array import array
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Union, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Columns whose values repeat across many mentions; stored once and referenced by code
+CATEGORICAL_COLUMNS = ('keyword', 'entity_type', 'title', 'author', 'permalink', 'source', 'subreddit',
+                       'keywords', 'entity_refs')
+
+# Order of the keys in the mention dicts and DataFrame columns. 'keywords' and 'entity_refs'
+# only come with stored mentions (see MentionStore.query_buffer)
+COLUMNS = ('id', 'keyword', 'entity_type', 'title', 'author', 'datetime',
+           'permalink', 'snippet', 'source', 'subreddit', 'keywords', 'entity_refs')
+
+MISSING = -1  # Code of a missing categorical value
+
+
+class _Categories:
+    """Distinct values of one categorical column, in order of first appearance"""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        """Code of a value, adding it if it is new"""
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class MentionBuffer:
+    """
+    Columnar, append-only store of mentions
+
+    Replaces a list of mention dicts. Repeated strings (keyword, title,
+    subreddit, permalink, ...) are stored once per buffer and each mention
+    keeps a 4-byte code per column; timestamps are kept as floats. Per
+    mention this takes a fraction of the memory of a ten-key dict.
+
+    Iterating, indexing or slicing yields ordinary mention dicts (the same
+    keys RedditService has always produced), so the buffer can be passed
+    wherever a list of mentions was expected. to_dataframe() builds a
+    DataFrame from the columns without going through the dicts.
+    """
+
+    def __init__(self, mentions: Iterable[Dict[str, Any]] = ()):
+        """
+        Initialize the buffer
+
+        Args:
+            mentions: Mention dicts or another MentionBuffer to start with
+        """
+        self._ids: List[str] = []
+        self._snippets: List[str] = []
+        self._created = array('d')
+        self._categories = {column: _Categories() for column in CATEGORICAL_COLUMNS}
+        self._codes = {column: array('i') for column in CATEGORICAL_COLUMNS}
+        self._exported = False  # A DataFrame view shares the timestamp array
+        self.extend(mentions)
+
+    def add(self, id: str, keyword: str, title: str, author: str, created_utc: float,  # noqa: A002
+            permalink: str, snippet: str, source: str, subreddit: str,
+            entity_type: Optional[str] = None, keywords: Optional[str] = None,
+            entity_refs: Optional[str] = None) -> None:
+        """Append one mention"""
+        if self._exported:
+            self._detach()
+        self._ids.append(id)
+        self._snippets.append(snippet)
+        self._created.append(created_utc)
+        values = {'keyword': keyword, 'entity_type': entity_type, 'title': title, 'author': author,
+                  'permalink': permalink, 'source': source, 'subreddit': subreddit,
+                  'keywords': keywords, 'entity_refs': entity_refs}
+        for column in CATEGORICAL_COLUMNS:
+            self._codes[column].append(self._categories[column].code(values[column]))
+
+    def append(self, mention: Dict[str, Any]) -> None:
+        """
+        Append one mention dict
+
+        The timestamp is taken from 'created_utc' if present, otherwise parsed
+        from the ISO 'datetime' value.
+        """
+        created_utc = mention.get('created_utc')
+        if created_utc is None:
+            created_utc = datetime.datetime.fromisoformat(mention['datetime']).timestamp()
+        self.add(mention['id'], mention['keyword'], mention.get('title'), mention.get('author'),
+                 created_utc, mention.get('permalink'), mention.get('snippet'), mention.get('source'),
+                 mention.get('subreddit'), mention.get('entity_type'), mention.get('keywords'),
+                 mention.get('entity_refs'))
+
+    def extend(self, mentions: Iterable[Dict[str, Any]]) -> None:
+        """Append mention dicts, or all rows of another buffer"""
+        if not isinstance(mentions, MentionBuffer):
+            for mention in mentions:
+                self.append(mention)
+            return
+        if self._exported:
+            self._detach()
+        self._ids.extend(mentions._ids)
+        self._snippets.extend(mentions._snippets)
+        self._created.extend(mentions._created)
+        for column in CATEGORICAL_COLUMNS:
+            # Translate the other buffer's codes into this buffer's
+            categories = self._categories[column]
+            remap = [categories.code(value) for value in mentions._categories[column].values]
+            self._codes[column].extend(
+                MISSING if code == MISSING else remap[code] for code in mentions._codes[column]
+            )
+
+    def fill_entity_type(self, entity_type: str) -> None:
+        """Set the entity type of mentions that don't have one yet"""
+        code = self._categories['entity_type'].code(entity_type)
+        codes = self._codes['entity_type']
+        for i, existing in enumerate(codes):
+            if existing == MISSING:
+                codes[i] = code
+
+    def clear(self) -> None:
+        """
+        Drop all mentions but keep the stored strings
+
+        Mentions added afterwards reuse the codes of strings seen before, so a
+        search handing out one submission's mentions at a time (as slices)
+        still stores each title, subreddit and keyword once.
+        """
+        self._ids = []
+        self._snippets = []
+        self._created = array('d')
+        self._codes = {column: array('i') for column in CATEGORICAL_COLUMNS}
+        self._exported = False
+
+    def keyword_counts(self) -> Dict[str, int]:
+        """Number of mentions per keyword, counted on the codes without building rows"""
+        values = self._categories['keyword'].values
+        counts: Dict[str, int] = {}
+        for code in self._codes['keyword']:
+            if code != MISSING:
+                counts[values[code]] = counts.get(values[code], 0) + 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self._ids)):
+            yield self._row(i)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "MentionBuffer"]:
+        if isinstance(index, slice):
+            sliced = MentionBuffer()
+            sliced._ids = self._ids[index]
+            sliced._snippets = self._snippets[index]
+            sliced._created = self._created[index]
+            # Slices share the category tables, which only ever grow
+            sliced._categories = self._categories
+            sliced._codes = {column: codes[index] for column, codes in self._codes.items()}
+            return sliced
+        if index < 0:
+            index += len(self._ids)
+        return self._row(index)
+
+    def __add__(self, other: Iterable[Dict[str, Any]]) -> "MentionBuffer":
+        combined = MentionBuffer(self)
+        combined.extend(other)
+        return combined
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        """Materialize one mention as a dict"""
+        mention = {}
+        for column in COLUMNS:
+            if column == 'id':
+                mention['id'] = self._ids[i]
+            elif column == 'datetime':
+                mention['datetime'] = datetime.datetime.fromtimestamp(self._created[i]).isoformat()
+            elif column == 'snippet':
+                mention['snippet'] = self._snippets[i]
+            else:
+                code = self._codes[column][i]
+                if code != MISSING:  # Mentions without an entity type leave the key out
+                    mention[column] = self._categories[column].values[code]
+        return mention
+
+    def _detach(self) -> None:
+        """Copy the timestamp array shared with a DataFrame view before changing it"""
+        self._created = array('d', self._created)
+        self._exported = False
+
+    def to_dataframe(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame of the buffer's mentions
+
+        Categorical columns are built straight from the code arrays, so each
+        distinct string is held once (pandas keeps the codes in the smallest
+        integer type that fits). 'created_utc' wraps the timestamp array
+        without copying; the buffer copies the array before its next change
+        so the view stays valid. 'datetime' holds the same local ISO strings
+        as the mention dicts.
+
+        Args:
+            columns: Columns to include, in order (COLUMNS plus 'created_utc' by default)
+        """
+        columns = list(columns) if columns is not None else list(COLUMNS) + ['created_utc']
+        created = np.frombuffer(self._created, dtype=np.float64)
+        self._exported = True
+        data: Dict[str, Any] = {}
+        for column in columns:
+            if column == 'id':
+                data[column] = self._ids
+            elif column == 'snippet':
+                data[column] = self._snippets
+            elif column == 'created_utc':
+                data[column] = created
+            elif column == 'datetime':
+                data[column] = [datetime.datetime.fromtimestamp(ts).isoformat() for ts in created]
+            else:
+                data[column] = pd.Categorical.from_codes(
+                    np.frombuffer(self._codes[column], dtype=np.int32),
+                    categories=pd.Index(self._categories[column].values, dtype=object),
+                    validate=False
+                )
+        return pd.DataFrame(data, columns=columns, copy=False)
@@ -0,0 +1,95 @@
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from data_processor import encode_refs, split_refs
+
+# Separates the matched keywords of a merged mention (CSV friendly, unlike a JSON list)
+KEYWORD_SEPARATOR = "; "
+
+
+def split_keywords(keywords: Optional[str]) -> List[str]:
+    """Parse the keywords column of a merged mention"""
+    return keywords.split(KEYWORD_SEPARATOR) if keywords else []
+
+
+def snippet_score(snippet: Optional[str], keywords: Iterable[str]) -> Tuple[int, int]:
+    """
+    Rank a snippet for a set of matched keywords
+
+    Snippets showing more of the keywords win; ties go to the one showing
+    the longest keyword, so the snippet of a full name beats the snippet of
+    one of its tokens.
+    """
+    text = (snippet or "").lower()
+    shown = [keyword for keyword in keywords if keyword.lower() in text]
+    return len(shown), max((len(keyword) for keyword in shown), default=0)
+
+
+class MentionMerger:
+    """
+    Collapses keyword hits into one record per (entity type, reddit id)
+
+    Keyword extraction adds both full names and their tokens, so one post or
+    comment is often matched by several keywords. Hits are folded into a
+    dict keyed by (entity type, id) as they arrive: the merged record keeps
+    the matched keywords, the union of their entity refs and the best
+    snippet (see snippet_score), and its 'keyword' is the longest of the
+    keywords. Records can be merged again with later hits of the same id.
+    Refs are only unioned within one dataset; refs into a different dataset
+    (another CSV upload) replace the record's refs, the newer hit winning.
+    """
+
+    def __init__(self):
+        self._index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, mention: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fold a mention (or an already merged record) into the record of its id
+
+        Args:
+            mention: Mention dict with 'keyword', or merged record with 'keywords'
+
+        Returns:
+            The merged record
+        """
+        keywords = split_keywords(mention.get('keywords')) or [mention['keyword']]
+        dataset, refs = split_refs(mention.get('entity_refs'))
+        key = (mention['entity_type'], mention['id'])
+        record = self._index.get(key)
+        if record is None:
+            record = dict(mention)
+            record['_keywords'] = dict.fromkeys(keywords)
+            record['_dataset'], record['_refs'] = dataset, dict.fromkeys(refs)
+            self._index[key] = record
+        else:
+            record['_keywords'].update(dict.fromkeys(keywords))
+            if dataset == record['_dataset']:
+                record['_refs'].update(dict.fromkeys(refs))
+            elif refs:
+                record['_dataset'], record['_refs'] = dataset, dict.fromkeys(refs)
+            # The newer hit has the latest post details
+            for column in ('title', 'author', 'datetime', 'permalink', 'source', 'subreddit'):
+                if mention.get(column) is not None:
+                    record[column] = mention[column]
+            if snippet_score(mention.get('snippet'), record['_keywords']) > \
+                    snippet_score(record.get('snippet'), record['_keywords']):
+                record['snippet'] = mention.get('snippet')
+        return record
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Merged records with 'keyword', 'keywords' and 'entity_refs' filled in"""
+        merged = []
+        for record in self._index.values():
+            keywords = list(record['_keywords'])
+            row = {column: value for column, value in record.items() if not column.startswith('_')}
+            row['keyword'] = max(keywords, key=len)
+            row['keywords'] = KEYWORD_SEPARATOR.join(keywords)
+            row['entity_refs'] = encode_refs(sorted(record['_refs']), record['_dataset']) or None
+            merged.append(row)
+        return merged
+
+    def clear(self) -> None:
+        """Forget all records"""
+        self._index.clear()
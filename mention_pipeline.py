@@ -0,0 +1,152 @@
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from keyword_matcher import KeywordMatcher
+from mention_store import MentionStore
+from search_executor import SearchEvent
+from snippet_extractor import SnippetExtractor
+
+# Generator stages for streamed searches, in two layers. Within one search
+# request, RedditService._make_api_request runs each submission through
+#
+#     items = fetch_submissions(listing, watermark, on_watermark)
+#     items = fetch_comments(items, get_comments)
+#     items = match_items(items, matcher)
+#     items = build_mentions(items, snippet_extractor)
+#
+# and hands each item's mentions on as it checkpoints. Across requests, the
+# SearchEvents carrying those mentions flow through
+#
+#     events = executor.stream(tasks, **search_kwargs)
+#     events = store_mentions(events, mention_store)
+#     events = tap(events, on_event)
+#     counts = drain(events)
+#
+# so only one submission's comments and the events buffered by
+# SearchExecutor.stream are in memory at once.
+
+
+class SubmissionItem:
+    """A search result on its way through the submission stages"""
+    __slots__ = ('submission', 'comments', 'title_hits', 'body_hits', 'comment_hits', 'mentions')
+
+    def __init__(self, submission):
+        self.submission = submission
+        self.comments: List[Dict[str, Any]] = []
+        self.title_hits: List[Tuple[str, int, int]] = []
+        self.body_hits: List[Tuple[str, int, int]] = []
+        # (comment, hits) of the comments that mention a keyword
+        self.comment_hits: List[Tuple[Dict[str, Any], List[Tuple[str, int, int]]]] = []
+        self.mentions: List[Dict[str, Any]] = []
+
+
+def fetch_submissions(listing: Iterable[Any], watermark: Optional[float] = None,
+                      on_watermark: Optional[Callable[[Any], Any]] = None) -> Iterator[SubmissionItem]:
+    """
+    Stage: wrap each submission of a search listing
+
+    Args:
+        listing: Submissions, newest first when a watermark is given
+        watermark: Stop at the first submission created at or before this timestamp
+        on_watermark: Called with that submission when the listing stops there
+    """
+    for submission in listing:
+        if watermark is not None and submission.created_utc <= watermark:
+            # Everything from here on was processed by an earlier run
+            if on_watermark:
+                on_watermark(submission)
+            return
+        yield SubmissionItem(submission)
+
+
+def fetch_comments(items: Iterable[SubmissionItem],
+                   get_comments: Callable[[Any], List[Dict[str, Any]]]) -> Iterator[SubmissionItem]:
+    """
+    Stage: attach each submission's comments
+
+    Args:
+        items: Items from fetch_submissions
+        get_comments: Returns the comment dicts (id, body, author, created_utc) of a submission
+    """
+    for item in items:
+        item.comments = get_comments(item.submission)
+        yield item
+
+
+def match_items(items: Iterable[SubmissionItem], matcher: KeywordMatcher) -> Iterator[SubmissionItem]:
+    """Stage: find the keyword hits in each submission's title, body and comments"""
+    for item in items:
+        item.title_hits = matcher.find_all(item.submission.title)
+        item.body_hits = matcher.find_all(getattr(item.submission, 'selftext', ''))
+        item.comment_hits = [(comment, hits) for comment in item.comments
+                             for hits in [matcher.find_all(comment['body'])] if hits]
+        yield item
+
+
+def build_mentions(items: Iterable[SubmissionItem], extractor: SnippetExtractor) -> Iterator[SubmissionItem]:
+    """
+    Stage: turn each item's title and comment hits into mention dicts
+
+    Mentions carry 'created_utc' rather than an ISO 'datetime', ready for
+    MentionBuffer.append. Body hits only count towards the yield; the post
+    mention is made for title hits.
+    """
+    for item in items:
+        submission = item.submission
+        subreddit = submission.subreddit.display_name
+        mentions = [
+            {'id': submission.id, 'keyword': keyword, 'title': submission.title, 'author': str(submission.author),
+             'created_utc': submission.created_utc, 'permalink': submission.permalink, 'snippet': snippet,
+             'source': 'post', 'subreddit': subreddit}
+            for keyword, snippet in extractor.snippets_by_keyword(submission.title, item.title_hits).items()
+        ]
+        for comment, hits in item.comment_hits:
+            mentions.extend(
+                {'id': comment['id'], 'keyword': keyword, 'title': submission.title, 'author': comment['author'],
+                 'created_utc': comment['created_utc'], 'permalink': submission.permalink, 'snippet': snippet,
+                 'source': 'comment', 'subreddit': subreddit}
+                for keyword, snippet in extractor.snippets_by_keyword(comment['body'], hits).items()
+            )
+        item.mentions = mentions
+        yield item
+
+
+def store_mentions(events: Iterable[SearchEvent], mention_store: MentionStore,
+                   entity_refs: Optional[Dict[str, Dict[str, str]]] = None) -> Iterator[SearchEvent]:
+    """
+    Stage: write each event's mentions to the store before passing the event on
+
+    The store folds each batch into its merged rows (one per reddit id with
+    all matched keywords) as it is written, so hits are deduplicated as they
+    stream in rather than after the run.
+
+    Args:
+        events: SearchEvents from SearchExecutor.stream or an earlier stage
+        mention_store: Store to upsert the mentions into
+        entity_refs: Per entity type, keyword to encoded entity refs (see MentionStore.upsert_mentions)
+    """
+    for event in events:
+        if event.mentions:
+            mention_store.upsert_mentions(event.mentions, entity_type=event.task.entity_type,
+                                          entity_refs=entity_refs)
+        yield event
+
+
+def tap(events: Iterable[SearchEvent], callback: Callable[[SearchEvent], Any]) -> Iterator[SearchEvent]:
+    """Stage: call `callback` with every event (for checkpoints and progress) and pass it on"""
+    for event in events:
+        callback(event)
+        yield event
+
+
+def drain(events: Iterable[SearchEvent]) -> Dict[str, int]:
+    """
+    Run a pipeline to the end
+
+    Returns:
+        Number of mentions that reached the end of the pipeline per entity type
+    """
+    counts: Dict[str, int] = {}
+    for event in events:
+        entity_type = event.task.entity_type
+        counts[entity_type] = counts.get(entity_type, 0) + len(event.mentions)
+    return counts
@@ -0,0 +1,542 @@
+import datetime
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from mention_buffer import MentionBuffer
+from mention_merger import MentionMerger
+
+DEFAULT_DB_PATH = "data/mentions.db"
+
+# Columns stored for each mention, in insert order
+MENTION_COLUMNS = [
+    'id', 'keyword', 'entity_type', 'title', 'author', 'datetime',
+    'permalink', 'snippet', 'source', 'subreddit', 'entity_refs'
+]
+
+# Columns of a merged mention: one row per reddit id and entity type with every matched keyword
+MERGED_COLUMNS = [
+    'id', 'keyword', 'keywords', 'entity_type', 'title', 'author', 'datetime',
+    'permalink', 'snippet', 'source', 'subreddit', 'entity_refs'
+]
+
+# Columns the Results tab may filter on
+FILTER_COLUMNS = {'subreddit', 'keyword', 'source'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mentions (
+    id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    title TEXT,
+    author TEXT,
+    datetime TEXT,
+    permalink TEXT,
+    snippet TEXT,
+    source TEXT,
+    subreddit TEXT,
+    entity_refs TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (id, keyword, entity_type)
+);
+CREATE INDEX IF NOT EXISTS idx_mentions_subreddit ON mentions (entity_type, subreddit, datetime);
+CREATE INDEX IF NOT EXISTS idx_mentions_keyword ON mentions (entity_type, keyword, datetime);
+CREATE INDEX IF NOT EXISTS idx_mentions_datetime ON mentions (entity_type, datetime);
+CREATE INDEX IF NOT EXISTS idx_mentions_last_seen ON mentions (entity_type, last_seen);
+"""
+
+MERGED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS merged_mentions (
+    id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    title TEXT,
+    author TEXT,
+    datetime TEXT,
+    permalink TEXT,
+    snippet TEXT,
+    source TEXT,
+    subreddit TEXT,
+    entity_refs TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (entity_type, id)
+);
+CREATE INDEX IF NOT EXISTS idx_merged_subreddit ON merged_mentions (entity_type, subreddit, datetime);
+CREATE INDEX IF NOT EXISTS idx_merged_datetime ON merged_mentions (entity_type, datetime);
+"""
+
+WATERMARK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    subreddit TEXT NOT NULL,
+    query TEXT NOT NULL,
+    created_utc REAL NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (subreddit, query)
+);
+"""
+
+KEYWORD_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keyword_stats (
+    keyword TEXT PRIMARY KEY,
+    searches INTEGER NOT NULL,
+    calls REAL NOT NULL,
+    raw_hits REAL NOT NULL,
+    retained_hits INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+class MentionStore:
+    """
+    SQLite-backed store for Reddit mentions
+
+    Mentions are keyed on (reddit id, keyword, entity type), so rerunning a
+    search updates existing rows instead of adding duplicates. Every write
+    also folds the hits into merged_mentions, one row per reddit id and
+    entity type listing all matched keywords (see MentionMerger). The
+    database runs in WAL mode so the Results tab can read while a search is
+    writing.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create if needed) the mention database
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was created"""
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(mentions)")}
+        if 'entity_refs' not in existing:
+            with self._conn:
+                self._conn.execute("ALTER TABLE mentions ADD COLUMN entity_refs TEXT")
+        has_merged = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'merged_mentions'"
+        ).fetchone()
+        self._conn.executescript(MERGED_SCHEMA)
+        if not has_merged:
+            self.rebuild_merged()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    def upsert_mentions(self, mentions: Iterable[Dict[str, Any]], entity_type: Optional[str] = None,
+                        batch_size: int = 500,
+                        entity_refs: Optional[Dict[str, Dict[str, str]]] = None) -> int:
+        """
+        Insert or update mentions in batched transactions
+
+        Args:
+            mentions: Mention dicts as produced by RedditService
+            entity_type: Entity type for mentions that don't carry one
+            batch_size: Number of rows written per transaction
+            entity_refs: Encoded EntityIndex refs per entity type and keyword, attached to
+                mentions that don't carry their own
+
+        Returns:
+            Number of mentions written
+        """
+        now = datetime.datetime.now().isoformat()
+        # A search without a loaded CSV keeps the earlier refs; they name the dataset they point
+        # into, so EntityIndex ignores them once a different CSV is loaded
+        sql = f"""
+            INSERT INTO mentions ({', '.join(MENTION_COLUMNS)}, first_seen, last_seen)
+            VALUES ({', '.join('?' * len(MENTION_COLUMNS))}, ?, ?)
+            ON CONFLICT (id, keyword, entity_type) DO UPDATE SET
+                title = excluded.title,
+                author = excluded.author,
+                datetime = excluded.datetime,
+                permalink = excluded.permalink,
+                snippet = excluded.snippet,
+                source = excluded.source,
+                subreddit = excluded.subreddit,
+                entity_refs = COALESCE(excluded.entity_refs, mentions.entity_refs),
+                last_seen = excluded.last_seen
+        """
+
+        written = 0
+        batch = []
+        for mention in mentions:
+            row = dict(mention)
+            row.setdefault('entity_type', entity_type or 'general')
+            if entity_refs and not row.get('entity_refs'):
+                row['entity_refs'] = entity_refs.get(row['entity_type'], {}).get(row['keyword'])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written += self._write_batch(sql, batch, now)
+                batch = []
+        if batch:
+            written += self._write_batch(sql, batch, now)
+        return written
+
+    def _write_batch(self, sql: str, batch: List[Dict[str, Any]], now: str) -> int:
+        """Write one batch of mentions and fold them into their merged rows, in a single transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(sql, [tuple(row.get(column) for column in MENTION_COLUMNS) + (now, now)
+                                         for row in batch])
+            self._merge(batch, now)
+        return len(batch)
+
+    def _merge(self, mentions: List[Dict[str, Any]], now: str) -> None:
+        """Fold mentions into merged_mentions, starting from the stored rows of their ids (lock held)"""
+        merger = MentionMerger()
+        ids_by_type: Dict[str, set] = {}
+        for mention in mentions:
+            ids_by_type.setdefault(mention['entity_type'], set()).add(mention['id'])
+        for entity_type, ids in ids_by_type.items():
+            ids = list(ids)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                for row in self._conn.execute(
+                        f"SELECT {', '.join(MERGED_COLUMNS)} FROM merged_mentions "
+                        f"WHERE entity_type = ? AND id IN ({', '.join('?' * len(chunk))})",
+                        [entity_type] + chunk):
+                    merger.add(dict(row))
+        for mention in mentions:
+            merger.add(mention)
+        self._write_merged(merger.records(), now)
+
+    def _write_merged(self, records: List[Dict[str, Any]], now: str) -> None:
+        """Insert or replace merged rows, keeping their first_seen (lock held)"""
+        self._conn.executemany(
+            f"""
+            INSERT INTO merged_mentions ({', '.join(MERGED_COLUMNS)}, first_seen, last_seen)
+            VALUES ({', '.join('?' * len(MERGED_COLUMNS))}, ?, ?)
+            ON CONFLICT (entity_type, id) DO UPDATE SET
+                {', '.join(f"{column} = excluded.{column}" for column in MERGED_COLUMNS
+                           if column not in ('id', 'entity_type'))},
+                last_seen = excluded.last_seen
+            """,
+            [tuple(record.get(column) for column in MERGED_COLUMNS) + (now, now) for record in records]
+        )
+
+    def rebuild_merged(self, batch_size: int = 500) -> None:
+        """
+        Recreate merged_mentions from the mention rows
+
+        Rows are read ordered by (entity type, id), so each id is merged as
+        soon as its rows have been read and memory stays bounded.
+        """
+        now = datetime.datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM merged_mentions")
+            merger = MentionMerger()
+            last_key = None
+            for row in self._conn.execute(
+                    f"SELECT {', '.join(MENTION_COLUMNS)} FROM mentions ORDER BY entity_type, id"):
+                key = (row['entity_type'], row['id'])
+                if key != last_key and len(merger) >= batch_size:
+                    self._write_merged(merger.records(), now)
+                    merger.clear()
+                merger.add(dict(row))
+                last_key = key
+            if len(merger):
+                self._write_merged(merger.records(), now)
+
+    def query_mentions(self, entity_type: str, subreddit: Optional[str] = None,
+                       keyword: Optional[str] = None, since: Optional[str] = None,
+                       until: Optional[str] = None, limit: Optional[int] = None,
+                       offset: int = 0, merged: bool = False) -> List[Dict[str, Any]]:
+        """
+        Fetch mentions matching the given filters, newest first
+
+        Args:
+            entity_type: Entity type to fetch (plant, vessel, ...)
+            subreddit: Only mentions from this subreddit
+            keyword: Only mentions of this keyword
+            since: Only mentions at or after this ISO datetime
+            until: Only mentions before this ISO datetime
+            limit: Maximum number of rows to return
+            offset: Number of rows to skip
+            merged: Return one merged row per reddit id (MERGED_COLUMNS) instead of one per keyword
+
+        Returns:
+            List of mention dicts
+        """
+        where, params = self._where(entity_type, subreddit, keyword, since, until, merged)
+        if merged:
+            sql = f"SELECT {', '.join(MERGED_COLUMNS)} FROM merged_mentions WHERE {where} ORDER BY datetime DESC, id"
+        else:
+            sql = f"SELECT {', '.join(MENTION_COLUMNS)} FROM mentions WHERE {where} ORDER BY datetime DESC, id, keyword"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_buffer(self, entity_type: str, subreddit: Optional[str] = None,
+                     keyword: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, merged: bool = False,
+                     batch_size: int = 1000) -> MentionBuffer:
+        """
+        Mentions matching the filters as a MentionBuffer, newest first
+
+        Rows are read in batches straight into the buffer's columns, so a full
+        export never holds every row as a dict. Takes the same filters as
+        query_mentions.
+        """
+        where, params = self._where(entity_type, subreddit, keyword, since, until, merged)
+        if merged:
+            sql = f"SELECT {', '.join(MERGED_COLUMNS)} FROM merged_mentions WHERE {where} ORDER BY datetime DESC, id"
+        else:
+            sql = f"SELECT {', '.join(MENTION_COLUMNS)} FROM mentions WHERE {where} ORDER BY datetime DESC, id, keyword"
+        buffer = MentionBuffer()
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    buffer.append(dict(row))
+        return buffer
+
+    def count_mentions(self, entity_type: str, subreddit: Optional[str] = None,
+                       keyword: Optional[str] = None, since: Optional[str] = None,
+                       until: Optional[str] = None, merged: bool = False) -> int:
+        """Count mentions matching the given filters (distinct reddit ids with `merged`)"""
+        where, params = self._where(entity_type, subreddit, keyword, since, until, merged)
+        table = "merged_mentions" if merged else "mentions"
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params).fetchone()[0]
+
+    def mention_entity_refs(self, entity_type: str, subreddit: Optional[str] = None,
+                            keyword: Optional[str] = None, since: Optional[str] = None,
+                            until: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        (reddit id, encoded entity refs) of the mentions matching the filters
+
+        Feeds EntityIndex.group_mentions without loading the full mention rows.
+        The refs may point into an earlier dataset; group_mentions skips those.
+        """
+        where, params = self._where(entity_type, subreddit, keyword, since, until)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, entity_refs FROM mentions WHERE {where} AND entity_refs IS NOT NULL", params
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def result_version(self, entity_type: str) -> str:
+        """
+        Token that changes whenever mentions of an entity type are added or updated
+
+        Lets callers cache work derived from the stored mentions (such as CSV
+        exports) until the underlying rows change.
+        """
+        with self._lock:
+            count, last_seen = self._conn.execute(
+                "SELECT COUNT(*), MAX(last_seen) FROM mentions WHERE entity_type = ?", (entity_type,)
+            ).fetchone()
+        return f"{count}:{last_seen}"
+
+    def distinct_values(self, entity_type: str, column: str) -> List[str]:
+        """
+        List the distinct values of a filter column for an entity type
+
+        Args:
+            entity_type: Entity type to look at
+            column: One of FILTER_COLUMNS
+
+        Returns:
+            Sorted list of values
+        """
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot list values of column: {column}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT {column} FROM mentions WHERE entity_type = ? AND {column} IS NOT NULL ORDER BY {column}",
+                (entity_type,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _where(self, entity_type: str, subreddit: Optional[str], keyword: Optional[str],
+               since: Optional[str], until: Optional[str], merged: bool = False) -> Tuple[str, list]:
+        """Build the WHERE clause and parameters for the common filters"""
+        clauses = ["entity_type = ?"]
+        params: list = [entity_type]
+        if subreddit:
+            clauses.append("subreddit = ?")
+            params.append(subreddit)
+        if keyword and merged:
+            # Merged rows list several keywords; look the keyword up in the indexed mention rows
+            clauses.append("id IN (SELECT id FROM mentions WHERE entity_type = ? AND keyword = ?)")
+            params += [entity_type, keyword]
+        elif keyword:
+            clauses.append("keyword = ?")
+            params.append(keyword)
+        if since:
+            clauses.append("datetime >= ?")
+            params.append(since)
+        if until:
+            clauses.append("datetime < ?")
+            params.append(until)
+        return " AND ".join(clauses), params
+
+
+class WatermarkStore:
+    """
+    Newest post timestamp seen per (subreddit, query) pair
+
+    Lets incremental searches stop paginating once they reach content that
+    was already processed by an earlier run. Stored alongside the mentions in
+    the same SQLite database.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create if needed) the watermark table
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(WATERMARK_SCHEMA)
+        self.pages_skipped = 0  # Listing pages not fetched thanks to watermarks, this session
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    def get(self, subreddit: str, query: str) -> Optional[float]:
+        """
+        Look up the watermark for a subreddit and query
+
+        Returns:
+            Newest created_utc seen by a previous run, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_utc FROM watermarks WHERE subreddit = ? AND query = ?",
+                (subreddit, query)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, subreddit: str, query: str, created_utc: float) -> None:
+        """Record the newest created_utc seen, never moving a watermark backwards"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO watermarks (subreddit, query, created_utc, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (subreddit, query) DO UPDATE SET
+                    created_utc = MAX(watermarks.created_utc, excluded.created_utc),
+                    updated_at = excluded.updated_at
+                """,
+                (subreddit, query, created_utc, datetime.datetime.now().isoformat())
+            )
+
+    def record_skipped_pages(self, pages: int) -> None:
+        """Count listing pages an incremental search did not need to fetch"""
+        with self._lock:
+            self.pages_skipped += pages
+
+    def summary(self) -> str:
+        """Human readable watermark savings for the search log"""
+        return f"Watermarks: skipped {self.pages_skipped} listing pages already processed by earlier runs"
+
+
+class KeywordStatsStore:
+    """
+    Search yield per keyword, accumulated across runs
+
+    For every search request RedditService records, per keyword it covered,
+    its share of the API calls spent, the posts Reddit returned for it (raw
+    hits) and the mentions kept after local matching (retained hits). The
+    query planner uses these to rank and prune keywords. Stored alongside the
+    mentions in the same SQLite database.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create if needed) the keyword stats table
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(KEYWORD_STATS_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    def record(self, stats: Dict[str, Dict[str, float]]) -> None:
+        """
+        Add the outcome of one search request to the running totals
+
+        Args:
+            stats: Keyword to {'calls', 'raw_hits', 'retained_hits'} for the request
+        """
+        now = datetime.datetime.now().isoformat()
+        rows = [(keyword, values['calls'], values['raw_hits'], values['retained_hits'], now)
+                for keyword, values in stats.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO keyword_stats (keyword, searches, calls, raw_hits, retained_hits, updated_at)
+                VALUES (?, 1, ?, ?, ?, ?)
+                ON CONFLICT (keyword) DO UPDATE SET
+                    searches = keyword_stats.searches + 1,
+                    calls = keyword_stats.calls + excluded.calls,
+                    raw_hits = keyword_stats.raw_hits + excluded.raw_hits,
+                    retained_hits = keyword_stats.retained_hits + excluded.retained_hits,
+                    updated_at = excluded.updated_at
+                """,
+                rows
+            )
+
+    def get(self, keywords: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Accumulated stats per keyword
+
+        Args:
+            keywords: Only return these keywords (all recorded keywords by default)
+
+        Returns:
+            Keyword to {'searches', 'calls', 'raw_hits', 'retained_hits'}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT keyword, searches, calls, raw_hits, retained_hits FROM keyword_stats"
+            ).fetchall()
+        wanted = set(keywords) if keywords is not None else None
+        return {
+            row['keyword']: {'searches': row['searches'], 'calls': row['calls'],
+                             'raw_hits': row['raw_hits'], 'retained_hits': row['retained_hits']}
+            for row in rows if wanted is None or row['keyword'] in wanted
+        }
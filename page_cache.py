@@ -0,0 +1,195 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+DEFAULT_PAGE_CACHE_DIR = "cache/pages"
+DEFAULT_PAGE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_PAGE_CACHE_BYTES = 200 * 1024 * 1024
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_content ON pages (content_hash);
+CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access);
+CREATE INDEX IF NOT EXISTS idx_pages_fetched_at ON pages (fetched_at);
+"""
+
+
+class PageCache:
+    """
+    Content-addressed disk cache of extracted page text
+
+    Texts are stored once under objects/<sha256 of the text>, so pages with
+    identical content share a file; a small SQLite index maps each URL to its
+    content hash and fetch time. Entries older than the TTL are misses, and
+    once the stored texts exceed max_bytes the least recently used URLs are
+    evicted (their files too, when no other URL shares them). Safe to share
+    between threads.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_PAGE_CACHE_DIR, ttl_seconds: float = DEFAULT_PAGE_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_PAGE_CACHE_BYTES):
+        """
+        Open (and create if needed) the cache
+
+        Args:
+            cache_dir: Directory holding the index and the text objects
+            ttl_seconds: Age after which a cached page is fetched again
+            max_bytes: Total size of the stored texts before eviction starts
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(INDEX_SCHEMA)
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM pages)"
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        """Close the index"""
+        self._conn.close()
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Look up the cached text of a URL
+
+        Returns:
+            The text, or None if the URL is not cached or its entry expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, url))
+        text = self._read_object(row[0])
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return text
+
+    def put(self, url: str, text: str) -> None:
+        """
+        Store the extracted text of a URL
+
+        Args:
+            url: Page URL
+            text: Extracted text content
+        """
+        data = text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write to a temporary file first so a crash never leaves a truncated object
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error caching page {url}: {str(e)}")
+            return
+
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                previous = self._conn.execute("SELECT content_hash, size FROM pages WHERE url = ?", (url,)).fetchone()
+                stored = self._conn.execute(
+                    "SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)
+                ).fetchone()
+                if not stored:
+                    self._total_bytes += len(data)
+                self._conn.execute(
+                    """
+                    INSERT INTO pages (url, content_hash, size, fetched_at, last_access) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        content_hash = excluded.content_hash,
+                        size = excluded.size,
+                        fetched_at = excluded.fetched_at,
+                        last_access = excluded.last_access
+                    """,
+                    (url, content_hash, len(data), now, now)
+                )
+            if previous and previous[0] != content_hash:
+                self._drop_object_if_unused(previous[0], previous[1])
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of cached URLs, distinct texts and bytes stored"""
+        with self._lock:
+            urls, objects = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT content_hash) FROM pages"
+            ).fetchone()
+            return {'urls': urls, 'objects': objects, 'bytes': self._total_bytes}
+
+    def summary(self) -> str:
+        """Human readable hit/miss counts"""
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"Page cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate)"
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes (lock held)"""
+        with self._conn:
+            expired = self._conn.execute(
+                "SELECT url, content_hash, size FROM pages WHERE fetched_at < ?", (time.time() - self.ttl_seconds,)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM pages WHERE url = ?", [(row[0],) for row in expired])
+        for content_hash, size in {(row[1], row[2]) for row in expired}:
+            self._drop_object_if_unused(content_hash, size)
+
+        if self._total_bytes <= self.max_bytes:
+            return
+        for url, content_hash, size in self._conn.execute(
+                "SELECT url, content_hash, size FROM pages ORDER BY last_access").fetchall():
+            with self._conn:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._drop_object_if_unused(content_hash, size)
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def _drop_object_if_unused(self, content_hash: str, size: int) -> None:
+        """Delete a text object no URL refers to any more (lock held)"""
+        in_use = self._conn.execute("SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone()
+        if in_use:
+            return
+        self._total_bytes -= size
+        try:
+            os.remove(self._object_path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def _object_path(self, content_hash: str) -> str:
+        """Path of the file holding a text, fanned out by the first two hex digits"""
+        return os.path.join(self.cache_dir, "objects", content_hash[:2], content_hash)
+
+    def _read_object(self, content_hash: str) -> Optional[str]:
+        """Load a text object if present"""
+        try:
+            with open(self._object_path(content_hash), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached page {content_hash}: {str(e)}")
+            return None
@@ -0,0 +1,394 @@
+from typing import List, Dict, Tuple, Optional, Iterable, Set
+
+# Reddit rejects (or silently truncates) search queries longer than this
+REDDIT_MAX_QUERY_LENGTH = 512
+
+# Reddit stops paginating a listing after this many results
+REDDIT_MAX_SEARCH_RESULTS = 1000
+
+# Terms OR'd into one query share its results, so each added term lowers the others' share
+MAX_TERMS_PER_QUERY = 10
+
+# Keep combined "sub1+sub2+..." names well inside Reddit's URL length limits
+MAX_MULTIREDDIT_LENGTH = 500
+MAX_SUBREDDITS_PER_MULTIREDDIT = 50
+
+# API calls a keyword must have been charged for before its yield is trusted
+MIN_CALLS_FOR_YIELD = 5.0
+
+
+def keyword_yield(stats: Optional[Dict[str, float]]) -> Optional[float]:
+    """
+    Retained mentions per API call of a keyword
+
+    Args:
+        stats: Accumulated stats as returned by KeywordStatsStore.get
+
+    Returns:
+        The yield, or None when the keyword has too little history to judge
+    """
+    if not stats or stats['calls'] < MIN_CALLS_FOR_YIELD:
+        return None
+    return stats['retained_hits'] / stats['calls']
+
+
+def search_limit(limit: int, group: "QueryGroup", target: str) -> int:
+    """
+    Posts to request from one search call so each term and subreddit keeps `limit`
+
+    A compiled query's terms and a multireddit's subreddits all share the
+    results of one listing, so the limit is scaled by both, up to the most
+    Reddit returns for a search. Pagination still stops early when a search
+    runs out of results, so quiet combinations stay cheap.
+
+    Args:
+        limit: Maximum posts wanted per search term and subreddit
+        group: Compiled query
+        target: Subreddit or combined "sub1+sub2" name
+
+    Returns:
+        The limit for the search call
+    """
+    return min(REDDIT_MAX_SEARCH_RESULTS, limit * len(group.terms) * len(target.split("+")))
+
+
+class QueryGroup:
+    """A single compiled search string and the keywords it covers"""
+
+    def __init__(self, query: str, keywords: List[str], terms: Optional[List[str]] = None):
+        self.query = query
+        self.keywords = keywords
+        self.terms = terms or [query]  # Phrases OR'd into the query
+
+    def __repr__(self) -> str:
+        return f"QueryGroup({self.query!r}, {len(self.keywords)} keywords)"
+
+
+class QueryPlan:
+    """Compiled set of search calls for a keyword list and subreddit list"""
+
+    def __init__(self, groups: List[QueryGroup], keywords: List[str], subreddits: List[str],
+                 targets: Optional[List[str]] = None,
+                 pruned: Optional[Dict[str, Dict[str, float]]] = None, min_yield: float = 0.0):
+        self.groups = groups
+        self.keywords = keywords
+        self.subreddits = subreddits
+        # Subreddit names actually searched; combined "sub1+sub2" names in multireddit mode
+        self.targets = targets if targets is not None else subreddits
+        # Low-yield keywords left out of the plan, with the stats that condemned them
+        self.pruned = pruned or {}
+        self.min_yield = min_yield
+
+    @property
+    def naive_calls(self) -> int:
+        """Number of search calls made by searching one keyword per call"""
+        return len(self.keywords) * len(self.subreddits)
+
+    @property
+    def planned_calls(self) -> int:
+        """Number of search calls this plan will make"""
+        return len(self.groups) * len(self.targets)
+
+    def search_limits(self, limit: int) -> Dict[int, int]:
+        """Number of search calls per scaled limit (see search_limit)"""
+        limits: Dict[int, int] = {}
+        for group in self.groups:
+            for target in self.targets:
+                scaled = search_limit(limit, group, target)
+                limits[scaled] = limits.get(scaled, 0) + 1
+        return limits
+
+    def per_keyword_limit(self, limit: int) -> int:
+        """Posts guaranteed to each search term in each subreddit, below `limit` where Reddit's cap bites"""
+        return min((search_limit(limit, group, target) // (len(group.terms) * len(target.split("+")))
+                    for group in self.groups for target in self.targets), default=limit)
+
+    @property
+    def estimated_calls_saved(self) -> float:
+        """API calls the pruned keywords would cost, from their average calls per search"""
+        return sum(stats['calls'] / max(1, stats['searches']) for stats in self.pruned.values()) * len(self.targets)
+
+    def pruning_summary(self, cost_per_1000_calls: Optional[float] = None) -> str:
+        """Human readable count of pruned keywords and the estimated savings"""
+        if not self.pruned:
+            return "Keyword pruning: no keywords skipped"
+        saving = f"an estimated {self.estimated_calls_saved:,.0f} API calls"
+        if cost_per_1000_calls is not None:
+            saving += f" (${self.estimated_calls_saved * cost_per_1000_calls / 1000:,.2f})"
+        return (f"Keyword pruning: skipped {len(self.pruned)} keywords yielding under "
+                f"{self.min_yield * 100:g} mentions per 100 API calls, saving {saving}")
+
+    def parts(self) -> List["QueryPlan"]:
+        """Plans whose groups are searched in their targets (just this one)"""
+        return [self]
+
+    def summary(self) -> str:
+        """Human readable comparison of the planned and naive call counts"""
+        saved = self.naive_calls - self.planned_calls
+        combined = ""
+        if len(self.targets) != len(self.subreddits):
+            combined = f" combined into {len(self.targets)} multireddit queries"
+        return (f"Planned {self.planned_calls} search calls for {len(self.keywords)} keywords "
+                f"in {len(self.subreddits)} subreddits{combined} (naive plan: {self.naive_calls}, "
+                f"saving {saved})")
+
+
+class RoutedPlan:
+    """
+    Search plan with keywords routed to local subreddits
+
+    Every keyword is searched in the global subreddits; each local subreddit
+    is only searched for the keywords routed to it, instead of searching the
+    full keyword x subreddit cross product.
+    """
+
+    def __init__(self, global_plan: QueryPlan, local_plans: List[QueryPlan]):
+        self.global_plan = global_plan
+        self.local_plans = local_plans
+        self.keywords = global_plan.keywords
+        self.pruned = global_plan.pruned
+        self.min_yield = global_plan.min_yield
+        self.local_subreddits = sorted({s for plan in local_plans for s in plan.subreddits})
+
+    @property
+    def naive_calls(self) -> int:
+        """Search calls of the one-keyword-per-call plan over global and local subreddits"""
+        return len(self.keywords) * (len(self.global_plan.subreddits) + len(self.local_subreddits))
+
+    @property
+    def planned_calls(self) -> int:
+        """Number of search calls this plan will make"""
+        return sum(plan.planned_calls for plan in self.parts())
+
+    def search_limits(self, limit: int) -> Dict[int, int]:
+        """Number of search calls per scaled limit (see search_limit)"""
+        limits: Dict[int, int] = {}
+        for plan in self.parts():
+            for scaled, calls in plan.search_limits(limit).items():
+                limits[scaled] = limits.get(scaled, 0) + calls
+        return limits
+
+    def per_keyword_limit(self, limit: int) -> int:
+        """Posts guaranteed to each search term in each subreddit"""
+        return min(plan.per_keyword_limit(limit) for plan in self.parts())
+
+    @property
+    def estimated_calls_saved(self) -> float:
+        """API calls the pruned keywords would cost in the global subreddits"""
+        return self.global_plan.estimated_calls_saved
+
+    def pruning_summary(self, cost_per_1000_calls: Optional[float] = None) -> str:
+        """Human readable count of pruned keywords and the estimated savings"""
+        return self.global_plan.pruning_summary(cost_per_1000_calls)
+
+    def parts(self) -> List[QueryPlan]:
+        """The global plan followed by the local plans"""
+        return [self.global_plan] + self.local_plans
+
+    def summary(self) -> str:
+        """Human readable comparison of the planned and naive call counts"""
+        routed = sum(len(plan.keywords) for plan in self.local_plans)
+        return (f"Planned {self.planned_calls} search calls for {len(self.keywords)} keywords in "
+                f"{len(self.global_plan.subreddits)} global subreddits, plus {routed} keyword routes to "
+                f"{len(self.local_subreddits)} local subreddits (naive plan: {self.naive_calls}, "
+                f"saving {self.naive_calls - self.planned_calls})")
+
+
+class QueryPlanner:
+    """Compiles keyword lists into as few Reddit search strings as possible"""
+
+    def __init__(self, max_query_length: int = REDDIT_MAX_QUERY_LENGTH,
+                 max_multireddit_length: int = MAX_MULTIREDDIT_LENGTH,
+                 max_terms_per_query: int = MAX_TERMS_PER_QUERY):
+        self.max_query_length = max_query_length
+        self.max_multireddit_length = max_multireddit_length
+        self.max_terms_per_query = max(1, max_terms_per_query)
+
+    def compile_queries(self, keywords: List[str],
+                        exhaustive_words: Optional[Iterable[str]] = None) -> List[QueryGroup]:
+        """
+        Pack keywords into quoted phrases joined with OR
+
+        A multi-word keyword is not searched for separately when one of its
+        words is also a keyword listed in `exhaustive_words`: single words
+        whose searches are known to return all their posts within the limit,
+        so any post containing the phrase comes back for the word as well.
+        Such phrases stay attached to the group of the covering word so hits
+        can be attributed back to them locally. Behind a word whose search is
+        capped (or untested) the phrase's posts could be cut off, so it is
+        searched as its own term. A query holds at most max_terms_per_query
+        phrases, since they all share the results of one search.
+
+        Args:
+            keywords: List of keywords (as returned by DataProcessor.extract_keywords)
+            exhaustive_words: Single-word keywords that may cover the phrases containing them
+
+        Returns:
+            List of query groups, each fitting within max_query_length
+        """
+        unique_keywords = sorted({k.strip().lower() for k in keywords if k and k.strip()})
+        search_terms, covered_by = self._drop_subsumed(
+            unique_keywords, {word.lower() for word in exhaustive_words or ()})
+
+        # First-fit decreasing: longest terms first so short ones fill the gaps
+        bins: List[List[str]] = []
+        bin_lengths: List[int] = []
+        for term in sorted(search_terms, key=lambda t: (-len(t), t)):
+            quoted = self._quote(term)
+            if len(quoted) > self.max_query_length:
+                print(f"Skipping keyword longer than the query limit: {term}")
+                continue
+            for i, length in enumerate(bin_lengths):
+                if (length + len(" OR ") + len(quoted) <= self.max_query_length
+                        and len(bins[i]) < self.max_terms_per_query):
+                    bins[i].append(term)
+                    bin_lengths[i] = length + len(" OR ") + len(quoted)
+                    break
+            else:
+                bins.append([term])
+                bin_lengths.append(len(quoted))
+
+        groups = []
+        for terms in bins:
+            group_keywords = []
+            for term in terms:
+                group_keywords.append(term)
+                group_keywords.extend(covered_by.get(term, []))
+            query = " OR ".join(self._quote(term) for term in terms)
+            groups.append(QueryGroup(query, sorted(set(group_keywords)), terms))
+        return groups
+
+    def combine_subreddits(self, subreddits: List[str]) -> List[str]:
+        """
+        Group subreddits into combined "sub1+sub2+..." multireddit names
+
+        Args:
+            subreddits: List of subreddit names
+
+        Returns:
+            List of combined names, each within the multireddit length limits
+        """
+        combined = []
+        current: List[str] = []
+        current_length = 0
+        for subreddit in dict.fromkeys(s.strip() for s in subreddits if s and s.strip()):
+            added_length = len(subreddit) + (1 if current else 0)
+            if current and (current_length + added_length > self.max_multireddit_length
+                            or len(current) >= MAX_SUBREDDITS_PER_MULTIREDDIT):
+                combined.append("+".join(current))
+                current, current_length, added_length = [], 0, len(subreddit)
+            current.append(subreddit)
+            current_length += added_length
+        if current:
+            combined.append("+".join(current))
+        return combined
+
+    def plan(self, keywords: List[str], subreddits: List[str],
+             combine_subreddits: bool = False,
+             keyword_stats: Optional[Dict[str, Dict[str, float]]] = None,
+             min_yield: float = 0.0, limit: Optional[int] = None) -> QueryPlan:
+        """
+        Build a search plan for the given keywords and subreddits
+
+        With `keyword_stats` from earlier runs, keywords whose yield (retained
+        mentions per API call) is known to be below `min_yield` are left out,
+        and the query groups are ordered by expected yield: groups without
+        history first, then the most productive ones, so low-yield groups are
+        the ones cut off when a budget runs out. Words whose past searches
+        returned fewer posts than `limit` cover the phrases containing them
+        (see compile_queries).
+
+        Args:
+            keywords: List of keywords to search for
+            subreddits: List of subreddit names to search in
+            combine_subreddits: Whether to search subreddits together as multireddits
+            keyword_stats: Accumulated stats per keyword (KeywordStatsStore.get)
+            min_yield: Skip keywords with a known yield below this
+            limit: Posts searched per keyword and subreddit
+
+        Returns:
+            QueryPlan describing the compiled search calls
+        """
+        targets = self.combine_subreddits(subreddits) if combine_subreddits else None
+        keyword_stats = keyword_stats or {}
+        pruned = {}
+        if min_yield > 0:
+            for keyword in keywords:
+                stats = keyword_stats.get(keyword)
+                yield_ = keyword_yield(stats)
+                if yield_ is not None and yield_ < min_yield:
+                    pruned[keyword] = stats
+        kept = [keyword for keyword in keywords if keyword not in pruned]
+
+        groups = self.compile_queries(kept, self._exhaustive_words(keyword_stats, limit))
+        if keyword_stats:
+            groups.sort(key=lambda group: -self._group_yield(group, keyword_stats))
+        return QueryPlan(groups, kept, list(subreddits), targets, pruned=pruned, min_yield=min_yield)
+
+    def plan_routed(self, keywords: List[str], subreddits: List[str],
+                    local_subreddits: Dict[str, List[str]],
+                    combine_subreddits: bool = False,
+                    keyword_stats: Optional[Dict[str, Dict[str, float]]] = None,
+                    min_yield: float = 0.0, limit: Optional[int] = None) -> RoutedPlan:
+        """
+        Build a plan searching each keyword globally and in its own local subreddits
+
+        Args:
+            keywords: List of keywords to search for
+            subreddits: Global subreddits, searched for every keyword (except those that
+                are also local subreddits)
+            local_subreddits: Keyword to local subreddits (see GeoRouter.route_keywords)
+            combine_subreddits: Whether to search the global subreddits together as multireddits
+            keyword_stats: Accumulated stats per keyword (KeywordStatsStore.get)
+            min_yield: Skip keywords with a known yield below this
+            limit: Posts searched per keyword and subreddit
+
+        Returns:
+            RoutedPlan with one plan for the global subreddits and one per local subreddit
+        """
+        # Listed subreddits that some keyword is routed to are searched as local ones only
+        local_names = {subreddit.lower() for routed in local_subreddits.values() for subreddit in routed}
+        global_subreddits = [subreddit for subreddit in subreddits if subreddit.lower() not in local_names]
+        global_plan = self.plan(keywords, global_subreddits, combine_subreddits=combine_subreddits,
+                                keyword_stats=keyword_stats, min_yield=min_yield, limit=limit)
+        by_subreddit: Dict[str, List[str]] = {}
+        for keyword in global_plan.keywords:
+            for subreddit in local_subreddits.get(keyword, []):
+                by_subreddit.setdefault(subreddit, []).append(keyword)
+        local_plans = [self.plan(local_keywords, [subreddit], keyword_stats=keyword_stats, limit=limit)
+                       for subreddit, local_keywords in sorted(by_subreddit.items())]
+        return RoutedPlan(global_plan, local_plans)
+
+    def _group_yield(self, group: QueryGroup, keyword_stats: Dict[str, Dict[str, float]]) -> float:
+        """Combined yield of a group's keywords with history, infinite if none has any"""
+        known = [keyword_stats[k] for k in group.keywords if keyword_yield(keyword_stats.get(k)) is not None]
+        if not known:
+            return float('inf')
+        return sum(stats['retained_hits'] for stats in known) / sum(stats['calls'] for stats in known)
+
+    def _exhaustive_words(self, keyword_stats: Dict[str, Dict[str, float]], limit: Optional[int]) -> Set[str]:
+        """Single-word keywords whose searches have returned fewer posts than `limit` on average"""
+        if not limit:
+            return set()
+        return {keyword for keyword, stats in keyword_stats.items()
+                if len(keyword.split()) == 1 and keyword_yield(stats) is not None
+                and stats['raw_hits'] / max(1, stats['searches']) < limit}
+
+    def _drop_subsumed(self, keywords: List[str],
+                       exhaustive_words: Set[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """Split keywords into search terms and phrases covered by an exhaustive single-word term"""
+        covering_words = set(keywords) & exhaustive_words
+        search_terms = []
+        covered_by: Dict[str, List[str]] = {}
+        for keyword in keywords:
+            words = keyword.split()
+            covering = next((w for w in words if w in covering_words), None) if len(words) > 1 else None
+            if covering:
+                covered_by.setdefault(covering, []).append(keyword)
+            else:
+                search_terms.append(keyword)
+        return search_terms, covered_by
+
+    def _quote(self, term: str) -> str:
+        """Quote a term as an exact phrase"""
+        return '"' + term.replace('"', '') + '"'
@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import Callable, Mapping, Optional
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter driven by Reddit's rate limit headers
+
+    Until Reddit has told us anything, requests are paced by a plain token
+    bucket refilled at `requests_per_minute`. Once a response carries the
+    X-Ratelimit-Remaining / X-Ratelimit-Reset headers, the bucket holds exactly
+    the remaining quota for the current window: requests go out as fast as
+    they are made until the quota is spent, then wait for the window to reset.
+
+    The clock and sleep functions can be replaced (e.g. with a fake clock) so
+    the limiter can be exercised offline. One instance is safe to share
+    between threads.
+    """
+
+    def __init__(self, requests_per_minute: float = 100, burst: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute: Refill rate used before any rate limit headers are seen
+            burst: Bucket capacity (defaults to one minute of requests)
+            clock: Monotonic clock returning seconds
+            sleep: Function used to wait
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, int(requests_per_minute))
+        self.clock = clock
+        self.sleep = sleep
+        self.total_wait = 0.0  # Seconds spent waiting, for reporting
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._last_refill = clock()
+        self._reset_at: Optional[float] = None  # End of the current server-side window, if known
+
+    def acquire(self) -> float:
+        """
+        Wait until a request may be made and consume one token
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.total_wait += waited
+                    return waited
+                wait = self._time_until_token(now)
+            # Sleep outside the lock so other threads can still report headers
+            self.sleep(wait)
+            waited += wait
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Sync the bucket with the quota reported by Reddit
+
+        Args:
+            headers: Response headers (X-Ratelimit-Remaining / X-Ratelimit-Reset)
+        """
+        remaining = _header(headers, 'x-ratelimit-remaining')
+        reset = _header(headers, 'x-ratelimit-reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining_requests = float(remaining)
+            seconds_to_reset = float(reset)
+        except ValueError:
+            return
+        with self._lock:
+            now = self.clock()
+            self._tokens = max(0.0, remaining_requests)
+            self._reset_at = now + max(0.0, seconds_to_reset)
+            self._last_refill = now
+
+    def on_rate_limited(self, retry_after: Optional[float] = None,
+                        fallback: Optional[float] = None) -> None:
+        """
+        Record a 429 response: no more requests until the window resets
+
+        Args:
+            retry_after: Seconds to wait from the Retry-After header, if provided
+            fallback: Seconds to wait when Reddit gave no reset information at all
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = 0.0
+            if retry_after is not None:
+                self._reset_at = now + retry_after
+            elif self._reset_at is None or self._reset_at <= now:
+                self._reset_at = now + (fallback if fallback is not None else 1.0 / self.rate)
+            self._last_refill = now
+
+    def summary(self) -> str:
+        """Human readable wait time for the search log"""
+        return f"Rate limiter: waited {self.total_wait:.1f}s in total for API quota"
+
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time elapsed since the last refill"""
+        if self._reset_at is not None:
+            if now >= self._reset_at:
+                # New server-side window: full quota until headers say otherwise
+                self._tokens = float(self.capacity)
+                self._reset_at = None
+                self._last_refill = now
+            return
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(float(self.capacity), self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def _time_until_token(self, now: float) -> float:
+        """Seconds until at least one token is available"""
+        if self._reset_at is not None:
+            return max(0.0, self._reset_at - now)
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Case-insensitive header lookup"""
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    if value is None:
+        for key, header_value in headers.items():
+            if key.lower() == name:
+                return header_value
+    return value
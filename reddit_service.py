@@ -1,90 +1,322 @@
 import praw
 import time
 import datetime
+import math
 import pandas as pd
 import re
-from typing import List, Dict, Any, Callable, Optional
+from typing import List, Dict, Any, Callable, Optional, Union
 from prawcore.exceptions import ResponseException, RequestException
+from query_planner import QueryPlanner, QueryPlan, RoutedPlan
+from keyword_matcher import KeywordMatcher
+from comment_cache import CommentCache
+from mention_store import WatermarkStore, KeywordStatsStore
+from rate_limiter import RateLimiter
+from search_executor import SearchExecutor, build_tasks
+from api_budget import ApiBudget, BudgetExceeded
+from mention_buffer import MentionBuffer
+from snippet_extractor import SnippetExtractor
+from comment_walker import CommentWalker
+from mention_pipeline import fetch_submissions, fetch_comments, match_items, build_mentions
+
+# Longest wait before reopening a stream that keeps failing, in seconds
+MAX_STREAM_BACKOFF = 300
 
 class RedditService:
     """Service for interacting with Reddit API to search for mentions"""
     
-    def __init__(self, client_id: str, client_secret: str, user_agent: str):
-        """Initialize Reddit API connection"""
+    def __init__(self, client_id: str, client_secret: str, user_agent: str,
+                 comment_cache_size: int = 500, comment_cache_dir: Optional[str] = None,
+                 watermark_store: Optional[WatermarkStore] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 comment_cache: Optional[CommentCache] = None,
+                 api_budget: Optional[ApiBudget] = None,
+                 praw_options: Optional[Dict[str, Any]] = None,
+                 snippet_extractor: Optional[SnippetExtractor] = None,
+                 keyword_stats: Optional[KeywordStatsStore] = None,
+                 comment_walker: Optional[CommentWalker] = None):
+        """
+        Initialize Reddit API connection
+
+        Args:
+            client_id: Reddit API client ID
+            client_secret: Reddit API client secret
+            user_agent: User agent string for API requests
+            comment_cache_size: Maximum number of comment trees kept in memory
+            comment_cache_dir: Optional directory for persisting comment trees between runs
+            watermark_store: Store of per-(subreddit, query) watermarks for incremental searches
+            rate_limiter: Rate limiter to share with other services (a new one by default)
+            comment_cache: Comment cache to share with other services (a new one by default)
+            api_budget: Call meter and budget to share with other services (unlimited by default)
+            praw_options: Extra praw.Reddit settings, e.g. oauth_url/reddit_url to target a local stand-in
+            snippet_extractor: Snippet window and count settings (100 characters, 3 snippets by default)
+            keyword_stats: Store the per-keyword yield of each search is recorded in (off by default)
+            comment_walker: Per-thread time budget and "more comments" expansion settings
+                (10 seconds, no expansion by default)
+        """
+        self._credentials = {'client_id': client_id, 'client_secret': client_secret, 'user_agent': user_agent}
+        self.praw_options = dict(praw_options or {})
         self.reddit = praw.Reddit(
             client_id=client_id,
             client_secret=client_secret,
-            user_agent=user_agent
+            user_agent=user_agent,
+            **self.praw_options
         )
-        self.rate_limit_delay = 2  # Base delay between API calls
         self.max_retries = 3  # Maximum number of retries for rate limits
         self.base_backoff = 5  # Base backoff time in seconds
+        self.query_planner = QueryPlanner()
+        self._matchers: Dict[tuple, KeywordMatcher] = {}  # Compiled matchers by keyword list
+        self.comment_cache = comment_cache or CommentCache(max_entries=comment_cache_size, cache_dir=comment_cache_dir)
+        self.watermark_store = watermark_store
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.api_budget = api_budget or ApiBudget()
+        self.snippet_extractor = snippet_extractor or SnippetExtractor()
+        self.keyword_stats = keyword_stats
+        self.comment_walker = comment_walker or CommentWalker()
+        self.request_count = 0  # Requests made through this service's PRAW client
+        self._install_rate_limiter()
+        self._install_budget_meter()
+    
+    def clone(self) -> "RedditService":
+        """
+        Create a service with its own PRAW client for use on another thread
+
+        The clone shares this service's rate limiter, comment cache, watermark
+        store, keyword stats, comment walker and API budget, so concurrent
+        searches draw from one API quota.
+        """
+        return RedditService(
+            **self._credentials,
+            watermark_store=self.watermark_store,
+            rate_limiter=self.rate_limiter,
+            comment_cache=self.comment_cache,
+            api_budget=self.api_budget,
+            praw_options=self.praw_options,
+            snippet_extractor=self.snippet_extractor,
+            keyword_stats=self.keyword_stats,
+            comment_walker=self.comment_walker
+        )
+    
+    def _install_rate_limiter(self) -> None:
+        """
+        Route every prawcore request through our rate limiter
+
+        prawcore's own limiter spreads requests evenly over the window; we
+        replace its delay with ours, which spends the remaining quota as fast
+        as Reddit allows, and feed it the X-Ratelimit headers of each response.
+        """
+        for core in (self.reddit._read_only_core, self.reddit._authorized_core):
+            core_limiter = getattr(core, '_rate_limiter', None)
+            if core_limiter is None or getattr(core_limiter, '_fish_tracker_limiter', None) is self.rate_limiter:
+                continue
+            original_update = core_limiter.update
+            
+            def update(*args, _original_update=original_update, **kwargs):
+                _original_update(*args, **kwargs)
+                headers = kwargs.get('response_headers', args[0] if args else {})
+                self.rate_limiter.update_from_headers(headers)
+            
+            core_limiter.delay = self.rate_limiter.acquire
+            core_limiter.update = update
+            core_limiter._fish_tracker_limiter = self.rate_limiter
+    
+    def _install_budget_meter(self) -> None:
+        """Count every prawcore request by endpoint and refuse requests beyond the budget"""
+        for core in (self.reddit._read_only_core, self.reddit._authorized_core):
+            if core is None or getattr(core, '_fish_tracker_budget', None) is self.api_budget:
+                continue
+            original_request = core.request
+            
+            def request(*args, _original_request=original_request, **kwargs):
+                self.api_budget.charge(kwargs.get('path', args[1] if len(args) > 1 else ''))
+                self.request_count += 1
+                return _original_request(*args, **kwargs)
+            
+            core.request = request
+            core._fish_tracker_budget = self.api_budget
     
-    def _handle_rate_limit(self, attempt: int) -> None:
-        """Handle rate limiting with exponential backoff"""
-        backoff_time = self.base_backoff * (2 ** (attempt - 1))  # Exponential backoff
-        time.sleep(backoff_time)
+    def _handle_rate_limit(self, attempt: int, error: Optional[ResponseException] = None) -> None:
+        """
+        Handle a 429 response
+
+        The rate limiter holds further requests until Reddit's window resets
+        (or the Retry-After delay passes). Exponential backoff is only used
+        when the response carried no reset information at all.
+        """
+        retry_after = getattr(error, 'retry_after', None)
+        self.rate_limiter.on_rate_limited(
+            retry_after=float(retry_after) if retry_after else None,
+            fallback=self.base_backoff * (2 ** (attempt - 1))
+        )
     
     def _make_api_request(self, subreddit: str, keyword: str, limit: int, time_filter: str, 
-                         include_comments: bool, comments_limit: int, attempt: int = 1) -> List[Dict[Any, Any]]:
-        """Make API request with rate limit handling"""
+                         include_comments: bool, comments_limit: int, attempt: int = 1,
+                         match_keywords: Optional[List[str]] = None, incremental: bool = False,
+                         full_rescan: bool = False, resume_state: Optional[Dict[str, Any]] = None,
+                         checkpoint_callback: Optional[Callable[[Dict[str, Any], List[Dict[Any, Any]]], None]] = None,
+                         keep_results: bool = True,
+                         yield_counts: Optional[Dict[str, Any]] = None) -> MentionBuffer:
+        """
+        Make API request with rate limit handling
+
+        Mentions are collected in a MentionBuffer, which iterates as mention
+        dicts but stores repeated strings only once.
+
+        `subreddit` may be a combined "sub1+sub2" multireddit name; each result
+        records the subreddit the submission was actually posted in.
+        `keyword` is sent to Reddit as the search string. When it is a compiled
+        query (see QueryPlanner), `match_keywords` lists the original keywords
+        it covers and every hit is attributed back to them locally.
+
+        With `incremental` set, results are requested newest first and
+        pagination stops at the newest post seen by the previous run for this
+        subreddit and query. `full_rescan` ignores the stored watermark (but
+        still records a new one).
+
+        After each submission has been processed, `checkpoint_callback` is
+        called with the pagination state and the mentions found in that
+        submission. Passing such a state back as `resume_state` continues the
+        listing after that submission instead of starting over; the same is
+        done internally when retrying after a 429. With `keep_results` off the
+        mentions are only handed to `checkpoint_callback` and then dropped, so
+        memory stays flat however many a request finds (the returned buffer is
+        empty).
+
+        Errors other than a 429 that is retried are raised, so callers can
+        tell a failed search from one that found nothing; the last checkpoint
+        then points at the last submission that was fully processed.
+
+        With a keyword stats store, the calls spent and the raw and retained
+        hits of every covered keyword are recorded once the request has run
+        to the end (failed requests are not recorded). `yield_counts` carries
+        the counts of earlier attempts into a retry.
+        """
+        if match_keywords is None:
+            match_keywords = [keyword]
+        matcher = self._get_matcher(match_keywords)
+        incremental = incremental and self.watermark_store is not None
+        watermark = None
+        if incremental and not full_rescan:
+            watermark = self.watermark_store.get(subreddit, keyword)
+        search_results = MentionBuffer()
+        # Yield accounting: requests made, returned posts per keyword, and posts no keyword explains
+        counts = yield_counts or {'calls': 0, 'raw_hits': {}, 'retained': {}, 'unattributed': 0}
+        raw_hits: Dict[str, int] = counts['raw_hits']
+        retained: Dict[str, int] = counts['retained']
+        calls_before = self.request_count
+        # Pagination state: fullname of the last processed submission, how many were seen, newest timestamp
+        state = dict(resume_state or {'after': None, 'seen': 0, 'newest_seen': None})
         try:
             subreddit_instance = self.reddit.subreddit(subreddit)
-            search_results = []
+            search_kwargs = {'limit': limit - state['seen'], 'time_filter': time_filter}
+            if incremental:
+                search_kwargs['sort'] = 'new'  # Watermarks only work when listing newest first
+            if state['after']:
+                search_kwargs['params'] = {'after': state['after']}
+            newest_seen = state['newest_seen']
+            seen_count = state['seen']
+            if search_kwargs['limit'] <= 0:
+                # Nothing left to fetch; only a retry that already made calls has a yield to record
+                if counts['calls']:
+                    self._record_yield(match_keywords, counts)
+                return search_results
+            
+            def on_watermark(submission) -> None:
+                # The submission at the watermark was fetched too; seen_count covers those before it
+                self.watermark_store.record_skipped_pages(self._pages_skipped(limit, seen_count + 1))
+            
+            def get_comments(submission) -> List[Dict[str, Any]]:
+                # A failed fetch ends the request before the checkpoint below, so a
+                # resumed run fetches this submission's comments again
+                comments = self.comment_cache.get(submission.id, limit=comments_limit)
+                if comments is None:
+                    comments = self._fetch_comments_with_retry(submission, comments_limit)
+                    self.comment_cache.put(submission.id, comments, limit=comments_limit)
+                return comments[:comments_limit]
             
-            # Search in posts
-            for submission in subreddit_instance.search(keyword, limit=limit, time_filter=time_filter):
-                # Check post title and content
-                if self._check_keyword_match(submission.title, keyword):
-                    search_results.append({
-                        'id': submission.id,
-                        'title': submission.title,
-                        'author': str(submission.author),
-                        'datetime': datetime.datetime.fromtimestamp(submission.created_utc).isoformat(),
-                        'permalink': submission.permalink,
-                        'snippet': self._get_context_snippet(submission.title, keyword),
-                        'source': 'post',
-                        'subreddit': subreddit,
-                        'keyword': keyword
-                    })
+            items = fetch_submissions(subreddit_instance.search(keyword, **search_kwargs), watermark, on_watermark)
+            if include_comments:
+                items = fetch_comments(items, get_comments)
+            items = build_mentions(match_items(items, matcher), self.snippet_extractor)
+            for item in items:
+                submission = item.submission
+                seen_count += 1
+                if newest_seen is None or submission.created_utc > newest_seen:
+                    newest_seen = submission.created_utc
                 
-                # Check comments if enabled
-                if include_comments:
-                    try:
-                        submission.comments.replace_more(limit=0)  # Load all comments
-                        for comment in submission.comments.list()[:comments_limit]:
-                            if self._check_keyword_match(comment.body, keyword):
-                                search_results.append({
-                                    'id': comment.id,
-                                    'title': submission.title,
-                                    'author': str(comment.author),
-                                    'datetime': datetime.datetime.fromtimestamp(comment.created_utc).isoformat(),
-                                    'permalink': submission.permalink,
-                                    'snippet': self._get_context_snippet(comment.body, keyword),
-                                    'source': 'comment',
-                                    'subreddit': subreddit,
-                                    'keyword': keyword
-                                })
-                    except Exception as e:
-                        print(f"Error processing comments for submission {submission.id}: {str(e)}")
-                        continue
+                # Body hits count towards the yield even though only the title makes a post mention
+                returned_for = {hit[0] for hit in item.title_hits}
+                returned_for.update(hit[0] for hit in item.body_hits)
+                for matched_keyword in returned_for:
+                    raw_hits[matched_keyword] = raw_hits.get(matched_keyword, 0) + 1
+                if not returned_for:
+                    counts['unattributed'] += 1
                 
-                time.sleep(self.rate_limit_delay)  # Delay between submissions
+                submission_start = len(search_results)
+                search_results.extend(item.mentions)
+                state = {'after': submission.fullname, 'seen': seen_count, 'newest_seen': newest_seen}
+                new_results = search_results[submission_start:]
+                for matched_keyword, count in new_results.keyword_counts().items():
+                    retained[matched_keyword] = retained.get(matched_keyword, 0) + count
+                if checkpoint_callback:
+                    checkpoint_callback(state, new_results)
+                if not keep_results:
+                    search_results.clear()
             
+            if incremental and newest_seen is not None:
+                self.watermark_store.set(subreddit, keyword, newest_seen)
+            
+            counts['calls'] += self.request_count - calls_before
+            self._record_yield(match_keywords, counts)
             return search_results
             
+        except BudgetExceeded as e:
+            # Hand back what this request found before the budget ran out
+            e.partial_results = search_results
+            raise
         except ResponseException as e:
             if e.response.status_code == 429 and attempt < self.max_retries:
                 print(f"Rate limit hit for subreddit {subreddit}, attempt {attempt}. Backing off...")
-                self._handle_rate_limit(attempt)
-                return self._make_api_request(subreddit, keyword, limit, time_filter, 
-                                           include_comments, comments_limit, attempt + 1)
-            else:
-                print(f"Error searching subreddit {subreddit}: {str(e)}")
-                return []
+                self._handle_rate_limit(attempt, e)
+                counts['calls'] += self.request_count - calls_before
+                # Continue after the last processed submission rather than paying for it again
+                return search_results + self._make_api_request(
+                    subreddit, keyword, limit, time_filter, include_comments, comments_limit, attempt + 1,
+                    match_keywords=match_keywords, incremental=incremental, full_rescan=full_rescan,
+                    resume_state=state, checkpoint_callback=checkpoint_callback, keep_results=keep_results,
+                    yield_counts=counts
+                )
+            raise
+    
+    def _record_yield(self, keywords: List[str], counts: Dict[str, Any]) -> None:
+        """
+        Record the yield of one completed search request per keyword
+
+        Posts that none of the keywords explain are split evenly between
+        them, and the request's calls are shared out in proportion to each
+        keyword's raw hits (evenly when nothing was returned).
+
+        Args:
+            keywords: Keywords the request covered
+            counts: 'calls' made, 'raw_hits' and 'retained' hits per keyword, and
+                'unattributed' posts no keyword explains
+        """
+        if self.keyword_stats is None or not keywords:
+            return
+        calls, raw_hits, retained = counts['calls'], counts['raw_hits'], counts['retained']
+        raw = {keyword: raw_hits.get(keyword, 0) + counts['unattributed'] / len(keywords) for keyword in keywords}
+        total_raw = sum(raw.values())
+        stats = {
+            keyword: {
+                'calls': calls * (raw[keyword] / total_raw if total_raw else 1 / len(keywords)),
+                'raw_hits': raw[keyword],
+                'retained_hits': retained.get(keyword, 0)
+            }
+            for keyword in keywords
+        }
+        try:
+            self.keyword_stats.record(stats)
         except Exception as e:
-            print(f"Error searching subreddit {subreddit}: {str(e)}")
-            return []
+            print(f"Error recording keyword stats: {str(e)}")
     
     def search_reddit(
         self, 
@@ -95,80 +327,294 @@ class RedditService:
         include_comments: bool = True, 
         comments_limit: int = 100,
         entity_type: str = "general",
-        progress_callback: Optional[Callable[[float, str], None]] = None
-    ) -> List[Dict[Any, Any]]:
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        combine_subreddits: bool = False,
+        incremental: bool = False,
+        full_rescan: bool = False,
+        max_workers: int = 4
+    ) -> MentionBuffer:
         """
         Search Reddit for mentions of keywords in specified subreddits
         
         Args:
             keywords: List of keywords to search for
             subreddits: List of subreddit names to search in
-            limit: Maximum number of posts to search per subreddit
+            limit: Maximum number of posts to search per keyword and subreddit
             time_filter: Time filter for search (day, week, month, year, all)
             include_comments: Whether to search comments as well
             comments_limit: Maximum number of comments to search per post
             entity_type: Type of entity being searched (for reporting)
             progress_callback: Callback function to report progress
+            combine_subreddits: Search subreddits together as "sub1+sub2+..." multireddits
+            incremental: Only fetch posts newer than the previous run (needs a watermark store)
+            full_rescan: With incremental, ignore stored watermarks and scan the whole window
+            max_workers: Number of searches run concurrently
         
         Returns:
-            List of dictionaries containing mention information
+            MentionBuffer of mentions (iterates as dictionaries of mention information)
         """
-        results = []
-        total_progress_steps = len(keywords) * len(subreddits)
-        current_step = 0
+        plan = self.plan_search(keywords, subreddits, combine_subreddits=combine_subreddits, limit=limit)
         
         if progress_callback:
-            progress_callback(0.0, f"Starting Reddit search for {entity_type} mentions")
+            progress_callback(0.0, f"Starting Reddit search for {entity_type} mentions. {plan.summary()}")
         
-        for subreddit in subreddits:
-            for keyword in keywords:
-                if progress_callback:
-                    current_step += 1
-                    progress = current_step / total_progress_steps
-                    progress_callback(progress, f"Searching r/{subreddit} for '{keyword}'")
-                
-                # Make API request with rate limit handling
-                subreddit_results = self._make_api_request(
-                    subreddit=subreddit,
-                    keyword=keyword,
-                    limit=limit,
-                    time_filter=time_filter,
-                    include_comments=include_comments,
-                    comments_limit=comments_limit
-                )
-                
-                results.extend(subreddit_results)
-                time.sleep(self.rate_limit_delay)  # Delay between keywords
+        executor = SearchExecutor(self.clone, max_workers=max_workers)
+        results = executor.run(
+            build_tasks({entity_type: plan}),
+            progress_callback=progress_callback,
+            limit=limit,
+            time_filter=time_filter,
+            include_comments=include_comments,
+            comments_limit=comments_limit,
+            incremental=incremental,
+            full_rescan=full_rescan
+        )
+        
+        if progress_callback:
+            progress_callback(1.0, self.comment_cache.summary())
+            progress_callback(1.0, self.rate_limiter.summary())
+            if incremental:
+                progress_callback(1.0, self.watermark_summary())
         
         return results
 
-    def _check_keyword_match(self, text: str, keyword: str) -> bool:
-        """Check if keyword appears in text"""
-        if not isinstance(text, str):
-            return False
-        return keyword.lower() in text.lower()
+    def stream_mentions(
+        self,
+        keyword_sets: Dict[str, List[str]],
+        subreddits: List[str],
+        sink: Callable[[List[Dict[Any, Any]]], Any],
+        include_comments: bool = True,
+        duration: Optional[float] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        skip_existing: bool = True,
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        poll_interval: float = 5.0
+    ) -> Dict[str, int]:
+        """
+        Tail new submissions and comments and match them locally
 
-    def _get_context_snippet(self, text: str, keyword: str, context_chars: int = 100) -> str:
-        """Get a snippet of text around the keyword"""
-        if not isinstance(text, str):
-            return ""
-            
-        text = text.lower()
-        keyword = keyword.lower()
-        
-        # Find keyword position
-        pos = text.find(keyword)
-        if pos == -1:
-            return text[:context_chars] + "..." if len(text) > context_chars else text
-            
-        # Get context around keyword
-        start = max(0, pos - context_chars // 2)
-        end = min(len(text), pos + len(keyword) + context_chars // 2)
-        
-        snippet = text[start:end]
-        if start > 0:
-            snippet = "..." + snippet
-        if end < len(text):
-            snippet = snippet + "..."
-            
-        return snippet
+        Instead of one search call per keyword and subreddit, this opens a
+        constant number of streams (submissions and comments for each combined
+        multireddit) and runs every item through the keyword matchers. Unlike
+        search, this also finds mentions in comments of posts whose titles
+        don't mention anything.
+
+        Each listing is polled at most once per `poll_interval`. A stream
+        that fails (rate limit, missing subreddit, network error) is reopened
+        after an exponential backoff while the others carry on.
+
+        Args:
+            keyword_sets: Keywords to match per entity type, e.g. {'plant': [...], 'vessel': [...]}
+            subreddits: List of subreddit names to watch
+            sink: Called with each batch of new mentions (e.g. MentionStore.upsert_mentions)
+            include_comments: Whether to stream comments as well as submissions
+            duration: Stop after this many seconds (runs until should_stop otherwise)
+            should_stop: Callback returning True when streaming should end
+            skip_existing: Skip the items already present when the streams start
+            progress_callback: Callback function to report progress
+            poll_interval: Seconds between polls of the same listing
+
+        Returns:
+            Dictionary with counts of items scanned, mentions found and stream errors, and
+            whether the stream stopped because the API budget ran out
+        """
+        matchers = {entity_type: KeywordMatcher(keywords) for entity_type, keywords in keyword_sets.items()}
+        sources = ['post', 'comment'] if include_comments else ['post']
+        streams = [{'target': target, 'source': source, 'stream': None, 'failures': 0, 'retry_at': 0.0,
+                    'newest_seen': None, 'newest_ids': set()}
+                   for target in self.query_planner.combine_subreddits(subreddits) for source in sources]
+
+        def open_stream(entry: Dict[str, Any]):
+            listing = self.reddit.subreddit(entry['target']).stream
+            listing = listing.submissions if entry['source'] == 'post' else listing.comments
+            # pause_after=-1 yields None after every response, so the streams can be polled in turn.
+            # A reopened stream replays the latest items; those already seen are skipped by timestamp.
+            return listing(pause_after=-1, skip_existing=skip_existing and entry['newest_seen'] is None)
+
+        stats = {'items_scanned': 0, 'mentions_found': 0, 'budget_exhausted': False, 'stream_errors': 0}
+        start_time = time.time()
+        if progress_callback:
+            progress_callback(0.0, f"Streaming {len(streams)} listings for {len(subreddits)} subreddits")
+
+        def finished() -> bool:
+            if stats['budget_exhausted'] or (should_stop and should_stop()):
+                return True
+            return duration is not None and time.time() - start_time >= duration
+
+        while not finished():
+            round_start = time.time()
+            for entry in streams:
+                if round_start < entry['retry_at']:
+                    continue
+                source = entry['source']
+                batch = []
+                try:
+                    if entry['stream'] is None:
+                        entry['stream'] = open_stream(entry)
+                    for item in entry['stream']:
+                        if item is None:
+                            break
+                        newest_seen = entry['newest_seen']
+                        if newest_seen is not None and (item.created_utc < newest_seen or (
+                                item.created_utc == newest_seen and item.id in entry['newest_ids'])):
+                            continue
+                        if item.created_utc != newest_seen:
+                            entry['newest_seen'], entry['newest_ids'] = item.created_utc, set()
+                        entry['newest_ids'].add(item.id)
+                        stats['items_scanned'] += 1
+                        batch.extend(self._match_stream_item(item, source, matchers))
+                    entry['failures'] = 0
+                except BudgetExceeded as e:
+                    print(f"Stopping stream: {str(e)}")
+                    stats['budget_exhausted'] = True
+                except Exception as e:
+                    # A generator that raised is finished; reopen it after a backoff
+                    print(f"Error reading {source} stream for {entry['target']}: {str(e)}")
+                    stats['stream_errors'] += 1
+                    entry['stream'] = None
+                    entry['failures'] += 1
+                    backoff = min(self.base_backoff * (2 ** (entry['failures'] - 1)), MAX_STREAM_BACKOFF)
+                    entry['retry_at'] = time.time() + backoff
+                    if isinstance(e, ResponseException) and e.response.status_code == 429:
+                        self._handle_rate_limit(entry['failures'], e)
+
+                if batch:
+                    sink(batch)
+                    stats['mentions_found'] += len(batch)
+                    if progress_callback:
+                        progress = min(1.0, (time.time() - start_time) / duration) if duration else 0.0
+                        progress_callback(progress, f"Found {len(batch)} new {source} mentions "
+                                                    f"({stats['mentions_found']} total, "
+                                                    f"{stats['items_scanned']} items scanned)")
+                if finished():
+                    break
+
+            # Poll each listing at most once per interval, and sleep through backoffs
+            wake_at = max(round_start + poll_interval, min(entry['retry_at'] for entry in streams))
+            while not finished() and time.time() < wake_at:
+                time.sleep(min(1.0, wake_at - time.time()))
+
+        return stats
+
+    def _match_stream_item(self, item, source: str,
+                           matchers: Dict[str, KeywordMatcher]) -> List[Dict[Any, Any]]:
+        """Run a streamed submission or comment through the matchers and build mention dicts"""
+        if source == 'post':
+            texts = [item.title, getattr(item, 'selftext', '')]
+            title = item.title
+            permalink = item.permalink
+        else:
+            texts = [item.body]
+            title = getattr(item, 'link_title', '')
+            permalink = item.permalink
+
+        mentions = []
+        for entity_type, matcher in matchers.items():
+            matched = {}
+            for text in texts:
+                hits = matcher.find_all(text)
+                if not hits:
+                    continue
+                for keyword, snippet in self.snippet_extractor.snippets_by_keyword(text, hits).items():
+                    matched.setdefault(keyword, snippet)
+            for keyword, snippet in matched.items():
+                mentions.append({
+                    'id': item.id,
+                    'title': title,
+                    'author': str(item.author),
+                    'datetime': datetime.datetime.fromtimestamp(item.created_utc).isoformat(),
+                    'permalink': permalink,
+                    'snippet': snippet,
+                    'source': source,
+                    'subreddit': item.subreddit.display_name,
+                    'keyword': keyword,
+                    'entity_type': entity_type
+                })
+        return mentions
+
+    def plan_search(self, keywords: List[str], subreddits: List[str],
+                    combine_subreddits: bool = False, min_yield: float = 0.0,
+                    local_subreddits: Optional[Dict[str, List[str]]] = None,
+                    limit: Optional[int] = None) -> Union[QueryPlan, RoutedPlan]:
+        """
+        Compile keywords into the fewest search calls per subreddit
+
+        Args:
+            keywords: List of keywords to search for
+            subreddits: List of subreddit names to search in
+            combine_subreddits: Whether to group subreddits into multireddit queries
+            min_yield: Skip keywords whose recorded yield (mentions per API call) is below this
+            local_subreddits: Keyword to local subreddits searched for it in addition to
+                `subreddits` (see GeoRouter.route_keywords)
+            limit: Posts searched per keyword and subreddit; lets words whose searches
+                return fewer posts cover the phrases containing them
+
+        Returns:
+            QueryPlan (RoutedPlan with local subreddits) with the compiled queries and
+            planned/naive call counts
+        """
+        keyword_stats = self.keyword_stats.get(keywords) if self.keyword_stats is not None else None
+        if local_subreddits:
+            return self.query_planner.plan_routed(keywords, subreddits, local_subreddits,
+                                                  combine_subreddits=combine_subreddits,
+                                                  keyword_stats=keyword_stats, min_yield=min_yield, limit=limit)
+        return self.query_planner.plan(keywords, subreddits, combine_subreddits=combine_subreddits,
+                                       keyword_stats=keyword_stats, min_yield=min_yield, limit=limit)
+
+    def _pages_skipped(self, limit: int, seen_count: int) -> int:
+        """Number of listing pages not fetched after stopping at item seen_count"""
+        page_size = min(limit, 100)  # Reddit returns at most 100 items per listing page
+        return max(0, math.ceil(limit / page_size) - math.ceil(seen_count / page_size))
+
+    def watermark_summary(self) -> str:
+        """Human readable watermark savings for the search log"""
+        if self.watermark_store is None:
+            return "Watermarks: not enabled"
+        return self.watermark_store.summary()
+
+    def _fetch_comments(self, submission, limit: int) -> List[Dict[str, Any]]:
+        """Download and flatten at most `limit` comments of a submission, top level first"""
+        return self.comment_walker.walk(submission, limit)
+    
+    def _fetch_comments_with_retry(self, submission, limit: int) -> List[Dict[str, Any]]:
+        """
+        Fetch a submission's comments, waiting out 429 responses
+
+        Only the comment request is repeated, not the search page the
+        submission came from. Other errors, and a 429 on the last attempt,
+        are raised.
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return self._fetch_comments(submission, limit)
+            except ResponseException as e:
+                if e.response.status_code != 429 or attempt == self.max_retries:
+                    raise
+                print(f"Rate limit hit fetching comments for submission {submission.id}, "
+                      f"attempt {attempt}. Backing off...")
+                self._handle_rate_limit(attempt, e)
+    
+    def fetch_comment_tree(self, submission_id: str, comment_limit: int = 200):
+        """
+        Fetch a submission and its comment tree in one request, refreshing the comment cache
+
+        Args:
+            submission_id: Reddit submission id
+            comment_limit: Maximum number of comments to fetch
+
+        Returns:
+            Tuple of the loaded submission and its flattened comments
+        """
+        submission = self.reddit.submission(id=submission_id)
+        comments = self._fetch_comments(submission, comment_limit)
+        self.comment_cache.put(submission_id, comments, limit=comment_limit)
+        return submission, comments
+
+    def _get_matcher(self, keywords: List[str]) -> KeywordMatcher:
+        """Return the compiled keyword matcher for a keyword list, building it once"""
+        key = tuple(keywords)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = KeywordMatcher(keywords)
+            self._matchers[key] = matcher
+        return matcher
@@ -0,0 +1,284 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Optional, Union, Iterator
+
+from query_planner import QueryGroup, QueryPlan, RoutedPlan, search_limit
+from api_budget import BudgetExceeded
+from mention_buffer import MentionBuffer
+
+
+class SearchTask:
+    """One independent search call: a compiled query against one subreddit target"""
+
+    def __init__(self, index: int, subreddit: str, group: QueryGroup, entity_type: str = "general"):
+        self.index = index
+        self.subreddit = subreddit
+        self.group = group
+        self.entity_type = entity_type
+        self.resume_state: Optional[Dict[str, Any]] = None  # Pagination checkpoint to continue from
+        self.completed = False  # Set by SearchExecutor once the search ran to the end
+        self.error: Optional[str] = None  # Why the search failed, if it did
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the task, independent of its position in the run"""
+        return f"{self.entity_type}|{self.subreddit}|{self.group.query}"
+
+    def describe(self) -> str:
+        """Short description for progress messages"""
+        return f"r/{self.subreddit} for {len(self.group.keywords)} {self.entity_type} keywords"
+
+
+class SearchEvent:
+    """
+    One step of a streamed search task
+
+    Either the mentions found in one submission together with the pagination
+    state after it, or (with `done` set) the end of the task.
+    """
+
+    __slots__ = ('task', 'state', 'mentions', 'done')
+
+    def __init__(self, task: SearchTask, state: Optional[Dict[str, Any]] = None,
+                 mentions: Optional[MentionBuffer] = None, done: bool = False):
+        self.task = task
+        self.state = state
+        self.mentions = mentions if mentions is not None else MentionBuffer()
+        self.done = done
+
+
+def build_tasks(plans: Dict[str, Union[QueryPlan, RoutedPlan]]) -> List[SearchTask]:
+    """
+    Turn query plans into an ordered list of search tasks
+
+    Args:
+        plans: Query plan (or RoutedPlan) per entity type, e.g. {'plant': plan, 'vessel': plan}
+
+    Returns:
+        List of tasks, indexed in a stable order (entity type, plan part, query group, subreddit)
+    """
+    tasks = []
+    for entity_type, plan in plans.items():
+        for part in plan.parts():
+            for group in part.groups:
+                for subreddit in part.targets:
+                    tasks.append(SearchTask(len(tasks), subreddit, group, entity_type))
+    return tasks
+
+
+class SearchExecutor:
+    """
+    Runs independent search tasks on a bounded pool of worker threads
+
+    PRAW clients are not thread safe, so each worker thread gets its own
+    RedditService from `service_factory`. The factory should hand out services
+    that share one rate limiter (see RedditService.clone) so the pool as a
+    whole stays within Reddit's quota. Progress and result callbacks are
+    always invoked from the calling thread, and the merged results come back
+    in task order no matter which task finished first.
+
+    If the shared API budget runs out, tasks that have not started are
+    cancelled and the results gathered so far (including the partial results
+    of interrupted tasks) are returned; `budget_exhausted` is then set. The
+    same happens, with `stopped` set instead, when `should_stop` returns True.
+    stream() runs tasks the same way but yields their mentions as they are
+    found instead of merging them.
+    """
+
+    def __init__(self, service_factory: Callable[[], Any], max_workers: int = 4):
+        """
+        Initialize the executor
+
+        Args:
+            service_factory: Returns a new RedditService for a worker thread
+            max_workers: Number of searches run concurrently
+        """
+        self.service_factory = service_factory
+        self.max_workers = max(1, max_workers)
+        self._local = threading.local()
+        self.budget_exhausted = False
+        self.stopped = False
+
+    def _service(self):
+        """Return this thread's RedditService, creating it on first use"""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self.service_factory()
+            self._local.service = service
+        return service
+
+    def _run_task(self, task: SearchTask, search_kwargs: Dict[str, Any],
+                  checkpoint_callback: Optional[Callable] = None) -> MentionBuffer:
+        """
+        Run one search task on the current worker thread
+
+        The task is only marked completed when the search ran to the end;
+        errors propagate to the caller and leave it at its last checkpoint.
+        The `limit` search setting applies per search term and subreddit and
+        is scaled to the task's query and target (see search_limit).
+        """
+        limit = search_limit(search_kwargs['limit'], task.group, task.subreddit)
+        search_kwargs = dict(search_kwargs, limit=limit)
+        results = self._service()._make_api_request(
+            subreddit=task.subreddit,
+            keyword=task.group.query,
+            match_keywords=task.group.keywords,
+            resume_state=task.resume_state,
+            checkpoint_callback=(lambda state, results: checkpoint_callback(task, state, results))
+            if checkpoint_callback else None,
+            **search_kwargs
+        )
+        task.completed = True
+        return results
+
+    def run(
+        self,
+        tasks: List[SearchTask],
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        result_callback: Optional[Callable[[SearchTask, MentionBuffer], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        checkpoint_callback: Optional[Callable[[SearchTask, Dict[str, Any], MentionBuffer], None]] = None,
+        **search_kwargs: Any
+    ) -> MentionBuffer:
+        """
+        Run tasks concurrently and merge their results
+
+        Args:
+            tasks: Tasks to run (see build_tasks)
+            progress_callback: Called with (progress, message) as each task completes
+            result_callback: Called with (task, results) as each task completes
+            should_stop: Checked as each task completes; returning True cancels the remaining tasks
+            checkpoint_callback: Called with (task, pagination state, new results) after each
+                submission a task processes. Unlike the other callbacks this runs on the
+                worker thread, so it must be thread safe.
+            **search_kwargs: Passed to RedditService._make_api_request (limit, time_filter, ...)
+
+        Returns:
+            All results as one MentionBuffer, ordered by task index
+        """
+        results_by_task: Dict[int, MentionBuffer] = {}
+        if not tasks:
+            return MentionBuffer()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reddit-search") as pool:
+            futures = {pool.submit(self._run_task, task, search_kwargs, checkpoint_callback): task
+                       for task in tasks}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                task = futures[future]
+                if future.cancelled():
+                    continue
+                try:
+                    task_results = future.result()
+                except BudgetExceeded as e:
+                    task_results = e.partial_results
+                    if not self.budget_exhausted:
+                        self.budget_exhausted = True
+                        for pending in futures:
+                            pending.cancel()
+                        print(f"Stopping run: {str(e)}")
+                except Exception as e:
+                    print(f"Error searching {task.describe()}: {str(e)}")
+                    task.error = str(e)
+                    task_results = MentionBuffer()
+                if not isinstance(task_results, MentionBuffer):
+                    task_results = MentionBuffer(task_results)
+                task_results.fill_entity_type(task.entity_type)
+                results_by_task[task.index] = task_results
+
+                if result_callback:
+                    result_callback(task, task_results)
+                if progress_callback:
+                    progress_callback(completed / len(tasks),
+                                      f"Searched {task.describe()} ({len(task_results)} mentions) "
+                                      f"- Step {completed} of {len(tasks)}")
+                if should_stop and not self.stopped and should_stop():
+                    self.stopped = True
+                    for pending in futures:
+                        pending.cancel()
+                    print("Stopping run: stop requested")
+
+        merged = MentionBuffer()
+        for task in sorted(tasks, key=lambda t: t.index):
+            merged.extend(results_by_task.get(task.index, ()))
+        return merged
+
+    def stream(
+        self,
+        tasks: List[SearchTask],
+        should_stop: Optional[Callable[[], bool]] = None,
+        max_pending: int = 64,
+        **search_kwargs: Any
+    ) -> Iterator[SearchEvent]:
+        """
+        Run tasks concurrently and yield their mentions one submission at a time
+
+        Workers hand each processed submission to a queue holding at most
+        `max_pending` events and wait while it is full, so searching never
+        runs further ahead of the consumer than that and nothing is kept once
+        an event has been consumed. A final event with `done` set follows the
+        last submission of every task that ran; `task.completed` tells whether
+        it ran to the end and `task.error` why it failed. Budget exhaustion and `should_stop` (checked after
+        each event) cancel the tasks that have not started, as in run().
+
+        Args:
+            tasks: Tasks to run (see build_tasks)
+            should_stop: Returning True cancels the remaining tasks
+            max_pending: Events buffered between the workers and the consumer
+            **search_kwargs: Passed to RedditService._make_api_request (limit, time_filter, ...)
+
+        Yields:
+            SearchEvent per processed submission, and one per finished task
+        """
+        if not tasks:
+            return
+        events: "queue.Queue[SearchEvent]" = queue.Queue(maxsize=max(1, max_pending))
+        search_kwargs['keep_results'] = False
+
+        def run_task(task: SearchTask) -> None:
+            try:
+                self._run_task(task, search_kwargs,
+                               lambda task, state, mentions: events.put(SearchEvent(task, state, mentions)))
+            except BudgetExceeded as e:
+                if not self.budget_exhausted:
+                    self.budget_exhausted = True
+                    cancel_pending()
+                    print(f"Stopping run: {str(e)}")
+            except Exception as e:
+                print(f"Error searching {task.describe()}: {str(e)}")
+                task.error = str(e)
+            finally:
+                events.put(SearchEvent(task, done=True))
+
+        def cancel_pending() -> None:
+            for future in futures:
+                future.cancel()
+
+        def finished() -> bool:
+            # Done events are queued before their task's future completes
+            return all(future.done() for future in futures) and events.empty()
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reddit-search")
+        futures = [pool.submit(run_task, task) for task in tasks]
+        try:
+            while not finished():
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                event.mentions.fill_entity_type(event.task.entity_type)
+                yield event
+                if should_stop and not self.stopped and should_stop():
+                    self.stopped = True
+                    print("Stopping run: stop requested")
+                if self.stopped or self.budget_exhausted:
+                    cancel_pending()
+        finally:
+            # If the consumer gave up early, let the running tasks finish without blocking on the queue
+            cancel_pending()
+            while not finished():
+                try:
+                    events.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            pool.shutdown()
@@ -0,0 +1,74 @@
+from typing import List, Dict, Tuple, Iterable
+
+
+class SnippetExtractor:
+    """
+    Builds context snippets from keyword match offsets
+
+    Works on the (keyword, start, end) hits returned by
+    KeywordMatcher.find_all, so texts are not searched a second time. Each
+    hit gets a window of context from the original text (casing intact);
+    windows that overlap are merged into one snippet.
+    """
+
+    def __init__(self, window: int = 100, max_snippets: int = 3, separator: str = " "):
+        """
+        Initialize the extractor
+
+        Args:
+            window: Characters of context around each hit (half before, half after)
+            max_snippets: Maximum number of snippets per keyword
+            separator: Placed between the snippets of one keyword
+        """
+        self.window = window
+        self.max_snippets = max(1, max_snippets)
+        self.separator = separator
+
+    def extract(self, text: str, spans: Iterable[Tuple[int, int]]) -> List[str]:
+        """
+        Build one snippet per hit, merging overlapping windows
+
+        Args:
+            text: Original text the offsets refer to
+            spans: (start, end) offsets of the hits
+
+        Returns:
+            Snippets in text order, at most max_snippets of them. Without any
+            hits the start of the text is returned, as before.
+        """
+        if not isinstance(text, str):
+            return []
+        length = len(text)
+        half = self.window // 2
+        windows: List[List[int]] = []
+        for start, end in sorted(spans):
+            low, high = max(0, start - half), min(length, end + half)
+            if windows and low <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], high)
+            elif len(windows) < self.max_snippets:
+                windows.append([low, high])
+            else:
+                break
+
+        if not windows:
+            return [text[:self.window] + "..." if length > self.window else text]
+        return [("..." if low > 0 else "") + text[low:high] + ("..." if high < length else "")
+                for low, high in windows]
+
+    def snippets_by_keyword(self, text: str, hits: Iterable[Tuple[str, int, int]]) -> Dict[str, str]:
+        """
+        Group hits by keyword and build each keyword's snippet
+
+        Args:
+            text: Original text the offsets refer to
+            hits: (keyword, start, end) tuples from KeywordMatcher.find_all
+
+        Returns:
+            Dictionary from keyword to its snippets joined by the separator,
+            in order of first appearance
+        """
+        spans_by_keyword: Dict[str, List[Tuple[int, int]]] = {}
+        for keyword, start, end in hits:
+            spans_by_keyword.setdefault(keyword, []).append((start, end))
+        return {keyword: self.separator.join(self.extract(text, spans))
+                for keyword, spans in spans_by_keyword.items()}
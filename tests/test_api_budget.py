@@ -0,0 +1,51 @@
+import pytest
+
+from api_budget import ApiBudget, BudgetExceeded, classify_endpoint, estimate_run_cost
+
+
+@pytest.mark.parametrize("path, endpoint", [
+    ("r/Fishing/search", "search"),
+    ("/search/", "search"),
+    ("comments/abc123", "comments"),
+    ("r/Fishing/comments/abc123/some_title", "comments"),
+    ("api/morechildren", "morechildren"),
+    # The subreddit's comment stream is a listing, not a comment tree
+    ("r/Fishing/comments", "listing"),
+    ("r/Fishing+boats/comments/", "listing"),
+    ("r/Fishing/new", "listing"),
+    ("api/info", "other"),
+])
+def test_classify_endpoint(path, endpoint):
+    assert classify_endpoint(path) == endpoint
+
+
+def test_budget_refuses_calls_beyond_it():
+    budget = ApiBudget(max_cost=0.0024, cost_per_1000_calls=0.24)  # 10 calls
+
+    for _ in range(10):
+        budget.charge("r/Fishing/search")
+
+    with pytest.raises(BudgetExceeded):
+        budget.charge("comments/abc123")
+    assert budget.calls_by_endpoint == {"search": 10}
+    assert budget.cost == pytest.approx(0.0024)
+
+
+def test_estimate_counts_pages_and_comment_trees():
+    estimate = estimate_run_cost(planned_calls=3, limit=250, include_comments=True, naive_calls=30,
+                                 cost_per_1000_calls=1.0)
+
+    # 250 posts take 3 listing pages, and every post may cost a comment tree
+    assert estimate['search_calls'] == 9
+    assert estimate['comment_calls'] == 750
+    assert estimate['total_calls'] == 759
+    assert estimate['cost'] == pytest.approx(0.759)
+    assert estimate['naive']['total_calls'] == 30 * 3 + 30 * 250
+
+
+def test_estimate_uses_scaled_limits_per_call():
+    estimate = estimate_run_cost(planned_calls=3, limit=100, include_comments=False,
+                                 search_limits={100: 1, 1000: 2})
+
+    assert estimate['search_calls'] == 1 + 2 * 10
+    assert estimate['comment_calls'] == 0
@@ -0,0 +1,47 @@
+import json
+
+from comment_cache import CommentCache
+
+COMMENTS = [{'id': 'c1', 'author': 'a', 'body': 'inca', 'created_utc': 1.0, 'parent_id': 't3_s1'}]
+
+
+def test_tree_fetched_with_smaller_limit_is_not_served():
+    cache = CommentCache()
+    cache.put('s1', COMMENTS, limit=10)
+
+    assert cache.get('s1', limit=10) == COMMENTS
+    assert cache.get('s1', limit=5) == COMMENTS
+    assert cache.get('s1', limit=50) is None
+    assert cache.get('s1') == COMMENTS
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_limit_survives_on_disk(tmp_path):
+    CommentCache(cache_dir=str(tmp_path)).put('s1', COMMENTS, limit=10)
+
+    cache = CommentCache(cache_dir=str(tmp_path))
+
+    assert cache.get('s1', limit=50) is None
+    assert cache.get('s1', limit=10) == COMMENTS
+
+
+def test_entries_written_without_a_limit_only_serve_lookups_without_one(tmp_path):
+    with open(tmp_path / 's1.json', 'w', encoding='utf-8') as f:
+        json.dump(COMMENTS, f)
+
+    cache = CommentCache(cache_dir=str(tmp_path))
+
+    assert cache.get('s1', limit=1) is None
+    assert cache.get('s1') == COMMENTS
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = CommentCache(max_entries=2)
+    cache.put('s1', COMMENTS)
+    cache.put('s2', COMMENTS)
+    cache.get('s1')
+    cache.put('s3', COMMENTS)
+
+    assert cache.get('s2') is None
+    assert cache.get('s1') == COMMENTS
+    assert cache.get('s3') == COMMENTS
@@ -0,0 +1,88 @@
+import pandas as pd
+
+from data_processor import DataProcessor, encode_refs, split_refs, decode_refs
+from mention_merger import MentionMerger
+from mention_store import MentionStore
+
+
+def plants(*names):
+    return pd.DataFrame({'name': list(names), 'owner': ['Inca Foods'] * len(names)})
+
+
+def build(df):
+    return DataProcessor().build_entity_index(df, name_col='name', owner_col='owner')
+
+
+def test_refs_lead_back_to_source_rows():
+    index = build(plants("Pacific Harvester", "Kodiak Star"))
+
+    [ref] = index.refs("kodiak star")
+
+    assert index.resolve(ref) == (1, 'name')
+    assert index.entity(ref)['name'] == "Kodiak Star"
+    assert index.refs("inca") == (1, 3)
+
+
+def test_encoded_refs_name_their_dataset():
+    index = build(plants("Pacific Harvester", "Kodiak Star"))
+
+    encoded = index.ref_map(["kodiak"])["kodiak"]
+
+    assert split_refs(encoded) == (index.fingerprint, [2])
+    assert decode_refs(encoded, index.fingerprint) == [2]
+    assert decode_refs(encoded, "another") == []
+    assert split_refs("12,57") == (None, [12, 57])
+    assert encode_refs([], index.fingerprint) == ""
+
+
+def test_fingerprint_follows_the_keyword_columns():
+    first = build(plants("Pacific Harvester", "Kodiak Star"))
+    edited = plants("Pacific Harvester", "Kodiak Star").assign(flag=["US", "US"])
+    reordered = build(plants("Kodiak Star", "Pacific Harvester"))
+
+    assert build(edited).fingerprint == first.fingerprint
+    assert reordered.fingerprint != first.fingerprint
+
+
+def test_memoized_index_serves_current_rows():
+    df = plants("Pacific Harvester", "Kodiak Star")
+    build(df)
+    edited = df.assign(flag=["US", "NO"])
+
+    index = build(edited)
+
+    assert index.entity(index.refs("kodiak")[0])['flag'] == "NO"
+
+
+def test_stored_refs_are_ignored_after_another_csv_is_loaded(tmp_path):
+    store = MentionStore(str(tmp_path / "mentions.db"))
+    first = build(plants("Pacific Harvester", "Kodiak Star"))
+    mention = {'id': 'p1', 'keyword': 'kodiak star', 'entity_type': 'plant', 'title': 'Kodiak Star',
+               'datetime': '2024-01-01T00:00:00', 'source': 'post', 'subreddit': 'Fishing'}
+    store.upsert_mentions([mention], entity_refs={'plant': first.ref_map()})
+
+    refs = store.mention_entity_refs('plant')
+    assert first.group_mentions(refs)['name'].tolist() == ["Kodiak Star"]
+
+    second = build(plants("Kodiak Star", "Bering Sea Processor"))
+    assert second.group_mentions(refs).empty
+
+    # A search without a CSV loaded keeps the refs, still tied to the first dataset
+    store.upsert_mentions([mention])
+    assert first.group_mentions(store.mention_entity_refs('plant'))['name'].tolist() == ["Kodiak Star"]
+    store.close()
+
+
+def test_merger_replaces_refs_from_another_dataset():
+    first = build(plants("Pacific Harvester", "Kodiak Star"))
+    second = build(plants("Kodiak Star", "Bering Sea Processor"))
+    merger = MentionMerger()
+    base = {'id': 'p1', 'entity_type': 'plant', 'snippet': 'Kodiak Star'}
+    merger.add(dict(base, keyword='kodiak', entity_refs=first.ref_map()['kodiak']))
+    merger.add(dict(base, keyword='star', entity_refs=first.ref_map()['star']))
+    merger.add(dict(base, keyword='kodiak star', entity_refs=second.ref_map()['kodiak star']))
+
+    [record] = merger.records()
+
+    assert record['entity_refs'] == second.ref_map()['kodiak star']
+    assert second.group_mentions([('p1', record['entity_refs'])])['name'].tolist() == ["Kodiak Star"]
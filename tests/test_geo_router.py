@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+from geo_router import GeoRouter, haversine_km
+
+TABLE = """subreddit,scope,name,country,latitude,longitude,radius_km
+peru,country,,Peru,,,
+chile,country,,Chile,,,
+lima,city,Lima,Peru,-12.05,-77.04,60
+Callao,city,Callao,Peru,-12.06,-77.15,20
+chimbote,city,Chimbote,Peru,-9.07,-78.59,40
+Arequipa,region,Arequipa,Peru,,,
+"""
+
+
+@pytest.fixture
+def router(tmp_path):
+    path = tmp_path / "local_subreddits.csv"
+    path.write_text(TABLE)
+    return GeoRouter(str(path))
+
+
+def test_haversine_distance():
+    assert haversine_km(0, 0, 0, 1) == pytest.approx(111.2, rel=0.01)
+    assert haversine_km(-12.05, -77.04, -12.05, -77.04) == 0
+
+
+def test_coordinates_find_every_area_containing_them_nearest_first(router):
+    # Callao port: inside both Callao's and Lima's radius, closer to Callao's centre
+    assert router.nearby(-12.06, -77.14) == ["Callao", "lima"]
+    assert router.nearby(-9.10, -78.55) == ["chimbote"]
+    assert router.nearby(-16.4, -71.5) == []
+
+
+def test_local_subreddits_fall_back_to_names_and_add_the_country(router):
+    assert router.local_subreddits(country="Peru", latitude=-12.06, longitude=-77.14) == ["Callao", "lima", "peru"]
+    # Without coordinates, cities and regions are matched by name
+    assert router.local_subreddits(country=" peru ", province="Arequipa", city="Unknown") == ["Arequipa", "peru"]
+    assert router.local_subreddits(country="Chile", latitude=float("nan"), longitude=-70.0) == ["chile"]
+    assert router.local_subreddits(country="Norway") == []
+
+
+def test_route_keywords_follows_refs_to_plant_rows(router):
+    plants = pd.DataFrame({
+        'Plant Name': ["Callao Fish Meal", "Chimbote Plant", "Andes Freeze"],
+        'Owner': ["Inca Foods", "Inca Foods", "Sierra SA"],
+        'Country': ["Peru", "Peru", "Chile"],
+        'Latitude': [-12.06, "-9.10", None],
+        'Longitude': [-77.14, "-78.55", None],
+    })
+    index = DataProcessor().build_entity_index(plants, name_col='Plant Name', owner_col='Owner')
+
+    routes = router.route_keywords(plants, index, ["inca foods", "andes freeze", "unknown"])
+
+    # An owner's keyword collects the areas of all its plants
+    assert routes["inca foods"] == ["Callao", "lima", "peru", "chimbote"]
+    assert routes["andes freeze"] == ["chile"]
+    assert "unknown" not in routes
@@ -0,0 +1,132 @@
+import job_runner
+from job_runner import (JobStore, COMPLETED, INTERRUPTED, QUEUED, RUNNING, STREAM, credentials_fingerprint,
+                        ensure_worker_running, is_resumable, remaining_budget)
+from mention_store import MentionStore
+
+CREDENTIALS = {"client_id": "id", "client_secret": "secret"}
+
+
+def finished_job(tmp_path, budget_usd=5.0, spent=5.0):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.submit({"budget_usd": budget_usd, "credentials_fingerprint": credentials_fingerprint(CREDENTIALS)})
+    store.claim_next()
+    store.finish(job_id, COMPLETED, summary={"api_cost": spent, "budget_exhausted": True})
+    return store, job_id
+
+
+def test_job_with_its_budget_used_up_needs_a_new_budget_to_resume(tmp_path):
+    store, job_id = finished_job(tmp_path)
+
+    assert remaining_budget(store.get_job(job_id)) == 0
+    assert not store.resume(job_id, CREDENTIALS)
+    assert store.get_job(job_id)["status"] == COMPLETED
+    # A budget that doesn't cover more than what was spent is refused too
+    assert not store.resume(job_id, CREDENTIALS, budget_usd=4.0)
+
+    assert store.resume(job_id, CREDENTIALS, budget_usd=8.0)
+    job = store.get_job(job_id)
+    assert job["status"] == QUEUED
+    assert job["params"]["budget_usd"] == 8.0
+    assert remaining_budget(job) == 3.0
+    store.close()
+
+
+def test_job_with_budget_left_resumes_with_the_rest(tmp_path):
+    store, job_id = finished_job(tmp_path, budget_usd=5.0, spent=2.0)
+
+    assert store.resume(job_id, CREDENTIALS)
+    assert remaining_budget(store.get_job(job_id)) == 3.0
+    store.close()
+
+
+OTHER_CREDENTIALS = {"client_id": "other", "client_secret": "secret"}
+
+
+def test_workers_only_take_jobs_submitted_with_their_credentials(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    mine, theirs = credentials_fingerprint(CREDENTIALS), credentials_fingerprint(OTHER_CREDENTIALS)
+    their_job = store.submit({"credentials_fingerprint": theirs})
+    my_job = store.submit({"credentials_fingerprint": mine})
+
+    assert store.queued_count(mine) == 1
+    assert store.claim_next(mine)["id"] == my_job
+    assert store.claim_next(mine) is None
+    assert store.get_job(their_job)["status"] == QUEUED
+
+    # Each set of credentials has its own worker slot
+    assert store.register_worker(100, theirs)
+    assert store.worker_alive(theirs)
+    assert not store.worker_alive(mine)
+    # A new worker only interrupts the running jobs of its own credentials
+    assert store.get_job(my_job)["status"] == RUNNING
+    assert store.register_worker(200, mine)
+    assert not store.register_worker(300, mine)
+    assert store.get_job(my_job)["status"] == INTERRUPTED
+    store.close()
+
+
+def test_a_worker_is_started_per_set_of_credentials(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    started = []
+    monkeypatch.setattr(job_runner, "WORKER_LOG_PATH", str(tmp_path / "worker.log"))
+    monkeypatch.setattr(job_runner.subprocess, "Popen", lambda args, env, **kwargs: started.append(env))
+
+    store.register_worker(100, credentials_fingerprint(CREDENTIALS))
+
+    assert not ensure_worker_running(store, credentials=CREDENTIALS)
+    assert ensure_worker_running(store, credentials=OTHER_CREDENTIALS)
+    assert [env[job_runner.CLIENT_ID_ENV] for env in started] == ["other"]
+    store.close()
+
+
+class FakeStreamService:
+    """Stands in for RedditService: 'streams' one batch of mentions and reports progress"""
+
+    def __init__(self, **kwargs):
+        self.api_budget = kwargs["api_budget"]
+
+    def stream_mentions(self, keyword_sets, subreddits, sink, include_comments, duration, should_stop,
+                        progress_callback):
+        sink([{"id": "p1", "keyword": "inca", "entity_type": "vessel", "title": "The Inca", "author": "a",
+               "datetime": "2024-01-01T00:00:00", "permalink": "/p1", "snippet": "The Inca", "source": "post",
+               "subreddit": "boats"}])
+        progress_callback(0.5, "Found 1 new post mentions")
+        return {"items_scanned": 3, "mentions_found": 1, "budget_exhausted": False, "stream_errors": 0}
+
+
+def test_stream_jobs_run_in_the_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_runner, "RedditService", FakeStreamService)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    mention_store = MentionStore(str(tmp_path / "mentions.db"))
+    job_id = store.submit({"kind": STREAM, "credentials_fingerprint": credentials_fingerprint(CREDENTIALS),
+                           "user_agent": "test", "keywords": {"vessel": ["inca"]}, "subreddits": ["boats"],
+                           "include_comments": True, "duration_minutes": 10, "budget_usd": 5.0,
+                           "cost_per_1000_calls": 0.24})
+    worker = job_runner.JobWorker(store, mention_store, credentials=CREDENTIALS)
+
+    worker.run_job(store.claim_next(worker.fingerprint))
+
+    job = store.get_job(job_id)
+    assert job["status"] == COMPLETED
+    assert job["summary"]["mentions_found"] == {"vessel": 1}
+    assert job["summary"]["items_scanned"] == 3
+    assert job["completed_steps"] == 5 and job["total_steps"] == 10
+    assert [m["id"] for m in mention_store.query_mentions("vessel")] == ["p1"]
+    assert not is_resumable(job)
+    store.close()
+    mention_store.close()
+
+
+def test_checkpoints_keep_the_last_cursor_and_count_mentions(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.submit({})
+
+    store.checkpoint_task(job_id, "task-1", "vessel", {'after': 't3_a', 'seen': 1, 'newest_seen': 5.0}, 2)
+    store.checkpoint_task(job_id, "task-1", "vessel", {'after': 't3_b', 'seen': 2, 'newest_seen': 5.0}, 1)
+    store.checkpoint_task(job_id, "task-2", "plant", None, 0, done=True)
+
+    checkpoints = store.get_checkpoints(job_id)
+    assert checkpoints["task-1"] == {'entity_type': 'vessel', 'done': False, 'mentions': 3,
+                                     'cursor': {'after': 't3_b', 'seen': 2, 'newest_seen': 5.0}}
+    assert checkpoints["task-2"]["done"]
+    store.close()
@@ -0,0 +1,38 @@
+from keyword_matcher import KeywordMatcher
+
+
+def test_matches_whole_words_only():
+    matcher = KeywordMatcher(["inca"])
+
+    assert matcher.match("Saw the Inca's boat today") == ["inca"]
+    assert matcher.match("The incas and pincay") == []
+    assert matcher.match("inca_2 is not inca") == ["inca"]
+
+
+def test_offsets_point_into_the_original_text():
+    text = "Docked next to PACIFIC HARVESTER, then Pacific."
+    matcher = KeywordMatcher(["pacific harvester", "pacific", "harvester"])
+
+    hits = matcher.find_all(text)
+
+    assert [(keyword, text[start:end]) for keyword, start, end in hits] == [
+        ("pacific", "PACIFIC"),
+        ("pacific harvester", "PACIFIC HARVESTER"),
+        ("harvester", "HARVESTER"),
+        ("pacific", "Pacific"),
+    ]
+
+
+def test_keyword_at_text_boundaries_and_punctuation():
+    matcher = KeywordMatcher(["star"])
+
+    assert matcher.match("star") == ["star"]
+    assert matcher.match("(star)") == ["star"]
+    assert matcher.match("starfish stars") == []
+
+
+def test_duplicates_and_blanks_are_ignored():
+    matcher = KeywordMatcher(["Star", "star ", "", "  "])
+
+    assert len(matcher) == 1
+    assert matcher.match("A STAR is born") == ["star"]
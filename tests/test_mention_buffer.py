@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from mention_buffer import MentionBuffer
+from mention_store import MentionStore, MENTION_COLUMNS, MERGED_COLUMNS
+
+
+def add(buffer, id, keyword, created_utc, subreddit="boats", **extra):  # noqa: A002
+    buffer.add(id=id, keyword=keyword, title=f"post {id}", author="someone", created_utc=created_utc,
+               permalink=f"/r/{subreddit}/{id}", snippet=f"... {keyword} ...", source="title",
+               subreddit=subreddit, **extra)
+
+
+def test_dataframe_matches_the_mention_dicts():
+    buffer = MentionBuffer()
+    add(buffer, "a", "inca", 1_700_000_000.0)
+    add(buffer, "b", "pacific", 1_700_000_100.0, entity_type="vessel")
+    add(buffer, "c", "inca", 1_700_000_200.0, subreddit="fishing")
+
+    df = buffer.to_dataframe(["id", "keyword", "entity_type", "datetime", "snippet", "subreddit"])
+
+    assert list(df.columns) == ["id", "keyword", "entity_type", "datetime", "snippet", "subreddit"]
+    assert df["keyword"].dtype == "category"
+    assert list(df["keyword"].cat.categories) == ["inca", "pacific"]
+    for row, mention in zip(df.to_dict("records"), buffer):
+        assert row["id"] == mention["id"]
+        assert row["keyword"] == mention["keyword"]
+        assert row["datetime"] == mention["datetime"]
+        assert row["subreddit"] == mention["subreddit"]
+    # Missing categorical values are left out of the dicts and NaN in the DataFrame
+    assert df["entity_type"].isna().tolist() == [True, False, True]
+
+
+def test_timestamps_are_shared_until_the_buffer_changes():
+    buffer = MentionBuffer()
+    add(buffer, "a", "inca", 1_700_000_000.0)
+    df = buffer.to_dataframe(["id", "created_utc"])
+
+    assert np.shares_memory(df["created_utc"].to_numpy(), np.frombuffer(buffer._created))
+
+    # Growing the buffer must not invalidate (or fail because of) the view
+    add(buffer, "b", "inca", 1_700_000_100.0)
+    assert list(df["created_utc"]) == [1_700_000_000.0]
+    assert len(buffer.to_dataframe()) == 2
+
+
+def test_clear_keeps_the_stored_strings():
+    buffer = MentionBuffer()
+    add(buffer, "a", "inca", 1_700_000_000.0)
+    first = buffer[0:]
+    buffer.clear()
+    add(buffer, "b", "inca", 1_700_000_100.0)
+
+    assert len(buffer) == 1
+    assert buffer[0]["id"] == "b"
+    assert buffer._categories is first._categories
+    assert len(buffer._categories["keyword"].values) == 1
+    assert first[0]["id"] == "a"
+
+
+@pytest.mark.parametrize("merged", [False, True])
+def test_store_export_round_trips(tmp_path, merged):
+    store = MentionStore(str(tmp_path / "mentions.db"))
+    mentions = MentionBuffer()
+    add(mentions, "a", "pacific harvester", 1_700_000_000.0)
+    add(mentions, "a", "pacific", 1_700_000_000.0)
+    add(mentions, "b", "inca", 1_700_000_500.0)
+    store.upsert_mentions(mentions, entity_type="vessel")
+
+    columns = MERGED_COLUMNS if merged else MENTION_COLUMNS
+    expected = store.query_mentions("vessel", merged=merged)
+    df = store.query_buffer("vessel", merged=merged, batch_size=1).to_dataframe(columns)
+
+    assert list(df.columns) == columns
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    assert rows == expected
+    store.close()
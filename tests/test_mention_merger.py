@@ -0,0 +1,89 @@
+from mention_merger import MentionMerger, snippet_score, split_keywords
+
+
+def mention(keyword, snippet, entity_refs=None, id="abc", entity_type="vessel", **extra):  # noqa: A002
+    return dict(id=id, entity_type=entity_type, keyword=keyword, snippet=snippet,
+                entity_refs=entity_refs, title="Post", **extra)
+
+
+def test_snippet_showing_more_keywords_wins():
+    merger = MentionMerger()
+    merger.add(mention("pacific", "...the Pacific was calm..."))
+    merger.add(mention("pacific harvester", "...saw Pacific Harvester off the Pacific coast..."))
+    merger.add(mention("harvester", "...a harvester..."))
+
+    [record] = merger.records()
+
+    assert record['snippet'] == "...saw Pacific Harvester off the Pacific coast..."
+
+
+def test_tie_goes_to_snippet_showing_the_longest_keyword():
+    assert snippet_score("Pacific Harvester", ["pacific", "pacific harvester"]) == (2, 17)
+    assert snippet_score("Pacific", ["pacific", "pacific harvester"]) == (1, 7)
+
+    merger = MentionMerger()
+    merger.add(mention("inca", "the Inca"))
+    merger.add(mention("pacific harvester", "the Pacific Harvester"))
+
+    [record] = merger.records()
+
+    assert record['snippet'] == "the Pacific Harvester"
+
+
+def test_equal_score_keeps_the_first_snippet():
+    merger = MentionMerger()
+    merger.add(mention("inca", "first Inca"))
+    merger.add(mention("inca", "second Inca"))
+
+    assert merger.records()[0]['snippet'] == "first Inca"
+
+
+def test_keyword_is_longest_and_keywords_keep_arrival_order():
+    merger = MentionMerger()
+    merger.add(mention("pacific", "Pacific Harvester"))
+    merger.add(mention("pacific harvester", "Pacific Harvester"))
+    merger.add(mention("harvester", "Pacific Harvester"))
+    merger.add(mention("pacific", "Pacific Harvester"))
+
+    [record] = merger.records()
+
+    assert record['keyword'] == "pacific harvester"
+    assert split_keywords(record['keywords']) == ["pacific", "pacific harvester", "harvester"]
+
+
+def test_entity_refs_are_unioned_and_sorted():
+    merger = MentionMerger()
+    merger.add(mention("pacific", "Pacific", entity_refs="12,3"))
+    merger.add(mention("harvester", "Harvester", entity_refs="7,12"))
+    merger.add(mention("inca", "Inca"))
+
+    assert merger.records()[0]['entity_refs'] == "3,7,12"
+
+
+def test_records_are_kept_per_entity_type_and_id():
+    merger = MentionMerger()
+    merger.add(mention("inca", "Inca", id="a"))
+    merger.add(mention("inca", "Inca", id="b"))
+    merger.add(mention("inca", "Inca", id="a", entity_type="plant"))
+
+    assert len(merger) == 3
+    assert all(record['entity_refs'] is None for record in merger.records())
+
+
+def test_merged_records_can_be_merged_again():
+    first = MentionMerger()
+    first.add(mention("pacific", "Pacific", entity_refs="1"))
+    first.add(mention("harvester", "Harvester", entity_refs="2"))
+
+    second = MentionMerger()
+    for record in first.records():
+        second.add(record)
+    second.add(mention("pacific harvester", "Pacific Harvester", entity_refs="5", author="late"))
+
+    [record] = second.records()
+
+    assert split_keywords(record['keywords']) == ["pacific", "harvester", "pacific harvester"]
+    assert record['keyword'] == "pacific harvester"
+    assert record['entity_refs'] == "1,2,5"
+    assert record['snippet'] == "Pacific Harvester"
+    assert record['author'] == "late"
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from keyword_matcher import KeywordMatcher
+from mention_pipeline import fetch_submissions, fetch_comments, match_items, build_mentions
+from snippet_extractor import SnippetExtractor
+
+
+def submission(id, title, created_utc, selftext=""):  # noqa: A002
+    return SimpleNamespace(id=id, title=title, selftext=selftext, author="skipper", created_utc=created_utc,
+                           permalink=f"/r/boats/comments/{id}", fullname=f"t3_{id}",
+                           subreddit=SimpleNamespace(display_name="boats"))
+
+
+def test_stages_build_post_and_comment_mentions():
+    listing = [submission("a", "Pacific Harvester in port", 300.0),
+               submission("b", "Nothing here", 200.0, selftext="but the inca was out")]
+    comments = {"a": [], "b": [{"id": "c1", "body": "Saw the Inca too", "author": "deckhand",
+                                "created_utc": 250.0}]}
+    matcher = KeywordMatcher(["pacific harvester", "inca"])
+
+    items = fetch_comments(fetch_submissions(listing), lambda s: comments[s.id])
+    items = list(build_mentions(match_items(items, matcher), SnippetExtractor()))
+
+    assert [(m["id"], m["keyword"], m["source"]) for m in items[0].mentions] == [
+        ("a", "pacific harvester", "post")]
+    # Body hits are kept on the item but only comments and titles make mentions
+    assert [hit[0] for hit in items[1].body_hits] == ["inca"]
+    assert [(m["id"], m["keyword"], m["source"], m["author"]) for m in items[1].mentions] == [
+        ("c1", "inca", "comment", "deckhand")]
+    assert items[1].mentions[0]["created_utc"] == 250.0
+
+
+def test_listing_stops_at_the_watermark_before_fetching_comments():
+    listing = [submission("new", "inca", 300.0), submission("old", "inca", 100.0),
+               submission("older", "inca", 50.0)]
+    stopped_at, fetched = [], []
+
+    def get_comments(s):
+        fetched.append(s.id)
+        return []
+
+    items = fetch_comments(fetch_submissions(listing, watermark=100.0, on_watermark=stopped_at.append),
+                           get_comments)
+
+    assert [item.submission.id for item in items] == ["new"]
+    assert fetched == ["new"]
+    assert [s.id for s in stopped_at] == ["old"]
+
+
+def test_stages_are_lazy():
+    pulled = []
+
+    def listing():
+        for i in range(3):
+            pulled.append(i)
+            yield submission(str(i), "inca", 100.0 - i)
+
+    items = build_mentions(match_items(fetch_submissions(listing()), KeywordMatcher(["inca"])),
+                           SnippetExtractor())
+
+    next(items)
+    assert pulled == [0]
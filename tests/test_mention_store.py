@@ -0,0 +1,87 @@
+from mention_merger import split_keywords
+from mention_store import MentionStore, WatermarkStore, KeywordStatsStore
+
+
+def mention(id, keyword, snippet="...", datetime="2024-01-01T10:00:00", subreddit="boats"):  # noqa: A002
+    return dict(id=id, keyword=keyword, title="Post", author="skipper", datetime=datetime,
+                permalink=f"/r/{subreddit}/{id}", snippet=snippet, source="post", subreddit=subreddit)
+
+
+def test_upserting_the_same_mentions_again_adds_no_rows(tmp_path):
+    store = MentionStore(str(tmp_path / "mentions.db"))
+    mentions = [mention("a", "inca"), mention("b", "inca"), mention("b", "pacific")]
+
+    assert store.upsert_mentions(mentions, entity_type="vessel") == 3
+    store.upsert_mentions(mentions, entity_type="vessel")
+
+    assert store.count_mentions("vessel") == 3
+    assert store.count_mentions("vessel", merged=True) == 2
+    store.close()
+
+
+def test_upsert_updates_the_existing_row(tmp_path):
+    store = MentionStore(str(tmp_path / "mentions.db"))
+    store.upsert_mentions([mention("a", "inca", snippet="old")], entity_type="vessel")
+    store.upsert_mentions([mention("a", "inca", snippet="new")], entity_type="vessel")
+
+    [row] = store.query_mentions("vessel")
+    assert row["snippet"] == "new"
+    store.close()
+
+
+def test_hits_on_one_post_merge_across_writes(tmp_path):
+    store = MentionStore(str(tmp_path / "mentions.db"))
+    store.upsert_mentions([mention("a", "pacific", snippet="the Pacific")], entity_type="vessel")
+    store.upsert_mentions([mention("a", "pacific harvester", snippet="the Pacific Harvester")],
+                          entity_type="vessel")
+    # The same id under another entity type is a separate merged row
+    store.upsert_mentions([mention("a", "pacific")], entity_type="plant")
+
+    [merged] = store.query_mentions("vessel", merged=True)
+    assert merged["keyword"] == "pacific harvester"
+    assert set(split_keywords(merged["keywords"])) == {"pacific", "pacific harvester"}
+    assert merged["snippet"] == "the Pacific Harvester"
+    assert store.count_mentions("plant", merged=True) == 1
+    store.close()
+
+
+def test_filters_and_rebuilt_merged_rows(tmp_path):
+    store = MentionStore(str(tmp_path / "mentions.db"))
+    store.upsert_mentions([mention("a", "inca", datetime="2024-01-01T10:00:00"),
+                           mention("b", "inca", datetime="2024-03-01T10:00:00", subreddit="fishing"),
+                           mention("b", "pacific", datetime="2024-03-01T10:00:00", subreddit="fishing")],
+                          entity_type="vessel")
+    before = store.query_mentions("vessel", merged=True)
+
+    store.rebuild_merged()
+
+    assert store.query_mentions("vessel", merged=True) == before
+    assert [row["id"] for row in store.query_mentions("vessel", since="2024-02-01")] == ["b", "b"]
+    assert [row["keyword"] for row in store.query_mentions("vessel", subreddit="fishing")] == ["inca", "pacific"]
+    assert store.distinct_values("vessel", "keyword") == ["inca", "pacific"]
+    store.close()
+
+
+def test_watermarks_never_move_backwards(tmp_path):
+    store = WatermarkStore(str(tmp_path / "mentions.db"))
+
+    assert store.get("boats", "inca") is None
+    store.set("boats", "inca", 500.0)
+    store.set("boats", "inca", 300.0)
+    store.set("fishing", "inca", 100.0)
+
+    assert store.get("boats", "inca") == 500.0
+    assert store.get("fishing", "inca") == 100.0
+    assert store.get("boats", "pacific") is None
+    store.close()
+
+
+def test_keyword_stats_accumulate_per_search(tmp_path):
+    store = KeywordStatsStore(str(tmp_path / "mentions.db"))
+    store.record({'inca': {'calls': 1.5, 'raw_hits': 10, 'retained_hits': 4},
+                  'pacific': {'calls': 0.5, 'raw_hits': 2, 'retained_hits': 0}})
+    store.record({'inca': {'calls': 1.0, 'raw_hits': 5, 'retained_hits': 1}})
+
+    assert store.get(["inca"]) == {'inca': {'searches': 2, 'calls': 2.5, 'raw_hits': 15, 'retained_hits': 5}}
+    assert set(store.get()) == {"inca", "pacific"}
+    store.close()
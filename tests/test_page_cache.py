@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import page_cache
+from page_cache import PageCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(page_cache.time, "time", clock)
+    return clock
+
+
+def object_files(cache_dir):
+    return sorted(name for _, _, names in os.walk(os.path.join(cache_dir, "objects")) for name in names)
+
+
+def test_least_recently_used_pages_are_evicted_at_capacity(tmp_path, clock):
+    cache = PageCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"  # Now b is the least recently used
+
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.stats() == {'urls': 2, 'objects': 2, 'bytes': 8}
+    assert len(object_files(str(tmp_path))) == 2
+    cache.close()
+
+
+def test_identical_texts_are_stored_once(tmp_path, clock):
+    cache = PageCache(str(tmp_path), max_bytes=100)
+    cache.put("a", "same text")
+    cache.put("b", "same text")
+
+    assert cache.stats() == {'urls': 2, 'objects': 1, 'bytes': 9}
+
+    # Replacing one URL's text keeps the object the other still uses
+    cache.put("a", "new text")
+    assert cache.get("b") == "same text"
+    assert cache.stats() == {'urls': 2, 'objects': 2, 'bytes': 17}
+    cache.close()
+
+
+def test_expired_pages_are_misses_and_dropped(tmp_path, clock):
+    cache = PageCache(str(tmp_path), ttl_seconds=100)
+    cache.put("a", "old")
+
+    clock.now += 200
+    assert cache.get("a") is None
+    cache.put("b", "fresh")
+
+    assert cache.stats() == {'urls': 1, 'objects': 1, 'bytes': 5}
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.close()
+
+
+def test_size_is_restored_when_reopened(tmp_path, clock):
+    cache = PageCache(str(tmp_path))
+    cache.put("a", "aaaa")
+    cache.put("b", "aaaa")
+    cache.close()
+
+    reopened = PageCache(str(tmp_path))
+    assert reopened.stats()['bytes'] == 4
+    assert reopened.get("b") == "aaaa"
+    reopened.close()
@@ -0,0 +1,104 @@
+from query_planner import (QueryPlanner, QueryGroup, search_limit, REDDIT_MAX_QUERY_LENGTH,
+                           REDDIT_MAX_SEARCH_RESULTS)
+
+
+def stats(searches=5, calls=10.0, raw_hits=50.0, retained_hits=5):
+    return {'searches': searches, 'calls': calls, 'raw_hits': raw_hits, 'retained_hits': retained_hits}
+
+
+def test_terms_are_quoted_and_or_joined():
+    [group] = QueryPlanner().compile_queries(["Inca", "star ", "inca", ""])
+
+    assert group.query == '"inca" OR "star"'
+    assert group.terms == ["inca", "star"]
+    assert group.keywords == ["inca", "star"]
+
+
+def test_queries_stay_within_the_length_limit():
+    keywords = [f"keyword number {i:03d}" for i in range(100)]
+
+    groups = QueryPlanner(max_terms_per_query=100).compile_queries(keywords)
+
+    assert all(len(group.query) <= REDDIT_MAX_QUERY_LENGTH for group in groups)
+    assert sorted(term for group in groups for term in group.terms) == keywords
+    # 20 character phrases plus " OR " fit 21 to a query
+    assert [len(group.terms) for group in groups] == [21, 21, 21, 21, 16]
+
+
+def test_first_fit_decreasing_fills_gaps_with_short_terms():
+    planner = QueryPlanner(max_query_length=20)
+
+    groups = planner.compile_queries(["aaaaaaaaaa", "bbbbbbbbb", "c", "d"])
+
+    # Longest first; "c" fits behind the longest term, "d" only behind the second
+    assert [group.query for group in groups] == ['"aaaaaaaaaa" OR "c"', '"bbbbbbbbb" OR "d"']
+
+
+def test_terms_per_query_are_capped():
+    keywords = [f"k{i}" for i in range(25)]
+
+    groups = QueryPlanner(max_terms_per_query=10).compile_queries(keywords)
+
+    assert [len(group.terms) for group in groups] == [10, 10, 5]
+
+
+def test_keyword_longer_than_a_query_is_skipped():
+    groups = QueryPlanner(max_query_length=10).compile_queries(["short", "much too long"])
+
+    assert [group.terms for group in groups] == [["short"]]
+
+
+def test_phrases_are_searched_on_their_own_by_default():
+    groups = QueryPlanner().compile_queries(["pacific", "pacific harvester"])
+
+    assert [group.terms for group in groups] == [["pacific harvester", "pacific"]]
+
+
+def test_exhaustive_word_covers_phrases_containing_it():
+    [group] = QueryPlanner().compile_queries(["pacific", "pacific harvester", "north star"],
+                                             exhaustive_words=["Pacific"])
+
+    assert group.terms == ["north star", "pacific"]
+    assert group.keywords == ["north star", "pacific", "pacific harvester"]
+
+
+def test_plan_only_lets_uncapped_words_cover_phrases():
+    keywords = ["pacific", "pacific harvester", "star", "north star"]
+    keyword_stats = {
+        'pacific': stats(searches=4, raw_hits=40),    # 10 posts per search: below the limit
+        'star': stats(searches=4, raw_hits=400),      # 100 posts per search: capped
+    }
+
+    [group] = QueryPlanner().plan(keywords, ["Fishing"], keyword_stats=keyword_stats, limit=50).groups
+
+    assert sorted(group.terms) == ["north star", "pacific", "star"]
+    assert "pacific harvester" in group.keywords
+
+
+def test_plan_needs_history_and_a_limit_to_drop_phrases():
+    keywords = ["pacific", "pacific harvester"]
+
+    little_history = {'pacific': stats(calls=1.0, raw_hits=1)}
+    plan = QueryPlanner().plan(keywords, ["Fishing"], keyword_stats=little_history, limit=50)
+    assert len(plan.groups[0].terms) == 2
+
+    plan = QueryPlanner().plan(keywords, ["Fishing"], keyword_stats={'pacific': stats(raw_hits=1)})
+    assert len(plan.groups[0].terms) == 2
+
+
+def test_search_limit_scales_with_terms_and_subreddits_up_to_reddits_cap():
+    group = QueryGroup('"a" OR "b"', ["a", "b"], ["a", "b"])
+
+    assert search_limit(100, group, "Fishing") == 200
+    assert search_limit(100, group, "Fishing+Boats") == 400
+    assert search_limit(400, group, "Fishing+Boats") == REDDIT_MAX_SEARCH_RESULTS
+
+
+def test_plan_counts_calls_per_target():
+    plan = QueryPlanner(max_terms_per_query=2).plan(["a", "b", "c"], ["One", "Two"], combine_subreddits=True)
+
+    assert plan.targets == ["One+Two"]
+    assert plan.planned_calls == 2
+    assert plan.naive_calls == 6
+    assert plan.search_limits(100) == {400: 1, 200: 1}
+    assert plan.per_keyword_limit(400) == 250
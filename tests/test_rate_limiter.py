@@ -0,0 +1,79 @@
+from typing import Tuple
+
+from rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Clock that only moves when the limiter sleeps or the test advances it"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_limiter(**kwargs) -> Tuple[RateLimiter, FakeClock]:
+    clock = FakeClock()
+    return RateLimiter(clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def test_burst_then_paced_by_rate():
+    limiter, clock = make_limiter(requests_per_minute=60, burst=2)
+
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 1.0
+    assert clock.now == 1.0
+
+
+def test_waits_for_reset_when_quota_is_spent():
+    limiter, clock = make_limiter(requests_per_minute=60, burst=5)
+
+    limiter.update_from_headers({'X-Ratelimit-Remaining': '0', 'X-Ratelimit-Reset': '10'})
+
+    assert limiter.acquire() == 10.0
+    # The new window starts with a full bucket
+    for _ in range(4):
+        assert limiter.acquire() == 0
+    assert clock.now == 10.0
+    assert limiter.total_wait == 10.0
+
+
+def test_remaining_quota_is_spent_without_waiting():
+    limiter, _ = make_limiter(requests_per_minute=60, burst=1)
+
+    limiter.update_from_headers({'x-ratelimit-remaining': '3', 'x-ratelimit-reset': '30'})
+
+    assert [limiter.acquire() for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire() == 30.0
+
+
+def test_429_waits_for_retry_after():
+    limiter, clock = make_limiter(requests_per_minute=60, burst=5)
+
+    limiter.on_rate_limited(retry_after=5)
+
+    assert limiter.acquire() == 5.0
+    assert limiter.acquire() == 0
+    assert clock.now == 5.0
+
+
+def test_429_without_retry_after_keeps_known_reset():
+    limiter, _ = make_limiter(requests_per_minute=60, burst=5)
+    limiter.update_from_headers({'x-ratelimit-remaining': '2', 'x-ratelimit-reset': '20'})
+
+    limiter.on_rate_limited(fallback=60)
+
+    assert limiter.acquire() == 20.0
+
+
+def test_429_without_any_reset_uses_fallback():
+    limiter, _ = make_limiter(requests_per_minute=60, burst=5)
+
+    limiter.on_rate_limited(fallback=7)
+
+    assert limiter.acquire() == 7.0
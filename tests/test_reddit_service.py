@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from mention_store import WatermarkStore, KeywordStatsStore
+from reddit_service import RedditService
+
+
+def submission(id, title, created_utc):  # noqa: A002
+    return SimpleNamespace(id=id, title=title, selftext="", author="skipper", created_utc=created_utc,
+                           permalink=f"/r/boats/comments/{id}", fullname=f"t3_{id}",
+                           subreddit=SimpleNamespace(display_name="boats"))
+
+
+LISTING = [submission("a", "The Inca left port", 500.0), submission("b", "Quiet day", 400.0),
+           submission("c", "Inca is back", 300.0), submission("d", "Inca again", 200.0)]
+
+
+class FakeSubreddit:
+    """Search listing over LISTING that honours `after` and `limit`, optionally failing after some items"""
+
+    def __init__(self, requests, fail_after=None):
+        self.requests = requests
+        self.fail_after = fail_after
+
+    def search(self, query, limit, time_filter, params=None, **kwargs):
+        self.requests.append({'after': (params or {}).get('after'), 'limit': limit})
+        fullnames = [item.fullname for item in LISTING]
+        start = fullnames.index(params['after']) + 1 if params else 0
+        for count, item in enumerate(LISTING[start:start + limit]):
+            if count == self.fail_after:
+                raise RuntimeError("connection reset")
+            yield item
+
+
+def service(requests, fail_after=None):
+    reddit_service = RedditService("id", "secret", "test")
+    reddit_service.reddit = SimpleNamespace(subreddit=lambda name: FakeSubreddit(requests, fail_after))
+    return reddit_service
+
+
+def test_resumed_search_continues_after_the_checkpoint():
+    requests, checkpoints = [], []
+
+    with pytest.raises(RuntimeError):
+        service(requests, fail_after=2)._make_api_request(
+            "boats", "inca", 10, "all", False, 0,
+            checkpoint_callback=lambda state, mentions: checkpoints.append((state, [m['id'] for m in mentions])))
+
+    assert checkpoints[-1] == ({'after': 't3_b', 'seen': 2, 'newest_seen': 500.0}, [])
+    resumed = service(requests)._make_api_request("boats", "inca", 10, "all", False, 0,
+                                                  resume_state=checkpoints[-1][0])
+
+    # Only the submissions after the cursor are fetched, within what is left of the limit
+    assert requests[-1] == {'after': 't3_b', 'limit': 8}
+    assert [mention['id'] for mention in resumed] == ["c", "d"]
+
+
+def test_search_with_its_limit_used_up_makes_no_request():
+    requests = []
+
+    results = service(requests)._make_api_request("boats", "inca", 2, "all", False, 0,
+                                                  resume_state={'after': 't3_b', 'seen': 2, 'newest_seen': 500.0})
+
+    assert requests == []
+    assert len(results) == 0
+
+
+def test_incremental_search_stops_at_the_watermark(tmp_path):
+    watermarks = WatermarkStore(str(tmp_path / "mentions.db"))
+    watermarks.set("boats", "inca", 300.0)
+    reddit_service = service([])
+    reddit_service.watermark_store = watermarks
+
+    results = reddit_service._make_api_request("boats", "inca", 10, "all", False, 0, incremental=True)
+
+    # c (created at the watermark) and everything older were handled by the previous run
+    assert [mention['id'] for mention in results] == ["a"]
+    assert watermarks.get("boats", "inca") == 500.0
+    watermarks.close()
+
+
+def test_completed_search_records_each_keywords_yield(tmp_path):
+    stats = KeywordStatsStore(str(tmp_path / "mentions.db"))
+    reddit_service = service([])
+    reddit_service.keyword_stats = stats
+
+    reddit_service._make_api_request("boats", '"inca" OR "quiet"', 10, "all", False, 0,
+                                     match_keywords=["inca", "quiet"])
+
+    recorded = stats.get()
+    assert {keyword: recorded[keyword]['raw_hits'] for keyword in recorded} == {'inca': 3, 'quiet': 1}
+    assert {keyword: recorded[keyword]['retained_hits'] for keyword in recorded} == {'inca': 3, 'quiet': 1}
+    assert {keyword: recorded[keyword]['searches'] for keyword in recorded} == {'inca': 1, 'quiet': 1}
+    stats.close()
+
+
+def test_failed_search_records_no_yield(tmp_path):
+    stats = KeywordStatsStore(str(tmp_path / "mentions.db"))
+    reddit_service = service([], fail_after=1)
+    reddit_service.keyword_stats = stats
+
+    with pytest.raises(RuntimeError):
+        reddit_service._make_api_request("boats", "inca", 10, "all", False, 0)
+
+    assert stats.get() == {}
+    stats.close()
@@ -0,0 +1,83 @@
+import time
+
+from api_budget import BudgetExceeded
+from mention_buffer import MentionBuffer
+from query_planner import QueryGroup, QueryPlan
+from search_executor import SearchExecutor, build_tasks
+
+
+class FakeService:
+    """Finds one mention per submission in `submissions`; earlier subreddits take longer"""
+
+    def __init__(self, submissions=2, fail=(), budget_after=None):
+        self.submissions = submissions
+        self.fail = fail
+        self.budget_after = budget_after
+
+    def _make_api_request(self, subreddit, keyword, match_keywords, resume_state, checkpoint_callback,
+                          limit, keep_results=True, **kwargs):
+        index = int(subreddit[3:])
+        time.sleep(0.02 * (3 - index))  # Later tasks finish first
+        if subreddit in self.fail:
+            raise RuntimeError("server error")
+        results = MentionBuffer()
+        for n in range(self.submissions):
+            if self.budget_after is not None and n >= self.budget_after:
+                error = BudgetExceeded("budget spent")
+                error.partial_results = results
+                raise error
+            results.add(id=f"{subreddit}-{n}", keyword=match_keywords[0], title="t", author="a",
+                        created_utc=float(n), permalink="/p", snippet="s", source="post", subreddit=subreddit)
+            if checkpoint_callback:
+                checkpoint_callback({'after': f"t3_{n}", 'seen': n + 1, 'newest_seen': 0.0}, results[-1:])
+        return results
+
+
+def tasks(subreddits=("sub0", "sub1", "sub2")):
+    return build_tasks({'vessel': QueryPlan([QueryGroup('"inca"', ["inca"])], ["inca"], list(subreddits))})
+
+
+def test_run_returns_results_in_task_order():
+    executor = SearchExecutor(FakeService, max_workers=3)
+    finished = []
+
+    results = executor.run(tasks(), result_callback=lambda task, found: finished.append(task.subreddit), limit=10)
+
+    assert finished != ["sub0", "sub1", "sub2"]  # Tasks completed out of order...
+    assert [mention['id'] for mention in results] == [  # ...but the results come back in task order
+        "sub0-0", "sub0-1", "sub1-0", "sub1-1", "sub2-0", "sub2-1"]
+    assert {mention['entity_type'] for mention in results} == {"vessel"}
+
+
+def test_failed_task_is_reported_and_not_completed():
+    executor = SearchExecutor(lambda: FakeService(fail=("sub1",)), max_workers=3)
+    run_tasks = tasks()
+
+    results = executor.run(run_tasks, limit=10)
+
+    assert [task.completed for task in run_tasks] == [True, False, True]
+    assert run_tasks[1].error == "server error"
+    assert [mention['id'] for mention in results] == ["sub0-0", "sub0-1", "sub2-0", "sub2-1"]
+
+
+def test_stream_yields_each_tasks_submissions_in_order_then_done():
+    executor = SearchExecutor(FakeService, max_workers=3)
+
+    events = list(executor.stream(tasks(), limit=10))
+
+    for subreddit in ("sub0", "sub1", "sub2"):
+        task_events = [event for event in events if event.task.subreddit == subreddit]
+        assert [event.done for event in task_events] == [False, False, True]
+        assert [event.state['seen'] for event in task_events[:2]] == [1, 2]
+        assert [mention['id'] for event in task_events for mention in event.mentions] == [
+            f"{subreddit}-0", f"{subreddit}-1"]
+        assert task_events[-1].task.completed
+
+
+def test_budget_exhaustion_keeps_partial_results():
+    executor = SearchExecutor(lambda: FakeService(budget_after=1), max_workers=1)
+
+    results = executor.run(tasks(("sub2",)), limit=10)
+
+    assert executor.budget_exhausted
+    assert [mention['id'] for mention in results] == ["sub2-0"]
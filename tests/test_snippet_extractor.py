@@ -0,0 +1,59 @@
+from snippet_extractor import SnippetExtractor
+
+TEXT = "a" * 50 + "HIT1" + "b" * 6 + "HIT2" + "c" * 100 + "HIT3" + "d" * 50
+
+
+def test_overlapping_windows_are_merged():
+    extractor = SnippetExtractor(window=20)
+
+    snippets = extractor.extract(TEXT, [(50, 54), (60, 64)])
+
+    assert snippets == ["..." + TEXT[40:74] + "..."]
+
+
+def test_distant_hits_get_separate_snippets():
+    extractor = SnippetExtractor(window=20)
+
+    snippets = extractor.extract(TEXT, [(164, 168), (50, 54)])
+
+    assert snippets == ["..." + TEXT[40:64] + "...", "..." + TEXT[154:178] + "..."]
+
+
+def test_windows_that_just_touch_are_merged():
+    text = "x" * 10 + "A" + "y" * 10 + "B" + "z" * 10
+    extractor = SnippetExtractor(window=10)
+
+    # Windows [5, 16] and [16, 27] share their edge
+    assert extractor.extract(text, [(10, 11), (21, 22)]) == ["..." + text[5:27] + "..."]
+
+
+def test_windows_are_clipped_to_the_text():
+    extractor = SnippetExtractor(window=20)
+
+    assert extractor.extract("HIT at the start", [(0, 3)]) == ["HIT at the st..."]
+    assert extractor.extract("short HIT", [(6, 9)]) == ["short HIT"]
+
+
+def test_max_snippets_is_respected():
+    text = " ".join(["word"] * 40)
+    extractor = SnippetExtractor(window=4, max_snippets=2)
+
+    spans = [(i * 25, i * 25 + 4) for i in range(6)]
+
+    assert len(extractor.extract(text, spans)) == 2
+
+
+def test_no_hits_returns_start_of_text():
+    extractor = SnippetExtractor(window=10)
+
+    assert extractor.extract("0123456789abcdef", []) == ["0123456789..."]
+
+
+def test_snippets_by_keyword_joins_each_keywords_snippets():
+    extractor = SnippetExtractor(window=20, separator=" | ")
+    hits = [("hit3", 164, 168), ("hit", 50, 54), ("hit", 164, 168)]
+
+    snippets = extractor.snippets_by_keyword(TEXT, hits)
+
+    assert list(snippets) == ["hit3", "hit"]
+    assert snippets["hit"] == "..." + TEXT[40:64] + "... | ..." + TEXT[154:178] + "..."
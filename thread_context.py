@@ -0,0 +1,196 @@
+import re
+from typing import List, Dict, Any, Optional, Callable, Iterable
+from urllib.parse import urlparse
+
+from api_budget import BudgetExceeded
+from web_scraper import ContentEnricher
+
+# Thread id in a Reddit permalink (/r/<subreddit>/comments/<id>/...)
+THREAD_ID_RE = re.compile(r"/comments/([a-z0-9]+)", re.IGNORECASE)
+
+REDDIT_DOMAINS = ("reddit.com", "redd.it", "redditmedia.com")
+
+# Most fullnames Reddit's /api/info accepts per request
+INFO_BATCH_SIZE = 100
+
+
+def thread_id(permalink: str) -> Optional[str]:
+    """Submission id of a Reddit permalink (None if it isn't one)"""
+    match = THREAD_ID_RE.search(permalink or "")
+    return match.group(1).lower() if match else None
+
+
+def is_offsite(url: str) -> bool:
+    """Whether a link points outside Reddit"""
+    host = urlparse(url or "").netloc.lower()
+    return bool(host) and not any(host == domain or host.endswith(f".{domain}") for domain in REDDIT_DOMAINS)
+
+
+class ThreadContextFetcher:
+    """
+    Builds extra context for mentions from Reddit's structured data
+
+    Instead of downloading and scraping each permalink's HTML page, post
+    bodies come from /api/info (up to 100 threads per request) and the
+    neighbourhood of a matched comment - its parent, the siblings around it
+    and its first replies - from the thread's comment tree, fetched once per
+    thread through the service's PRAW session and comment cache. Link posts
+    pointing off Reddit fall back to trafilatura via a ContentEnricher.
+    """
+
+    def __init__(self, reddit_service, neighbours: int = 2, comment_limit: int = 200,
+                 fallback: Optional[ContentEnricher] = None):
+        """
+        Initialize the fetcher
+
+        Args:
+            reddit_service: RedditService whose PRAW client, comment cache and budget are used
+            neighbours: Siblings on each side and replies shown around a matched comment
+            comment_limit: Comments requested per thread when a tree has to be fetched
+            fallback: Enricher for off-site links of link posts (none skips them)
+        """
+        self.reddit_service = reddit_service
+        self.neighbours = max(0, neighbours)
+        self.comment_limit = comment_limit
+        self.fallback = fallback
+        self.stats = {'threads': 0, 'info_requests': 0, 'tree_requests': 0, 'offsite_pages': 0}
+
+    def fetch(self, mentions: Iterable[Dict[str, Any]],
+              progress_callback: Optional[Callable[[float, str], None]] = None) -> Dict[str, Optional[str]]:
+        """
+        Get the context text of many mentions
+
+        Args:
+            mentions: Mention dicts (id, permalink, source as stored by MentionStore)
+            progress_callback: Callback function to report progress
+
+        Returns:
+            Dictionary from mention id to context text (None where the thread could not be loaded)
+        """
+        mentions = list({mention['id']: mention for mention in mentions}.values())
+        by_thread: Dict[str, List[Dict[str, Any]]] = {}
+        for mention in mentions:
+            sid = thread_id(mention.get('permalink'))
+            if sid:
+                by_thread.setdefault(sid, []).append(mention)
+        self.stats['threads'] += len(by_thread)
+
+        # Comment trees, for threads with comment mentions; the tree response includes the post too
+        posts: Dict[str, Dict[str, Any]] = {}
+        trees: Dict[str, List[Dict[str, Any]]] = {}
+        tree_threads = [sid for sid, items in by_thread.items() if any(m.get('source') == 'comment' for m in items)]
+        for done, sid in enumerate(tree_threads, 1):
+            tree = self._comment_tree(sid, posts)
+            if tree is not None:
+                trees[sid] = tree
+            if progress_callback:
+                progress_callback(0.8 * done / len(by_thread), f"Loaded {done} of {len(tree_threads)} comment trees")
+
+        # Post bodies of the remaining threads, batched through /api/info
+        missing = [sid for sid in by_thread if sid not in posts]
+        for start in range(0, len(missing), INFO_BATCH_SIZE):
+            posts.update(self._post_info(missing[start:start + INFO_BATCH_SIZE]))
+            if progress_callback:
+                loaded = len(tree_threads) + min(len(missing), start + INFO_BATCH_SIZE)
+                progress_callback(0.8 * loaded / len(by_thread), f"Loaded {loaded} of {len(by_thread)} threads")
+
+        # Off-site articles linked from link posts
+        linked: Dict[str, Optional[str]] = {}
+        offsite = [post['url'] for post in posts.values() if not post['is_self'] and is_offsite(post['url'])]
+        if offsite and self.fallback is not None:
+            linked = self.fallback.enrich(offsite)
+            self.stats['offsite_pages'] += len(offsite)
+
+        results: Dict[str, Optional[str]] = {}
+        for sid, items in by_thread.items():
+            post = posts.get(sid)
+            for mention in items:
+                if post is None:
+                    results[mention['id']] = None
+                    continue
+                parts = [self._format_post(post, linked.get(post['url']))]
+                if mention.get('source') == 'comment':
+                    parts.append(self._format_neighbourhood(trees.get(sid, []), mention['id']))
+                results[mention['id']] = "\n\n".join(part for part in parts if part)
+        for mention in mentions:
+            results.setdefault(mention['id'], None)
+        if progress_callback:
+            progress_callback(1.0, f"Context for {len(results)} mentions from {len(by_thread)} threads")
+        return results
+
+    def _comment_tree(self, sid: str, posts: Dict[str, Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Flattened comments of a thread with parent ids, from the comment cache or one request"""
+        service = self.reddit_service
+        comments = service.comment_cache.get(sid)
+        if comments is not None and all('parent_id' in comment for comment in comments):
+            return comments
+        try:
+            submission, comments = service.fetch_comment_tree(sid, comment_limit=self.comment_limit)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching comments for thread {sid}: {str(e)}")
+            return None
+        self.stats['tree_requests'] += 1
+        posts[sid] = self._post_fields(submission)
+        return comments
+
+    def _post_info(self, sids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Title, body and link of up to 100 submissions in one /api/info request"""
+        try:
+            submissions = list(self.reddit_service.reddit.info(fullnames=[f"t3_{sid}" for sid in sids]))
+            self.stats['info_requests'] += 1
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching {len(sids)} posts: {str(e)}")
+            return {}
+        return {submission.id.lower(): self._post_fields(submission) for submission in submissions}
+
+    def _post_fields(self, submission) -> Dict[str, Any]:
+        """The submission attributes the context is built from"""
+        return {
+            'title': submission.title,
+            'author': str(submission.author),
+            'selftext': getattr(submission, 'selftext', '') or '',
+            'url': getattr(submission, 'url', '') or '',
+            'is_self': getattr(submission, 'is_self', True),
+        }
+
+    def _format_post(self, post: Dict[str, Any], linked_text: Optional[str]) -> str:
+        """Post title and body, plus the linked article for link posts"""
+        lines = [f"Post by {post['author']}: {post['title']}"]
+        if post['selftext']:
+            lines.append(post['selftext'])
+        if linked_text:
+            lines.append(f"Linked page ({post['url']}):\n{linked_text}")
+        elif not post['is_self'] and post['url']:
+            lines.append(f"Link: {post['url']}")
+        return "\n\n".join(lines)
+
+    def _format_neighbourhood(self, comments: List[Dict[str, Any]], comment_id: str) -> str:
+        """Parent, surrounding siblings and first replies of a comment"""
+        by_id = {comment['id']: comment for comment in comments}
+        comment = by_id.get(comment_id)
+        if comment is None:
+            return ""
+        parent_id = comment.get('parent_id') or ""
+        siblings = [c for c in comments if c.get('parent_id') == parent_id]
+        position = next(i for i, c in enumerate(siblings) if c['id'] == comment_id)
+        replies = [c for c in comments if c.get('parent_id') == f"t1_{comment_id}"][:self.neighbours]
+
+        lines = []
+        parent = by_id.get(parent_id[3:]) if parent_id.startswith("t1_") else None
+        if parent is not None:
+            lines.append(f"In reply to {parent['author']}: {parent['body']}")
+        for sibling in siblings[max(0, position - self.neighbours):position + self.neighbours + 1]:
+            marker = ">> " if sibling['id'] == comment_id else ""
+            lines.append(f"{marker}{sibling['author']}: {sibling['body']}")
+            if sibling['id'] == comment_id:
+                lines.extend(f"   reply from {reply['author']}: {reply['body']}" for reply in replies)
+        return "\n\n".join(lines)
+
+    def summary(self) -> str:
+        """Human readable request counts"""
+        return (f"Thread context: {self.stats['threads']} threads, {self.stats['info_requests']} info requests, "
+                f"{self.stats['tree_requests']} comment trees fetched, {self.stats['offsite_pages']} off-site pages")
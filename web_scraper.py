@@ -1,7 +1,20 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
+from typing import Dict, Optional, Callable, Iterable
+
 import trafilatura
+import urllib3
+
+from page_cache import PageCache
+
+# Requests open at once across all hosts, and to any single host
+ENRICH_MAX_CONNECTIONS = 16
+ENRICH_PER_HOST_LIMIT = 4
+
+ENRICH_USER_AGENT = "Mozilla/5.0 (compatible; fish-tracker-enricher/1.0)"
 
 
-def get_website_text_content(url: str) -> str:
+def get_website_text_content(url: str, cache: Optional[PageCache] = None) -> str:
     """
     This function takes a url and returns the main text content of the website.
     The text content is extracted using trafilatura and easier to understand.
@@ -10,6 +23,7 @@ def get_website_text_content(url: str) -> str:
 
     Args:
         url: URL of the website to scrape
+        cache: Page cache to answer from and store the result in
         
     Returns:
         Extracted text content from the website
@@ -17,6 +31,10 @@ def get_website_text_content(url: str) -> str:
     Raises:
         Exception: If there is an error fetching or processing the URL
     """
+    if cache is not None:
+        cached = cache.get(url)
+        if cached is not None:
+            return cached
     try:
         # Send a request to the website
         downloaded = trafilatura.fetch_url(url)
@@ -30,6 +48,170 @@ def get_website_text_content(url: str) -> str:
         if not text:
             raise Exception(f"Failed to extract text content from {url}")
             
+        if cache is not None:
+            cache.put(url, text)
         return text
     except Exception as e:
-        raise Exception(f"Error scraping website: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error scraping website: {str(e)}")
+
+
+def extract_text(html: bytes, url: str) -> Optional[str]:
+    """Run trafilatura on a downloaded page (module level so process pools can call it)"""
+    try:
+        return trafilatura.extract(html, url=url)
+    except Exception as e:
+        print(f"Error extracting text from {url}: {str(e)}")
+        return None
+
+
+class ContentEnricher:
+    """
+    Fetches and extracts many pages at once
+
+    Downloads go through one pooled urllib3 session on a thread pool, with
+    at most `per_host_limit` connections open to any host (a blocking
+    connection pool per host), and trafilatura runs in a process pool so
+    extraction doesn't hold up the downloads. Extracted texts are read from
+    and written to a PageCache, so a page is only downloaded again once its
+    cache entry has expired. Use as a context manager, or call close().
+    """
+
+    def __init__(self, cache: Optional[PageCache] = None, max_connections: int = ENRICH_MAX_CONNECTIONS,
+                 per_host_limit: int = ENRICH_PER_HOST_LIMIT, extract_workers: Optional[int] = None,
+                 timeout: float = 15.0, user_agent: str = ENRICH_USER_AGENT):
+        """
+        Initialize the enricher
+
+        Args:
+            cache: Page cache shared with get_website_text_content (none by default)
+            max_connections: Downloads running at once across all hosts
+            per_host_limit: Downloads running at once against one host
+            extract_workers: Extraction processes (CPU count by default; 0 extracts on the download threads)
+            timeout: Read timeout per request in seconds
+            user_agent: User-Agent header sent with every request
+        """
+        self.cache = cache
+        self.max_connections = max(1, max_connections)
+        self.extract_workers = extract_workers
+        self.http = urllib3.PoolManager(
+            num_pools=max(10, self.max_connections),
+            maxsize=max(1, per_host_limit),
+            block=True,  # Wait for a free connection instead of opening more than maxsize per host
+            timeout=urllib3.Timeout(connect=5.0, read=timeout),
+            retries=urllib3.Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+            headers={'User-Agent': user_agent}
+        )
+        self._extractor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {'cached': 0, 'fetched': 0, 'failed': 0}
+
+    def __enter__(self) -> "ContentEnricher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the extraction processes and the connection pools"""
+        if self._extractor is not None:
+            self._extractor.shutdown()
+            self._extractor = None
+        self.http.clear()
+
+    def fetch(self, url: str) -> Optional[bytes]:
+        """
+        Download one page through the pooled session
+
+        Returns:
+            The response body, or None if the page could not be downloaded
+        """
+        try:
+            response = self.http.request("GET", url)
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return None
+        if response.status != 200:
+            print(f"Error fetching {url}: HTTP {response.status}")
+            return None
+        return response.data
+
+    def enrich(self, urls: Iterable[str],
+               progress_callback: Optional[Callable[[float, str], None]] = None) -> Dict[str, Optional[str]]:
+        """
+        Get the text content of many pages
+
+        Cached pages are answered from the cache; the rest are downloaded
+        concurrently and extracted as soon as each download finishes.
+
+        Args:
+            urls: Page URLs (duplicates are fetched once)
+            progress_callback: Callback function to report progress
+
+        Returns:
+            Dictionary from URL to extracted text (None where fetching or extraction failed)
+        """
+        urls = list(dict.fromkeys(urls))
+        results: Dict[str, Optional[str]] = {}
+        pending = []
+        for url in urls:
+            cached = self.cache.get(url) if self.cache is not None else None
+            if cached is not None:
+                results[url] = cached
+                self.stats['cached'] += 1
+            else:
+                pending.append(url)
+
+        done = len(results)
+        if progress_callback:
+            progress_callback(done / len(urls) if urls else 1.0,
+                              f"{done} of {len(urls)} pages cached, fetching {len(pending)}")
+
+        extractions: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=self.max_connections) as downloads:
+            fetches = {downloads.submit(self.fetch, url): url for url in pending}
+            for future in as_completed(fetches):
+                url = fetches[future]
+                html = future.result()
+                if html is None:
+                    results[url] = None
+                    self.stats['failed'] += 1
+                    done += 1
+                    continue
+                extractions[self._submit_extraction(html, url)] = url
+
+        for future in as_completed(extractions):
+            url = extractions[future]
+            text = future.result()
+            results[url] = text
+            if text:
+                self.stats['fetched'] += 1
+                if self.cache is not None:
+                    self.cache.put(url, text)
+            else:
+                self.stats['failed'] += 1
+            done += 1
+            if progress_callback:
+                progress_callback(done / len(urls), f"Extracted {done} of {len(urls)} pages")
+        return {url: results.get(url) for url in urls}
+
+    def _submit_extraction(self, html: bytes, url: str) -> Future:
+        """Queue a page for extraction in the process pool (or extract it right away)"""
+        if self.extract_workers == 0:
+            future: Future = Future()
+            future.set_result(extract_text(html, url))
+            return future
+        with self._lock:
+            if self._extractor is None:
+                self._extractor = ProcessPoolExecutor(max_workers=self.extract_workers)
+        return self._extractor.submit(extract_text, html, url)
+
+    def summary(self) -> str:
+        """Human readable counts of cached, fetched and failed pages"""
+        return (f"Enrichment: {self.stats['cached']} pages from cache, {self.stats['fetched']} fetched, "
+                f"{self.stats['failed']} failed")
+
+
+def permalink_url(permalink: str, base_url: str = "https://www.reddit.com") -> str:
+    """Full URL of a Reddit permalink (base_url can point at a local stand-in)"""
+    return f"{base_url.rstrip('/')}{permalink}"
+